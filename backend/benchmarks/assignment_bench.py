@@ -0,0 +1,89 @@
+"""
+Solve time and total estimated delivery time of greedy per-delivery dispatch against global matching,
+exact and pruned to the cheapest couriers of every delivery.
+
+    python backend/benchmarks/assignment_bench.py --sizes 50x100 200x300 500x1000 1000x2000
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(BACKEND_DIR), str(BACKEND_DIR / 'bot')]
+
+import numpy as np  # noqa: E402
+
+from assignment import UNASSIGNED, solve_assignment  # noqa: E402
+from distance_engine import DeliveryDistanceMatrix  # noqa: E402
+from distance_matrix_bench import make_couriers, random_point  # noqa: E402
+from schemas.schemas import Delivery  # noqa: E402
+from utils import DistanceCalculator  # noqa: E402
+
+
+def make_local_deliveries(count: int) -> list[Delivery]:
+    """Consumers live a few kilometers from the shop, like in real city deliveries"""
+    deliveries = []
+    for delivery_id in range(count):
+        pickup = random_point()
+        consumer = random_point(spread=0.03)
+        deliveries.append(
+            Delivery(
+                delivery_id,
+                *pickup,
+                pickup[0] + consumer[0] - 55.75,
+                pickup[1] + consumer[1] - 37.62,
+                priority=random.randint(0, 3),
+            )
+        )
+    return deliveries
+
+
+def greedy(cost: np.ndarray) -> np.ndarray:
+    taken = np.zeros(cost.shape[1], dtype=bool)
+    assignment = np.full(cost.shape[0], UNASSIGNED)
+    for row in range(cost.shape[0]):
+        distances = np.where(taken, np.inf, cost[row])
+        column = int(np.argmin(distances))
+        if np.isfinite(distances[column]):
+            taken[column] = True
+            assignment[row] = column
+    return assignment
+
+
+def summary(cost: np.ndarray, assignment: np.ndarray) -> tuple[int, float]:
+    matched = np.flatnonzero(assignment != UNASSIGNED)
+    return len(matched), float(cost[matched, assignment[matched]].sum())
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', nargs='+', default=['50x100', '200x300', '500x1000', '1000x2000'])
+    args = parser.parse_args()
+
+    random.seed(0)
+    calculator = DistanceCalculator()
+    print(f'{"size":>10}{"mode":>9}{"assigned":>10}{"total minutes":>15}{"solve, s":>10}')
+    for size in args.sizes:
+        deliveries_count, couriers_count = map(int, size.split('x'))
+        deliveries = make_local_deliveries(deliveries_count)
+        matrix = DeliveryDistanceMatrix(deliveries, make_couriers(couriers_count))
+        cost = await calculator.get_assignment_cost(deliveries, matrix.total)
+
+        solvers = (
+            ('greedy', greedy),
+            ('matching', solve_assignment),
+            ('pruned', lambda cost_: solve_assignment(cost_, calculator.assignment_candidates)),
+        )
+        for mode, solver in solvers:
+            started = time.perf_counter()
+            assignment = solver(cost)
+            elapsed = time.perf_counter() - started
+            assigned, total = summary(cost, assignment)
+            print(f'{size:>10}{mode:>9}{assigned:>10}{total:>15.0f}{elapsed:>10.3f}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
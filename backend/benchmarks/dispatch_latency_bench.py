@@ -0,0 +1,96 @@
+"""
+Time from delivery arrival to courier assignment: periodic distribution job against event-driven dispatch with
+debounce. Deliveries are pushed from a listener-like thread at random moments.
+
+    python backend/benchmarks/dispatch_latency_bench.py --deliveries 50 --poll-interval 5
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(BACKEND_DIR), str(BACKEND_DIR / 'bot')]
+
+from distance_matrix_bench import make_couriers, random_point  # noqa: E402
+from schemas.schemas import Delivery, couriers, deliveries  # noqa: E402
+from services.delivery_service import DeliveryService  # noqa: E402
+from services.dispatch_service import DispatchTrigger  # noqa: E402
+from spatial import couriers_index  # noqa: E402
+
+
+async def assign(arrived_at: dict[int, float], latencies: list[float]) -> None:
+    async for result in await DeliveryService().start_delivering():
+        if result['success']:
+            latencies.append(time.perf_counter() - arrived_at[result['delivery'].id])
+
+
+def produce(count: int, spread: float, arrived_at: dict[int, float], notify) -> None:
+    """Listener thread: deliveries come at random moments inside spread seconds"""
+    for delivery_id in range(count):
+        time.sleep(random.uniform(0, 2 * spread / count))
+        pickup = random_point()
+        consumer = (pickup[0] + random.uniform(-0.02, 0.02), pickup[1] + random.uniform(-0.02, 0.02))
+        arrived_at[delivery_id] = time.perf_counter()
+        deliveries[delivery_id] = Delivery(delivery_id, *pickup, *consumer)
+        notify()
+
+
+async def run(mode: str, count: int, poll_interval: float) -> list[float]:
+    deliveries.clear()
+    couriers.clear()
+    for courier in make_couriers(count * 2):
+        couriers[courier.id] = courier
+        # dispatch takes couriers near deliveries from spatial index
+        couriers_index.update(courier.id, courier.location.lat, courier.location.lon)
+    arrived_at: dict[int, float] = {}
+    latencies: list[float] = []
+    spread = poll_interval * 3
+
+    if mode == 'polling':
+        producer = threading.Thread(target=produce, args=(count, spread, arrived_at, lambda: None))
+        producer.start()
+        while producer.is_alive():
+            await assign(arrived_at, latencies)
+            await asyncio.sleep(poll_interval)
+        await assign(arrived_at, latencies)
+    else:
+        trigger = object.__new__(DispatchTrigger)
+        trigger.__init__()
+        trigger.bind(asyncio.get_running_loop())
+        producer = threading.Thread(
+            target=produce, args=(count, spread, arrived_at, lambda: trigger.notify('new_delivery'))
+        )
+        producer.start()
+        while producer.is_alive():
+            try:
+                await asyncio.wait_for(trigger.wait(), timeout=poll_interval)
+            except asyncio.TimeoutError:
+                continue
+            await assign(arrived_at, latencies)
+        await assign(arrived_at, latencies)
+    producer.join()
+    return latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--deliveries', type=int, default=50)
+    parser.add_argument('--poll-interval', type=float, default=5)
+    args = parser.parse_args()
+
+    random.seed(0)
+    print(f'{"mode":>8}{"assigned":>10}{"median, ms":>12}{"p95, ms":>10}')
+    for mode in ('polling', 'events'):
+        latencies = sorted(await run(mode, args.deliveries, args.poll_interval))
+        median = statistics.median(latencies) * 1000
+        p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+        print(f'{mode:>8}{len(latencies):>10}{median:>12.1f}{p95:>10.1f}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
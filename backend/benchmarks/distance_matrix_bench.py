@@ -0,0 +1,83 @@
+"""
+Distance calculation for a whole distribution tick: per-pair geopy path against DeliveryDistanceMatrix.
+
+Per-pair path is timed on a sample of pairs and extrapolated to the full tick:
+    python backend/benchmarks/distance_matrix_bench.py --deliveries 50 --couriers 1000 10000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(BACKEND_DIR), str(BACKEND_DIR / 'bot')]
+
+from geopy import distance  # noqa: E402
+
+from distance_engine import DeliveryDistanceMatrix  # noqa: E402
+from schemas.schemas import Courier, Delivery, Location  # noqa: E402
+
+CENTER = (55.75, 37.62)
+
+
+def random_point(spread: float = 0.15) -> tuple[float, float]:
+    return CENTER[0] + random.uniform(-spread, spread), CENTER[1] + random.uniform(-spread, spread)
+
+
+def make_deliveries(count: int) -> list[Delivery]:
+    deliveries = []
+    for delivery_id in range(count):
+        pickup, consumer = random_point(), random_point()
+        deliveries.append(Delivery(delivery_id, *pickup, *consumer))
+    return deliveries
+
+
+def make_couriers(count: int) -> list[Courier]:
+    return [
+        Courier(courier_id, 'username', 'first', 'last', Location(*random_point()))
+        for courier_id in range(count)
+    ]
+
+
+def per_pair_geopy(deliveries: list[Delivery], couriers: list[Courier], sample_pairs: int) -> float:
+    """Returns seconds which old path would spend on the full tick"""
+    pairs = [(delivery, courier) for delivery in deliveries for courier in couriers]
+    sample = pairs[:sample_pairs]
+    started = time.perf_counter()
+    for delivery, courier in sample:
+        distance.distance((courier.location.lat, courier.location.lon), (delivery.latitude, delivery.longitude))
+        distance.distance(
+            (delivery.latitude, delivery.longitude),
+            (delivery.consumer_latitude, delivery.consumer_longitude),
+        )
+    return (time.perf_counter() - started) * len(pairs) / len(sample)
+
+
+def vectorized(deliveries: list[Delivery], couriers: list[Courier], refine: int) -> float:
+    started = time.perf_counter()
+    matrix = DeliveryDistanceMatrix(deliveries, couriers)
+    matrix.refine(refine)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--deliveries', type=int, default=50)
+    parser.add_argument('--couriers', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--refine', type=int, default=3)
+    parser.add_argument('--sample-pairs', type=int, default=5000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    deliveries = make_deliveries(args.deliveries)
+    print(f'{"couriers":>9}{"geopy per pair, s":>20}{"vectorized, s":>16}{"speedup":>10}')
+    for couriers_count in args.couriers:
+        couriers = make_couriers(couriers_count)
+        old = per_pair_geopy(deliveries, couriers, args.sample_pairs)
+        new = vectorized(deliveries, couriers, args.refine)
+        print(f'{couriers_count:>9}{old:>20.3f}{new:>16.4f}{old / new:>9.0f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Throughput of the old producer-per-message send path against the pooled KafkaSender.
+
+Uses librdkafka's in-process mock cluster as a stand-in broker, so it runs without docker:
+    python backend/benchmarks/kafka_producer_bench.py --messages 20000
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from confluent_kafka import Producer  # noqa: E402
+
+from kafka_common.sender import KafkaSender, ProducerRegistry  # noqa: E402
+
+TOPIC = 'courier_location'
+MESSAGE = json.dumps({'courier_id': 123456789, 'location': {'lat': 55.75, 'lon': 37.61}})
+
+
+def start_stand_in_broker() -> tuple[Producer, str]:
+    """Starts mock cluster inside a keeper producer and returns it with bootstrap address of the broker"""
+    keeper = Producer({'test.mock.num.brokers': 1, 'log_level': 0})
+    broker = next(iter(keeper.list_topics(timeout=5).brokers.values()))
+    return keeper, f'{broker.host}:{broker.port}'
+
+
+def legacy_send(bootstrap: str, count: int) -> float:
+    """Old path: fresh producer, single produce and blocking flush for every message"""
+    started = time.perf_counter()
+    for _ in range(count):
+        producer = Producer({'bootstrap.servers': bootstrap})
+        producer.produce(TOPIC, MESSAGE.encode('utf-8'))
+        producer.flush()
+    return count / (time.perf_counter() - started)
+
+
+def pooled_send(bootstrap: str, count: int) -> float:
+    sender = KafkaSender(TOPIC, config={'bootstrap.servers': bootstrap})
+    started = time.perf_counter()
+    for _ in range(count):
+        sender.send(MESSAGE)
+    sender.flush()
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--legacy-messages', type=int, default=100)
+    args = parser.parse_args()
+
+    keeper, bootstrap = start_stand_in_broker()
+    legacy = legacy_send(bootstrap, args.legacy_messages)
+    pooled = pooled_send(bootstrap, args.messages)
+    ProducerRegistry.flush_all()
+    keeper.flush()
+
+    print(f'legacy producer per message: {legacy:>12.0f} msgs/sec')
+    print(f'pooled producer:             {pooled:>12.0f} msgs/sec')
+    print(f'speedup:                     {pooled / legacy:>12.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Lateness check of active deliveries: one by one with repository get and geopy per delivery against batch mode
+with vectorized haversine. Every delivery has its own busy courier.
+
+    python backend/benchmarks/notification_bench.py --deliveries 1000 10000
+"""
+import argparse
+import asyncio
+import datetime
+import random
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(BACKEND_DIR), str(BACKEND_DIR / 'bot')]
+
+from distance_matrix_bench import random_point  # noqa: E402
+from schemas.schemas import Courier, Delivery, Location, couriers, deliveries  # noqa: E402
+from services.notification_service import NotificationService  # noqa: E402
+
+
+def fill_storage(count: int) -> None:
+    deliveries.clear()
+    couriers.clear()
+    now = datetime.datetime.now()
+    for delivery_id in range(count):
+        couriers[delivery_id] = Courier(
+            delivery_id, 'username', 'first', 'last', Location(*random_point()), busy=True
+        )
+        deliveries[delivery_id] = Delivery(
+            delivery_id,
+            *random_point(),
+            *random_point(),
+            courier=delivery_id,
+            status=random.choice((3, 4)),
+            # none of estimations runs out while the slow check goes, so time out sets must be equal
+            estimated_time=now + datetime.timedelta(minutes=random.choice((-1, 1)) * random.uniform(1, 120)),
+        )
+
+
+async def check(batch_mode: bool) -> tuple[float, set[int], set[int]]:
+    service = object.__new__(NotificationService)
+    service.__init__()
+    service.batch_mode = batch_mode
+    for delivery in deliveries.values():
+        delivery.last_notification_ts = None
+    started = time.perf_counter()
+    to_notify, time_out = await service.distribute_notifications()
+    elapsed = time.perf_counter() - started
+    return elapsed, {d.id for d in to_notify}, {d.id for d in time_out}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--deliveries', type=int, nargs='+', default=[1000, 10000])
+    args = parser.parse_args()
+
+    random.seed(0)
+    print(f'{"deliveries":>10}{"one by one, ms":>16}{"batch, ms":>11}{"speedup":>9}{"same notify":>13}')
+    for count in args.deliveries:
+        fill_storage(count)
+        one_by_one, notify, time_out = await check(batch_mode=False)
+        batch, batch_notify, batch_time_out = await check(batch_mode=True)
+        assert time_out == batch_time_out
+        # geodesic and haversine differ by tenths of percent, so deliveries right on the edge may differ
+        same = 1 - len(notify ^ batch_notify) / max(len(notify | batch_notify), 1)
+        print(
+            f'{count:>10}{one_by_one * 1000:>16.1f}{batch * 1000:>11.1f}'
+            f'{one_by_one / batch:>9.1f}{same:>13.2%}'
+        )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+"""
+Per-object memory footprint and attribute access time of bot records: plain dataclasses with __dict__ against
+slotted Courier/Delivery and rows of ColumnStore with hot numeric delivery fields.
+
+    python backend/benchmarks/record_memory_bench.py --count 100000
+"""
+import argparse
+import dataclasses
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(BACKEND_DIR), str(BACKEND_DIR / 'bot')]
+
+from schemas.schemas import Courier, Delivery, deliveries  # noqa: E402
+from schemas.storage import ColumnStore  # noqa: E402
+
+
+def without_slots(dataclass_: type) -> type:
+    """Same fields as passed slotted dataclass, but instances keep them in __dict__"""
+    return dataclasses.make_dataclass(
+        f'Plain{dataclass_.__name__}',
+        [(field.name, field.type, field) for field in dataclasses.fields(dataclass_)],
+    )
+
+
+def make_delivery(dataclass_: type, delivery_id: int):
+    return dataclass_(delivery_id, 55.75, 37.62, 55.76, 37.63, courier=delivery_id, priority=1)
+
+
+def make_courier(dataclass_: type, courier_id: int):
+    return dataclass_(courier_id, f'courier{courier_id}', 'Ivan', 'Ivanov')
+
+
+def measure(factory, count: int) -> tuple[list, float]:
+    tracemalloc.start()
+    objs = [factory(i) for i in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return objs, size / count
+
+
+def access_time(objs: list, repeat: int = 5) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for obj in objs:
+            obj.latitude + obj.longitude + obj.status
+    return (time.perf_counter() - started) / repeat / len(objs) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--count', type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f'{"record":>18}{"bytes/object":>14}{"access, ns":>12}')
+    for name, dataclass_, factory in (
+            ('plain delivery', without_slots(Delivery), make_delivery),
+            ('slotted delivery', Delivery, make_delivery),
+    ):
+        objs, size = measure(lambda i: factory(dataclass_, i), args.count)
+        print(f'{name:>18}{size:>14.0f}{access_time(objs):>12.1f}')
+        del objs
+
+    for name, dataclass_ in (('plain courier', without_slots(Courier)), ('slotted courier', Courier)):
+        objs, size = measure(lambda i: make_courier(dataclass_, i), args.count)
+        print(f'{name:>18}{size:>14.0f}{"":>12}')
+        del objs
+
+    fields = deliveries.columns.fields
+    columns = ColumnStore(fields, capacity=args.count)
+    tracemalloc.start()
+    objs = [make_delivery(Delivery, i) for i in range(args.count)]
+    before, _ = tracemalloc.get_traced_memory()
+    for obj in objs:
+        columns.set(obj.id, obj)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    row_bytes = len(fields) * 8
+    print(f'{"column row":>18}{row_bytes:>14}{"":>12}  (+{(after - before) / args.count:.0f} bytes/id row mapping)')
+
+    ids = [obj.id for obj in objs]
+    started = time.perf_counter()
+    objects_points = [[obj.latitude, obj.longitude, obj.status] for obj in objs]
+    objects_elapsed = time.perf_counter() - started
+    started = time.perf_counter()
+    column_points = columns.take(ids, 'latitude', 'longitude', 'status')
+    columns_elapsed = time.perf_counter() - started
+    assert len(objects_points) == len(column_points)
+    print(f'gather 3 fields of {args.count}: objects {objects_elapsed * 1000:.1f} ms, '
+          f'columns {columns_elapsed * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
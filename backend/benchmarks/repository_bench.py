@@ -0,0 +1,69 @@
+"""
+Query time of DictRepositoryImpl.get_by_kwargs over plain dict storage against IndexedStorage with
+status and courier indexes, the way distribution and notification ticks query deliveries.
+
+    python backend/benchmarks/repository_bench.py --deliveries 100000 --repeat 20
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(BACKEND_DIR), str(BACKEND_DIR / 'bot')]
+
+from repository.abc_repository import DictRepositoryImpl  # noqa: E402
+from schemas.schemas import Delivery  # noqa: E402
+from schemas.storage import IndexedStorage  # noqa: E402
+
+# most deliveries in memory are done ones, only few are waiting for courier at the moment
+STATUS_WEIGHTS = {1: 1, 3: 2, 4: 2, 5: 95}
+
+
+def fill(source: dict, count: int) -> None:
+    statuses = random.choices(list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values()), k=count)
+    for delivery_id, status in enumerate(statuses):
+        source[delivery_id] = Delivery(
+            delivery_id, 55.75, 37.62, 55.76, 37.63,
+            courier=random.randint(0, count // 10) if status > 1 else None,
+            status=status,
+        )
+
+
+async def measure(repository: DictRepositoryImpl, repeat: int, **kwargs) -> tuple[int, float]:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        found = await repository.get_by_kwargs(**kwargs)
+    return len(found), (time.perf_counter() - started) / repeat
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--deliveries', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    storages = (('dict', {}), ('indexed', IndexedStorage(indexed_fields=('status', 'courier'))))
+    queries = ({'status': 1}, {'status': 3}, {'status': 4, 'courier': 7})
+    print(f'{"storage":>10}{"query":>28}{"found":>8}{"ms":>10}')
+    for name, source in storages:
+        random.seed(0)
+        fill(source, args.deliveries)
+        repository = DictRepositoryImpl()
+        repository.source = source
+        for query in queries:
+            found, elapsed = await measure(repository, args.repeat, **query)
+            print(f'{name:>10}{str(query):>28}{found:>8}{elapsed * 1000:>10.3f}')
+
+        started = time.perf_counter()
+        for delivery_id in range(0, args.deliveries, 100):
+            await repository.update(delivery_id, status=5)
+        updates = len(range(0, args.deliveries, 100))
+        elapsed = (time.perf_counter() - started) / updates
+        print(f'{name:>10}{"update status":>28}{updates:>8}{elapsed * 1000:>10.4f}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+"""
+Encode/decode throughput and message size of the old Django JSON payloads against kafka_common codecs.
+
+JSON side reproduces serialize('json', [obj]) output and its [0]['fields'] unwrap in the bot:
+    python backend/benchmarks/wire_format_bench.py --messages 100000
+"""
+import argparse
+import datetime
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from kafka_common.codecs import (  # noqa: E402
+    CourierCodec,
+    CourierLocationCodec,
+    DeliveryCodec,
+)
+
+NOW = datetime.datetime(2024, 5, 27, 12, 30, 15, 123456)
+
+DELIVERY = {
+    'id': 1234567,
+    'latitude': 55.751244,
+    'longitude': 37.618423,
+    'consumer_latitude': 55.760186,
+    'consumer_longitude': 37.618711,
+    'courier': 987654321,
+    'amount': 1499.0,
+    'status': 3,
+    'started_at': NOW,
+    'completed_at': None,
+    'address': 'Tverskaya street 7, apartment 15',
+    'priority': 0,
+    'estimated_time': NOW,
+    'distance': 2.43,
+}
+COURIER = {
+    'id': 987654321,
+    'username': 'courier_username',
+    'first_name': 'Ivan',
+    'last_name': 'Ivanov',
+    'done_deliveries': 42,
+    'balance': 12500.5,
+    'rank': 5.3,
+}
+LOCATION = {'courier_id': 987654321, 'location': {'lat': 55.751244, 'lon': 37.618423}}
+
+
+def django_json_encode(model: str, obj: dict) -> str:
+    fields = {key: value for key, value in obj.items() if key != 'id'}
+    return json.dumps(
+        [{'model': model, 'pk': obj['id'], 'fields': fields}],
+        default=lambda value: value.isoformat(),
+    )
+
+
+def django_json_decode(payload: str) -> dict:
+    message = json.loads(payload)[0]
+    fields = message['fields']
+    fields['id'] = message['pk']
+    return fields
+
+
+CASES = (
+    (
+        'delivery',
+        lambda: django_json_encode('delivery.delivery', DELIVERY),
+        django_json_decode,
+        lambda: DeliveryCodec.encode(DELIVERY),
+        DeliveryCodec.decode,
+    ),
+    (
+        'courier',
+        lambda: django_json_encode('courier.courier', COURIER),
+        django_json_decode,
+        lambda: CourierCodec.encode(COURIER),
+        CourierCodec.decode,
+    ),
+    (
+        'location',
+        lambda: json.dumps(LOCATION),
+        json.loads,
+        lambda: CourierLocationCodec.encode(
+            {'locations': [[LOCATION['courier_id'], *LOCATION['location'].values(), NOW.timestamp()]]}
+        ),
+        CourierLocationCodec.decode,
+    ),
+)
+
+
+def measure(func, count: int) -> float:
+    started = time.perf_counter()
+    for _ in range(count):
+        func()
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f'{"message":<10}{"format":<9}{"bytes":>7}{"encode/s":>14}{"decode/s":>14}')
+    for name, json_encode, json_decode, codec_encode, codec_decode in CASES:
+        json_payload, codec_payload = json_encode(), codec_encode()
+        rows = (
+            ('json', len(json_payload.encode('utf-8')), json_encode, lambda: json_decode(json_payload)),
+            ('msgpack', len(codec_payload), codec_encode, lambda: codec_decode(codec_payload)),
+        )
+        for format_, size, encode, decode in rows:
+            print(
+                f'{name:<10}{format_:<9}{size:>7}'
+                f'{measure(encode, args.messages):>14.0f}{measure(decode, args.messages):>14.0f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,5 @@
+import dataclasses
 import datetime
-import json
 
 
 def dict_to_dataclass(dict_: dict, dataclass_: type):
@@ -7,17 +7,25 @@ def dict_to_dataclass(dict_: dict, dataclass_: type):
     same_fields = {
         field: dict_[field] for field in dict_ if field in dataclass_.__annotations__
     }
-    if 'started_at' in same_fields and same_fields['started_at']:
+    if isinstance(same_fields.get('started_at'), str):
         same_fields['started_at'] = datetime.datetime.fromisoformat(
             same_fields['started_at']
         )
     return dataclass_(**same_fields)
 
 
-def django_model_to_dataclass(serialized_model: str, dataclass_: type):
-    """Function takes serialized django model and dataclass type and converts it to dataclass object"""
-    deserialized_msg = json.loads(serialized_model)[0]
-    model_dict = deserialized_msg['fields']
-    model_dict['id'] = deserialized_msg.pop('pk')
-    result = dict_to_dataclass(model_dict, dataclass_)
-    return result
+def dataclass_to_dict(obj) -> dict:
+    """Function to get fields of dataclass as shallow dict, slotted dataclasses have no __dict__"""
+    return {field.name: getattr(obj, field.name) for field in dataclasses.fields(obj)}
+
+
+def update_dataclass(obj, **fields) -> None:
+    """Function to set passed fields on dataclass, unknown fields raise AttributeError like on slotted classes"""
+    for field, value in fields.items():
+        setattr(obj, field, value)
+
+
+def message_to_dataclass(message: dict, dataclass_: type):
+    """Function takes decoded kafka message and dataclass type, fields not sent by other service get their defaults"""
+    sent_fields = {field: value for field, value in message.items() if value is not None}
+    return dict_to_dataclass(sent_fields, dataclass_)
@@ -0,0 +1,95 @@
+import numpy as np
+
+UNASSIGNED = -1
+
+
+def _solve_rows_not_more_than_columns(cost: np.ndarray) -> np.ndarray:
+    """
+    Hungarian algorithm with potentials (shortest augmenting path), O(rows^2 * columns).
+    Inner loop over columns is vectorized, arrays are 1-based with 0 as the virtual column
+    """
+    rows, columns = cost.shape
+    u = np.zeros(rows + 1)
+    v = np.zeros(columns + 1)
+    column_row = np.zeros(columns + 1, dtype=int)  # row matched to column, 0 means free
+    way = np.zeros(columns + 1, dtype=int)
+
+    for row in range(1, rows + 1):
+        column_row[0] = row
+        current_column = 0
+        min_values = np.full(columns + 1, np.inf)
+        used = np.zeros(columns + 1, dtype=bool)
+        while True:
+            used[current_column] = True
+            current_row = column_row[current_column]
+            reduced = cost[current_row - 1] - u[current_row] - v[1:]
+            free = ~used[1:]
+            improved = free & (reduced < min_values[1:])
+            min_values[1:][improved] = reduced[improved]
+            way[1:][improved] = current_column
+
+            candidates = np.where(free, min_values[1:], np.inf)
+            next_column = int(np.argmin(candidates)) + 1
+            delta = candidates[next_column - 1]
+
+            u[column_row[used]] += delta
+            v[used] -= delta
+            min_values[~used] -= delta
+
+            current_column = next_column
+            if column_row[current_column] == 0:
+                break
+
+        while current_column:
+            previous_column = way[current_column]
+            column_row[current_column] = column_row[previous_column]
+            current_column = previous_column
+
+    assignment = np.full(rows, UNASSIGNED, dtype=int)
+    for column in range(1, columns + 1):
+        if column_row[column]:
+            assignment[column_row[column] - 1] = column - 1
+    return assignment
+
+
+def solve_assignment(cost: np.ndarray, candidates_per_row: int | None = None) -> np.ndarray:
+    """
+    Function solves min-cost bipartite matching for (rows, columns) cost matrix, inf cost means pair is not allowed.
+    Returns column matched to every row or UNASSIGNED, rows which can not be matched stay unassigned.
+    If candidates_per_row is passed, only columns which are among the cheapest ones of some row are kept, it makes
+    solving much faster on big matrices but result may be slightly worse than optimal
+    """
+    rows, columns = cost.shape
+    assignment = np.full(rows, UNASSIGNED, dtype=int)
+    finite = np.isfinite(cost)
+    # rows and columns without any allowed pair can not be matched, so they are not passed to the solver
+    row_indexes = np.flatnonzero(finite.any(axis=1))
+    column_mask = finite.any(axis=0)
+    if candidates_per_row is not None and candidates_per_row < columns:
+        cheapest = np.argpartition(cost, candidates_per_row - 1, axis=1)[:, :candidates_per_row]
+        candidates = np.zeros(columns, dtype=bool)
+        candidates[cheapest[row_indexes].ravel()] = True
+        column_mask &= candidates
+    column_indexes = np.flatnonzero(column_mask)
+    if not len(row_indexes) or not len(column_indexes):
+        return assignment
+
+    reduced = cost[np.ix_(row_indexes, column_indexes)]
+    reduced_finite = np.isfinite(reduced)
+    # forbidden pairs get cost higher than any full matching of allowed ones, so solver uses them only when it has to
+    forbidden_cost = (np.abs(reduced[reduced_finite]).sum() + 1) * 2
+    prepared = np.where(reduced_finite, reduced, forbidden_cost)
+
+    if len(row_indexes) <= len(column_indexes):
+        reduced_assignment = _solve_rows_not_more_than_columns(prepared)
+    else:
+        transposed = _solve_rows_not_more_than_columns(prepared.T)
+        reduced_assignment = np.full(len(row_indexes), UNASSIGNED, dtype=int)
+        for column, row in enumerate(transposed):
+            if row != UNASSIGNED:
+                reduced_assignment[row] = column
+
+    for reduced_row, reduced_column in enumerate(reduced_assignment):
+        if reduced_column != UNASSIGNED and reduced_finite[reduced_row, reduced_column]:
+            assignment[row_indexes[reduced_row]] = column_indexes[reduced_column]
+    return assignment
@@ -21,11 +21,48 @@ from handlers.root_handlers import (
     change_delivery_distance_handler,
     get_couriers_on_line,
     show_all_deliveries,
+    show_jobs_metrics,
+    show_outbox_metrics,
 )
 
 
+async def load_storage(application: Application) -> None:
+    """
+    Function fills in-process storage, spatial index and geofences with state shared by bot workers before polling
+    starts
+    """
+    from geofences import courier_geofences
+    from repository.factories import courier_repository_factory, delivery_repository_factory
+    from spatial import couriers_index
+
+    for courier in await courier_repository_factory().get_all() or []:
+        if courier.location is not None:
+            couriers_index.update(courier.id, courier.location.lat, courier.location.lon)
+    for delivery in await delivery_repository_factory().get_all() or []:
+        if delivery.status in (3, 4) and delivery.courier is not None:
+            courier_geofences.set_delivery(delivery.courier, delivery, couriers_index.location(delivery.courier))
+    await delivery_repository_factory(cancelled=True).get_all()
+
+
+async def startup(application: Application) -> None:
+    """
+    Function loads shared state, starts task which applies updates ingested by kafka listeners, outbound messages
+    workers and registers periodic jobs, everything runs on the application loop
+    """
+    from kafka_tg.ingestion import run_ingestion_applier
+    from outbox import TelegramOutbox
+    from tasks import start_jobs
+
+    await load_storage(application)
+    application.create_task(run_ingestion_applier())
+    TelegramOutbox().start(application.bot, application.create_task)
+    await start_jobs(application)
+
+
 def main() -> None:
-    application = Application.builder().token(f'{getenv("BOT_TOKEN")}').build()
+    application = (
+        Application.builder().token(f'{getenv("BOT_TOKEN")}').post_init(startup).build()
+    )
 
     application.add_handler(
         MessageHandler(
@@ -140,6 +177,9 @@ def main() -> None:
         CommandHandler(command='deliveries', callback=show_all_deliveries)
     )
 
+    application.add_handler(CommandHandler(command='jobs', callback=show_jobs_metrics))
+    application.add_handler(CommandHandler(command='outbox', callback=show_outbox_metrics))
+
     application.run_polling()
 
 
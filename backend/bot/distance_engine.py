@@ -0,0 +1,90 @@
+import numpy as np
+from geopy import distance
+
+from schemas.schemas import Courier, Delivery
+from spatial import EARTH_RADIUS_KM
+
+ROUTE_FIELDS = ('latitude', 'longitude', 'consumer_latitude', 'consumer_longitude')
+
+
+def to_radians(points: np.ndarray | list[tuple[float | None, float | None]]) -> np.ndarray:
+    """Missing coordinates become nan, so every distance to such point is nan too"""
+    return np.radians(np.array(points, dtype=float).reshape(-1, 2))
+
+
+def haversine_matrix(from_points: np.ndarray, to_points: np.ndarray) -> np.ndarray:
+    """Function takes (n, 2) and (m, 2) arrays of [lat, lon] radians and returns (n, m) distances in kilometers"""
+    lat1, lon1 = from_points[:, 0:1], from_points[:, 1:2]
+    lat2, lon2 = to_points[:, 0], to_points[:, 1]
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def haversine_pairwise(from_points: np.ndarray, to_points: np.ndarray) -> np.ndarray:
+    """Function takes two (n, 2) arrays of [lat, lon] radians and returns (n,) distances between rows"""
+    lat1, lon1 = from_points[:, 0], from_points[:, 1]
+    lat2, lon2 = to_points[:, 0], to_points[:, 1]
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class DeliveryDistanceMatrix:
+    """
+    Route distances courier -> pickup point -> consumer for every pair of deliveries (rows) and couriers (columns),
+    computed with one vectorized haversine call. Unreachable pairs are inf.
+    Delivery coordinates may be passed as (n, 4) route_points array of ROUTE_FIELDS taken from columnar storage
+    """
+
+    def __init__(
+            self,
+            deliveries: list[Delivery],
+            couriers: list[Courier],
+            route_points: np.ndarray | None = None,
+    ):
+        self.deliveries = deliveries
+        self.couriers = couriers
+        if route_points is None:
+            route_points = np.array(
+                [[getattr(d, field) for field in ROUTE_FIELDS] for d in deliveries], dtype=float
+            ).reshape(-1, len(ROUTE_FIELDS))
+        self._pickups = to_radians(route_points[:, 0:2])
+        self._consumers = to_radians(route_points[:, 2:4])
+        self._couriers = to_radians(
+            [(c.location.lat, c.location.lon) for c in couriers]
+        )
+        self.delivery_leg = haversine_pairwise(self._pickups, self._consumers)
+        self.to_pickup = haversine_matrix(self._pickups, self._couriers)
+        self.total = np.nan_to_num(
+            self.to_pickup + self.delivery_leg[:, None], nan=np.inf
+        )
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.total.shape
+
+    def refine(self, top_k: int = 3) -> None:
+        """Method replaces haversine with geodesic distance for top_k nearest couriers of every delivery"""
+        rows, columns = self.shape
+        if not rows or not columns or top_k <= 0:
+            return
+        top_k = min(top_k, columns)
+        candidates = np.argpartition(self.total, top_k - 1, axis=1)[:, :top_k]
+        for row, delivery in enumerate(self.deliveries):
+            if not np.isfinite(self.delivery_leg[row]):
+                continue
+            delivery_leg = distance.distance(
+                (delivery.latitude, delivery.longitude),
+                (delivery.consumer_latitude, delivery.consumer_longitude),
+            ).kilometers
+            for column in candidates[row]:
+                location = self.couriers[column].location
+                to_pickup = distance.distance(
+                    (location.lat, location.lon), (delivery.latitude, delivery.longitude)
+                ).kilometers
+                self.total[row, column] = to_pickup + delivery_leg
@@ -0,0 +1,100 @@
+import math
+from dataclasses import dataclass
+
+from schemas.schemas import Delivery
+from spatial import KM_PER_DEGREE
+
+
+@dataclass(slots=True)
+class Geofence:
+    """
+    Circle around delivery point in local planar frame: degrees are scaled to kilometers at the center latitude, so
+    check of a fix is two multiplications and comparison with squared radius. Error is negligible for radius of
+    hundreds of meters
+    """
+    lat: float
+    lon: float
+    lon_scale: float  # km per degree of longitude at the center latitude
+    radius_sq: float
+
+    @classmethod
+    def around(cls, lat: float, lon: float, radius_km: float) -> 'Geofence':
+        return cls(lat, lon, KM_PER_DEGREE * math.cos(math.radians(lat)), radius_km ** 2)
+
+    def contains(self, lat: float, lon: float) -> bool:
+        x = (lon - self.lon) * self.lon_scale
+        y = (lat - self.lat) * KM_PER_DEGREE
+        return x * x + y * y <= self.radius_sq
+
+
+@dataclass(slots=True)
+class DeliveryFences:
+    delivery_id: int
+    pickup: Geofence
+    drop_off: Geofence | None  # None if consumer point is not known
+    picked_up: bool = False
+    inside: bool = False
+
+    @property
+    def active(self) -> Geofence | None:
+        return self.drop_off if self.picked_up else self.pickup
+
+
+class CourierGeofences:
+    """
+    Pickup and drop-off geofences of couriers current deliveries, built on assignment. Every location update is
+    checked against fence of the current stage, so whether courier is on point is known before he presses the button
+    """
+    radius: float = 0.2  # kilometers
+
+    def __init__(self):
+        self._fences: dict[int, DeliveryFences] = {}
+
+    def __len__(self) -> int:
+        return len(self._fences)
+
+    def __contains__(self, courier_id: int) -> bool:
+        return courier_id in self._fences
+
+    def set_delivery(
+            self, courier_id: int, delivery: Delivery, location: tuple[float, float] | None = None
+    ) -> None:
+        drop_off = None
+        if delivery.consumer_latitude is not None and delivery.consumer_longitude is not None:
+            drop_off = Geofence.around(delivery.consumer_latitude, delivery.consumer_longitude, self.radius)
+        fences = self._fences[courier_id] = DeliveryFences(
+            delivery.id,
+            Geofence.around(delivery.latitude, delivery.longitude, self.radius),
+            drop_off,
+            picked_up=delivery.status == 4,
+        )
+        if location is not None:
+            fences.inside = fences.active is not None and fences.active.contains(*location)
+
+    def picked_up(self, courier_id: int, location: tuple[float, float] | None = None) -> None:
+        fences = self._fences.get(courier_id)
+        if fences is not None:
+            fences.picked_up = True
+            fences.inside = location is not None and fences.active is not None and fences.active.contains(*location)
+
+    def track(self, courier_id: int, lat: float, lon: float) -> bool:
+        """Method updates on point state of the courier, returns True if he has just come to the point"""
+        fences = self._fences.get(courier_id)
+        if fences is None or fences.active is None:
+            return False
+        was_inside = fences.inside
+        fences.inside = fences.active.contains(lat, lon)
+        return fences.inside and not was_inside
+
+    def is_on_point(self, courier_id: int) -> bool | None:
+        """Method returns None if geofences of the courier are not known, e.g. delivery was assigned by other worker"""
+        fences = self._fences.get(courier_id)
+        if fences is None or fences.active is None:
+            return None
+        return fences.inside
+
+    def remove(self, courier_id: int) -> None:
+        self._fences.pop(courier_id, None)
+
+
+courier_geofences = CourierGeofences()
@@ -1,7 +1,8 @@
+from adapters import dataclass_to_dict
 from decorators import exception_logging
 from keyboards import CommonMarkups
 from replies import Replies
-from schemas.schemas import couriers
+from services.courier_service import CourierService
 from telegram import Update
 from telegram.ext import CallbackContext
 
@@ -9,8 +10,9 @@ from telegram.ext import CallbackContext
 @exception_logging
 async def profile_handler(update: Update, context: CallbackContext):
     user = update.message.chat
+    courier = await CourierService().get_courier_profile(int(user.id))
     await update.message.reply_html(
-        text=Replies.COURIER_PROFILE_INFO.format(**couriers.get(int(user.id)).__dict__)
+        text=Replies.COURIER_PROFILE_INFO.format(**dataclass_to_dict(courier))
     )
 
 
@@ -1,6 +1,7 @@
 from decorators import exception_logging
 from handlers.common_handlers import profile_handler
 from keyboards import CourierReplyMarkups
+from outbox import TelegramOutbox
 from replies import Replies
 from services.courier_service import CourierService
 from telegram import Update
@@ -12,7 +13,8 @@ from telegram.ext import CallbackContext
 async def track_location_handler(update: Update, context: CallbackContext, first=False):
     user = update.edited_message.chat
     service = CourierService()
-    await service.track_location(update.edited_message, user)
+    if await service.track_location(update.edited_message, user):
+        TelegramOutbox().send(user.id, text=Replies.COURIER_ARRIVED_NOTIFICATION)
     if first:
         await update.message.reply_text(
             text=Replies.COURIER_SENT_LOCATION_INFO,
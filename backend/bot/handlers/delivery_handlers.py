@@ -7,6 +7,7 @@ from telegram.ext import CallbackContext
 from decorators import exception_logging
 from handlers.common_handlers import profile_handler
 from keyboards import CourierReplyMarkups
+from outbox import TelegramOutbox
 from replies import Replies
 from schemas.schemas import Courier, Delivery
 from services.courier_service import CourierService
@@ -63,9 +64,10 @@ async def close_delivery(update: Update, context: CallbackContext, status: int):
 
 @exception_logging
 async def send_delivery_pickup_point_msg(context: CallbackContext, chat_id, lat, lon):
-    await context.bot.send_location(chat_id=chat_id, latitude=lat, longitude=lon)
-    await context.bot.send_message(
-        chat_id=chat_id,
+    outbox = TelegramOutbox()
+    outbox.send(chat_id, 'send_location', latitude=lat, longitude=lon)
+    outbox.send(
+        chat_id,
         text=Replies.PICKUP_MSG_INFO,
         reply_markup=CourierReplyMarkups.GOT_DELIVERY_MARKUP,
     )
@@ -102,8 +104,8 @@ async def send_delivery_info_msg(context: CallbackContext, chat_id, delivery: De
         address=delivery.address,
         estimated_time=delivery.estimated_time,
     )
-    await context.bot.send_message(
-        chat_id=chat_id,
+    TelegramOutbox().send(
+        chat_id,
         text=msg,
         parse_mode=ParseMode.HTML,
         reply_markup=CourierReplyMarkups.GOT_DELIVERY_MARKUP,
@@ -114,8 +116,8 @@ async def send_delivery_info_msg(context: CallbackContext, chat_id, delivery: De
 async def delivery_taking_late_notification(
         context: CallbackContext, delivery: Delivery
 ):
-    await context.bot.send_message(
-        chat_id=delivery.courier,
+    TelegramOutbox().send(
+        delivery.courier,
         text=Replies.DELIVERY_TAKING_LATE_NOTIFICATION.format(
             delivery.id,
             round((delivery.estimated_time - datetime.datetime.now()).total_seconds() / 60, 2)
@@ -127,8 +129,8 @@ async def delivery_taking_late_notification(
 async def delivery_cancelled_by_consumer_notification(
         context: CallbackContext, courier: Courier
 ):
-    await context.bot.send_message(
-        chat_id=courier.id,
+    TelegramOutbox().send(
+        courier.id,
         text=Replies.DELIVERY_CANCELLED_BY_CONSUMER_NOTIFICATION,
         reply_markup=CourierReplyMarkups.CARRYING_NOT_DELIVERY_MARKUP
     )
@@ -136,6 +138,4 @@ async def delivery_cancelled_by_consumer_notification(
 
 @exception_logging
 async def delivery_time_out_notification(context: CallbackContext, delivery: Delivery):
-    await context.bot.send_message(
-        chat_id=delivery.courier, text=Replies.DELIVERY_TIME_OUT_NOTIFICATION
-    )
+    TelegramOutbox().send(delivery.courier, text=Replies.DELIVERY_TIME_OUT_NOTIFICATION)
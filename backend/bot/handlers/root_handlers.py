@@ -1,5 +1,7 @@
 from decorators import exception_logging
-from schemas.schemas import couriers, deliveries
+from outbox import TelegramOutbox
+from repository.factories import courier_repository_factory, delivery_repository_factory
+from scheduler import Scheduler
 from services.delivery_service import DeliveryService
 from telegram import Update
 from telegram.ext import CallbackContext
@@ -16,9 +18,31 @@ async def change_delivery_distance_handler(
 
 @exception_logging
 async def show_all_deliveries(update: Update, context: CallbackContext):
+    deliveries = await delivery_repository_factory().get_all()
     await update.message.reply_text(text=f'All deliveries: {deliveries}')
 
 
 @exception_logging
 async def get_couriers_on_line(update: Update, context: CallbackContext):
+    couriers = await courier_repository_factory().get_all()
     await update.message.reply_text(str(couriers))
+
+
+@exception_logging
+async def show_jobs_metrics(update: Update, context: CallbackContext):
+    lines = [
+        f'{name}: runs {metrics.runs}, skipped {metrics.skipped}, failed {metrics.failures}, '
+        f'avg {metrics.avg_duration:.3f}s, max {metrics.max_duration:.3f}s'
+        for name, metrics in Scheduler().metrics.items()
+    ]
+    await update.message.reply_text('\n'.join(lines) or 'No jobs registered')
+
+
+@exception_logging
+async def show_outbox_metrics(update: Update, context: CallbackContext):
+    outbox = TelegramOutbox()
+    metrics = outbox.metrics
+    await update.message.reply_text(
+        f'queued {len(outbox)}, sent {metrics.sent}, failed {metrics.failed}, retries {metrics.retries}, '
+        f'avg latency {metrics.avg_latency:.3f}s, max {metrics.max_latency:.3f}s'
+    )
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any
+
+from kafka_common.receiver import SingletonMixin
+
+from adapters import dataclass_to_dict
+from repository.factories import courier_repository_factory, delivery_repository_factory
+from schemas.schemas import Courier
+from services.dispatch_service import DispatchTrigger
+
+
+class UpdateKinds:
+    DELIVERY = 'delivery'
+    CANCELLED_DELIVERY = 'cancelled_delivery'
+    COURIER_PROFILE = 'courier_profile'
+
+
+class IngestionQueue(SingletonMixin):
+    """
+    Handoff of state updates from kafka listener threads to the bot loop. Threads only append to deque, which is
+    atomic, and wake the loop once per batch, so shared storage is changed by single applier task on the loop
+    """
+    batch_size: int = 1000
+
+    def __init__(self):
+        if getattr(self, '_updates', None) is not None:
+            # SingletonMixin calls __init__ once more on the already initialized instance
+            return
+        self._updates: deque[tuple[str, Any]] = deque()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._wakeup_scheduled = False
+
+    def __len__(self) -> int:
+        return len(self._updates)
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Method binds queue to the applier loop, updates put before binding are kept for the first batch"""
+        self._wakeup = asyncio.Event()
+        if self._updates:
+            self._wakeup.set()
+        # loop is published last, listener threads use event as soon as they see the loop
+        self._loop = loop
+
+    def put(self, kind: str, obj) -> None:
+        self._updates.append((kind, obj))
+        if self._loop is not None and not self._wakeup_scheduled:
+            self._wakeup_scheduled = True
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                logging.warning(f'Update {kind} is not applied, bot loop is closed')
+
+    async def get_batch(self) -> list[tuple[str, Any]]:
+        await self._wakeup.wait()
+        self._wakeup.clear()
+        # flag is reset before draining, so update appended after that schedules its own wakeup
+        self._wakeup_scheduled = False
+        batch = []
+        while self._updates and len(batch) < self.batch_size:
+            batch.append(self._updates.popleft())
+        if self._updates:
+            self._wakeup.set()
+        return batch
+
+
+async def save_courier_profile(courier: Courier) -> None:
+    repository = courier_repository_factory()
+    if await repository.get(courier.id) is None:
+        await repository.add(courier)
+    else:
+        fields = {
+            field: value
+            for field, value in dataclass_to_dict(courier).items()
+            if value and field != 'id'
+        }
+        await repository.update(courier.id, **fields)
+
+
+async def apply_updates(updates: list[tuple[str, Any]]) -> None:
+    """
+    Function applies batch of updates, deliveries go before cancellations, so delivery cancelled in the same
+    batch is already in storage
+    """
+    grouped: dict[str, list] = {}
+    for kind, obj in updates:
+        grouped.setdefault(kind, []).append(obj)
+
+    new_deliveries = grouped.get(UpdateKinds.DELIVERY)
+    if new_deliveries:
+        await delivery_repository_factory().add_many(new_deliveries)
+        DispatchTrigger().notify('new_delivery')
+    cancelled_deliveries = grouped.get(UpdateKinds.CANCELLED_DELIVERY)
+    if cancelled_deliveries:
+        await delivery_repository_factory(cancelled=True).add_many(cancelled_deliveries)
+    for courier in grouped.get(UpdateKinds.COURIER_PROFILE, ()):
+        await save_courier_profile(courier)
+
+
+async def run_ingestion_applier() -> None:
+    queue = IngestionQueue()
+    queue.bind(asyncio.get_running_loop())
+    while True:
+        updates = await queue.get_batch()
+        try:
+            await apply_updates(updates)
+        except Exception as e:
+            logging.error(f'Could not apply {len(updates)} ingested updates! {e}', exc_info=True)
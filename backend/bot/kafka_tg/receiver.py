@@ -1,44 +1,36 @@
+from kafka_common.codecs import CourierCodec, DeliveryCodec
 from kafka_common.receiver import KafkaReceiver
 from kafka_common.topics import CourierTopics, DeliveryTopics
 
-from adapters import django_model_to_dataclass
-from schemas.schemas import (
-    Courier,
-    Delivery,
-    cancelled_deliveries,
-    couriers,
-    deliveries,
-)
+from adapters import message_to_dataclass
+from kafka_tg.ingestion import IngestionQueue, UpdateKinds
+from schemas.schemas import Courier, Delivery
 
 
 class TgCourierProfileReceiver(KafkaReceiver):
     _topic = CourierTopics.COURIER_PROFILE
+    codec = CourierCodec
 
-    def post_consume_action(self, msg: str) -> None:
+    def post_consume_action(self, msg: dict) -> None:
         """Method to deserialize incoming message from to courier and adds courier profile to line"""
-        courier_dataclass = django_model_to_dataclass(msg, Courier)
-        courier_dict = courier_dataclass.__dict__
-
-        if courier_dict['id'] not in couriers:
-            couriers[courier_dict['id']] = courier_dataclass
-        else:
-            for field in courier_dict:
-                if courier_dict.get(field, None):
-                    couriers[courier_dict['id']].__dict__[field] = courier_dict[field]
+        courier_dataclass = message_to_dataclass(msg, Courier)
+        IngestionQueue().put(UpdateKinds.COURIER_PROFILE, courier_dataclass)
 
 
 class TgDeliveryReceiver(KafkaReceiver):
     _topic = DeliveryTopics.TO_DELIVER
+    codec = DeliveryCodec
 
-    def post_consume_action(self, msg: str):
+    def post_consume_action(self, msg: dict):
         """Method to deserialize incoming message in delivery and add delivery to queue"""
-        delivery_dataclass = django_model_to_dataclass(msg, Delivery)
-        deliveries[delivery_dataclass.id] = delivery_dataclass
+        delivery_dataclass = message_to_dataclass(msg, Delivery)
+        IngestionQueue().put(UpdateKinds.DELIVERY, delivery_dataclass)
 
 
 class TgDeliveryToCancelReceiver(KafkaReceiver):
     _topic = DeliveryTopics.TO_CANCEL_DELIVERY
+    codec = DeliveryCodec
 
-    def post_consume_action(self, msg: str) -> None:
-        delivery_dataclass = django_model_to_dataclass(msg, Delivery)
-        cancelled_deliveries[delivery_dataclass.id] = delivery_dataclass
+    def post_consume_action(self, msg: dict) -> None:
+        delivery_dataclass = message_to_dataclass(msg, Delivery)
+        IngestionQueue().put(UpdateKinds.CANCELLED_DELIVERY, delivery_dataclass)
@@ -0,0 +1,180 @@
+import asyncio
+import datetime
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from kafka_common.receiver import SingletonMixin
+from logging_.logger import logger
+from telegram import Bot
+from telegram.error import BadRequest, Forbidden, RetryAfter, TelegramError
+
+
+@dataclass(slots=True)
+class TokenBucket:
+    """Bucket refilled with rate tokens per second up to capacity, tokens go negative for reserved sends"""
+    rate: float
+    capacity: float
+    tokens: float = field(init=False)
+    updated_at: float = field(init=False, default_factory=time.monotonic)
+
+    def __post_init__(self):
+        self.tokens = self.capacity
+
+    def reserve(self, now: float) -> float:
+        """Method takes one token and returns seconds to wait until it is really available"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate)
+
+    def is_full(self, now: float) -> bool:
+        """Method returns whether bucket is refilled, such bucket is the same as a new one"""
+        return self.tokens + (now - self.updated_at) * self.rate >= self.capacity
+
+
+@dataclass(slots=True)
+class OutboundMessage:
+    chat_id: int
+    method: str  # name of Bot method, e.g. send_message
+    kwargs: dict
+    enqueued_at: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+
+
+@dataclass(slots=True)
+class OutboxMetrics:
+    sent: int = 0
+    failed: int = 0
+    retries: int = 0
+    last_latency: float = 0
+    max_latency: float = 0
+    total_latency: float = 0
+
+    @property
+    def avg_latency(self) -> float:
+        return self.total_latency / self.sent if self.sent else 0
+
+    def record(self, latency: float) -> None:
+        self.sent += 1
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self.total_latency += latency
+
+
+class TelegramOutbox(SingletonMixin):
+    """
+    Queue of outbound bot messages, so dispatch and notification jobs do not wait for Telegram. Messages are sent by
+    concurrency workers within global and per chat rate limits, messages of one chat go one by one in order they
+    were put. Flood wait answer pauses all sends for retry_after, network errors are retried with backoff
+    """
+    rate: float = 25  # messages per second, bot api allows about 30
+    chat_rate: float = 1
+    chat_burst: float = 3
+    concurrency: int = 8
+    max_attempts: int = 3
+    backoff: float = 0.5  # seconds, doubled on every attempt
+    prune_interval: float = 60  # seconds, buckets of idle chats are dropped this often
+
+    def __init__(self):
+        if getattr(self, 'metrics', None) is not None:
+            # SingletonMixin calls __init__ once more on the already initialized instance
+            return
+        self.metrics = OutboxMetrics()
+        self._bot: Bot | None = None
+        self._chats: dict[int, deque[OutboundMessage]] = {}
+        self._ready: asyncio.Queue[int] | None = None
+        self._bucket = TokenBucket(self.rate, self.rate)
+        self._chat_buckets: dict[int, TokenBucket] = {}
+        self._paused_until = 0.0
+        self._pruned_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return sum(len(messages) for messages in self._chats.values())
+
+    @property
+    def started(self) -> bool:
+        return self._ready is not None
+
+    def start(self, bot: Bot, create_task=asyncio.create_task) -> None:
+        """Method starts workers on the running loop, messages put before start are sent first"""
+        if self.started:
+            return
+        self._bot = bot
+        self._ready = asyncio.Queue()
+        for chat_id in self._chats:
+            self._ready.put_nowait(chat_id)
+        for _ in range(self.concurrency):
+            create_task(self._work())
+
+    def send(self, chat_id: int, method: str = 'send_message', **kwargs) -> None:
+        """Method puts message to the queue and returns at once, it must be called on the bot loop"""
+        messages = self._chats.get(chat_id)
+        if messages is None:
+            messages = self._chats[chat_id] = deque()
+        messages.append(OutboundMessage(chat_id, method, kwargs))
+        # chat is in ready queue only while it has messages and none of them is being sent
+        if len(messages) == 1 and self._ready is not None:
+            self._ready.put_nowait(chat_id)
+
+    def _prune_chat_buckets(self, now: float) -> None:
+        """Method drops buckets of chats without queued messages which are full, so they do not pile up forever"""
+        self._chat_buckets = {
+            chat_id: bucket
+            for chat_id, bucket in self._chat_buckets.items()
+            if chat_id in self._chats or not bucket.is_full(now)
+        }
+        self._pruned_at = now
+
+    async def _wait_for_tokens(self, chat_id: int) -> None:
+        now = time.monotonic()
+        if now - self._pruned_at >= self.prune_interval:
+            self._prune_chat_buckets(now)
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        delay = max(self._paused_until - now, self._bucket.reserve(now), bucket.reserve(now))
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _work(self) -> None:
+        while True:
+            chat_id = await self._ready.get()
+            messages = self._chats[chat_id]
+            await self._deliver(messages[0])
+            messages.popleft()
+            if messages:
+                self._ready.put_nowait(chat_id)
+            else:
+                del self._chats[chat_id]
+
+    async def _deliver(self, message: OutboundMessage) -> None:
+        while True:
+            await self._wait_for_tokens(message.chat_id)
+            message.attempts += 1
+            try:
+                await getattr(self._bot, message.method)(chat_id=message.chat_id, **message.kwargs)
+            except RetryAfter as e:
+                retry_after = e.retry_after
+                if isinstance(retry_after, datetime.timedelta):
+                    retry_after = retry_after.total_seconds()
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+                logger.warning(f'Flood limit reached, sends are paused for {retry_after}s')
+            except (BadRequest, Forbidden) as e:
+                self.metrics.failed += 1
+                logger.warning(f'Message {message.method} to {message.chat_id} is dropped: {e}')
+                return
+            except TelegramError as e:
+                if message.attempts >= self.max_attempts:
+                    self.metrics.failed += 1
+                    logger.error(f'Message {message.method} to {message.chat_id} is not sent: {e}')
+                    return
+                await asyncio.sleep(self.backoff * 2 ** (message.attempts - 1))
+            except Exception as e:
+                self.metrics.failed += 1
+                logger.error(f'Message {message.method} to {message.chat_id} failed! {e}', exc_info=True)
+                return
+            else:
+                self.metrics.record(time.monotonic() - message.enqueued_at)
+                return
+            self.metrics.retries += 1
@@ -49,3 +49,5 @@ class Replies:
     )
 
     DELIVERY_COURIER_NOT_ON_REQUIRED_POINT_ANSWER = 'You cant mark your delivery as picked up or delivered because you are not on required location!'
+
+    COURIER_ARRIVED_NOTIFICATION = '📍 You are on the point! Mark your delivery as picked up or delivered when you are ready.'
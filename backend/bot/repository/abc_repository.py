@@ -1,6 +1,9 @@
 from abc import ABC, abstractmethod
 
+import numpy as np
+from adapters import update_dataclass
 from schemas.schemas import Courier
+from schemas.storage import IndexedStorage
 
 
 class RepositoryAbc(ABC):
@@ -17,10 +20,19 @@ class RepositoryAbc(ABC):
     async def add(self, obj):
         raise NotImplementedError
 
+    @abstractmethod
+    async def add_many(self, objs: list) -> list:
+        raise NotImplementedError
+
     @abstractmethod
     async def update(self, id, fields):
         raise NotImplementedError
 
+    @abstractmethod
+    async def update_if(self, id, expected: dict, **kwargs):
+        """Method updates object only if its fields are equal to expected ones, returns None otherwise"""
+        raise NotImplementedError
+
     @abstractmethod
     async def delete(self, id):
         raise NotImplementedError
@@ -33,11 +45,12 @@ class CourierRepositoryAbc(RepositoryAbc):
         raise NotImplementedError
 
     @abstractmethod
-    async def lock_courier(self, id: int):
+    async def lock_courier(self, id: int) -> Courier | None:
+        """Method marks free courier as busy, returns None if courier is busy already"""
         raise NotImplementedError
 
     @abstractmethod
-    async def unlock_courier(self, id: int):
+    async def unlock_courier(self, id: int) -> Courier | None:
         raise NotImplementedError
 
 
@@ -53,24 +66,53 @@ class DictRepositoryImpl(RepositoryAbc):
         return None
 
     async def get_by_kwargs(self, **kwargs):
+        candidates = self.source.values()
+        if isinstance(self.source, IndexedStorage):
+            indexed = [kwarg for kwarg in kwargs if kwarg in self.source.indexed_fields]
+            if indexed:
+                # start from the smallest bucket, other kwargs are checked only on its objects
+                ids = min(
+                    (self.source.lookup(kwarg, kwargs[kwarg]) for kwarg in indexed), key=len
+                )
+                candidates = [self.source[id] for id in ids]
         return [
             obj
-            for obj in self.source.values()
+            for obj in candidates
             if all(
                 hasattr(obj, kwarg) and getattr(obj, kwarg) == value
                 for kwarg, value in kwargs.items()
             )
         ]
 
+    async def get_columns(self, ids: list, *fields: str) -> np.ndarray | None:
+        """Method returns fields of objects as (len(ids), len(fields)) array if storage keeps them in columns"""
+        columns = getattr(self.source, 'columns', None)
+        if columns is None or not set(fields) <= set(columns.fields):
+            return None
+        return columns.take(ids, *fields)
+
     async def add(self, obj):
         self.source[obj.id] = obj
         return obj
 
+    async def add_many(self, objs: list) -> list:
+        for obj in objs:
+            await self.add(obj)
+        return objs
+
     async def update(self, id, **kwargs):
         obj = self.source.get(id, None)
         if obj:
-            obj.__dict__.update(**kwargs)
+            update_dataclass(obj, **kwargs)
+            if isinstance(self.source, IndexedStorage):
+                self.source.reindex(id)
         return obj
 
+    async def update_if(self, id, expected: dict, **kwargs):
+        obj = self.source.get(id, None)
+        if obj and all(getattr(obj, field, None) == value for field, value in expected.items()):
+            return await self.update(id, **kwargs)
+        return None
+
     async def delete(self, id: int):
         return self.source.pop(int(id))
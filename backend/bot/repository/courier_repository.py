@@ -1,8 +1,8 @@
-from repository.abc_repository import DictRepositoryImpl
+from repository.abc_repository import CourierRepositoryAbc, DictRepositoryImpl
 from schemas.schemas import Courier, couriers
 
 
-class CourierRepository(DictRepositoryImpl):
+class CourierRepository(DictRepositoryImpl, CourierRepositoryAbc):
     source = couriers
 
     async def get(self, id: int) -> Courier | None:
@@ -22,3 +22,12 @@ class CourierRepository(DictRepositoryImpl):
 
     async def delete(self, id: int):
         return await super().delete(id)
+
+    async def get_free_couriers(self) -> list[Courier]:
+        return await self.get_by_kwargs(busy=False)
+
+    async def lock_courier(self, id: int) -> Courier | None:
+        return await self.update_if(id, {'busy': False}, busy=True)
+
+    async def unlock_courier(self, id: int) -> Courier | None:
+        return await self.update_if(id, {'busy': True}, busy=False)
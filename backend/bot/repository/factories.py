@@ -0,0 +1,25 @@
+from repository.abc_repository import CourierRepositoryAbc, RepositoryAbc
+from repository.courier_repository import CourierRepository
+from repository.delivery_repository import DeliveryRepository
+from schemas.schemas import cancelled_deliveries
+from settings import BotSettings
+
+
+def courier_repository_factory() -> CourierRepositoryAbc:
+    if BotSettings.STORAGE_BACKEND == 'redis':
+        from repository.redis_repository import RedisCourierRepository
+
+        return RedisCourierRepository()
+    return CourierRepository()
+
+
+def delivery_repository_factory(cancelled: bool = False) -> RepositoryAbc:
+    if BotSettings.STORAGE_BACKEND == 'redis':
+        from repository.redis_repository import RedisDeliveryRepository
+
+        if cancelled:
+            return RedisDeliveryRepository(namespace='cancelled_deliveries', cache=cancelled_deliveries)
+        return RedisDeliveryRepository()
+    if cancelled:
+        return DeliveryRepository(source=cancelled_deliveries)
+    return DeliveryRepository()
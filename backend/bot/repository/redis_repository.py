@@ -0,0 +1,288 @@
+import asyncio
+import dataclasses
+import time
+import weakref
+
+import numpy as np
+from kafka_common.codecs import pack, unpack
+from redis.asyncio import Redis
+from redis.exceptions import WatchError
+
+from adapters import dataclass_to_dict, update_dataclass
+from repository.abc_repository import CourierRepositoryAbc, RepositoryAbc
+from schemas.schemas import Courier, Delivery, Location, couriers, deliveries
+from schemas.storage import IndexedStorage
+from settings import BotSettings
+
+_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_cache_times: dict[str, dict[int, float]] = {}
+
+
+def get_redis() -> Redis:
+    """Redis connections are bound to the event loop they were opened in, so every loop gets its own client"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = Redis(
+            host=BotSettings.REDIS_HOST or 'redis', port=int(BotSettings.REDIS_PORT or 6379)
+        )
+    return client
+
+
+class RedisRepositoryImpl(RepositoryAbc):
+    """
+    Repository over Redis shared by all bot workers. Every object is a hash of msgpack packed fields, ids of
+    namespace and ids by value of every indexed field are kept in sets. Objects read from Redis stay in cache
+    storage for cache_ttl seconds, so repeated reads inside one tick do not go to Redis
+    """
+    key_prefix = 'bot'
+    namespace: str
+    dataclass_: type
+    nested: dict[str, type] = {}  # fields holding dataclasses, they are packed as arrays of values
+    indexed_fields: tuple[str, ...] = ()
+    cache: IndexedStorage
+    cache_ttl: float = 1.0
+
+    def __init__(self):
+        self._field_names = {field.name for field in dataclasses.fields(self.dataclass_)}
+        self._cached_at = _cache_times.setdefault(self.namespace, {})
+
+    def _key(self, id) -> str:
+        return f'{self.key_prefix}:{self.namespace}:{id}'
+
+    def _ids_key(self) -> str:
+        return f'{self.key_prefix}:{self.namespace}'
+
+    def _index_key(self, field: str, value) -> str:
+        return f'{self.key_prefix}:{self.namespace}:{field}:{value}'
+
+    def _pack_fields(self, fields: dict) -> dict[str, bytes]:
+        return {
+            name: pack(dataclasses.astuple(value) if dataclasses.is_dataclass(value) else value)
+            for name, value in fields.items()
+        }
+
+    def _load(self, mapping: dict[bytes, bytes]):
+        fields = {}
+        for name, payload in mapping.items():
+            name = name.decode()
+            if name not in self._field_names:
+                continue
+            value = unpack(payload)
+            if value is not None and name in self.nested:
+                value = self.nested[name](*value)
+            fields[name] = value
+        return self.dataclass_(**fields)
+
+    def _cached(self, id):
+        cached_at = self._cached_at.get(id)
+        if cached_at is not None and time.monotonic() - cached_at < self.cache_ttl:
+            return self.cache.get(id)
+        return None
+
+    def _remember(self, id, obj):
+        # cached object is updated in place, so references already held by services see fresh state
+        cached = self.cache.get(id)
+        if cached is None or cached is obj:
+            self.cache[id] = obj
+        else:
+            update_dataclass(cached, **dataclass_to_dict(obj))
+            self.cache.reindex(id)
+        self._cached_at[id] = time.monotonic()
+        return self.cache[id]
+
+    def _forget(self, id) -> None:
+        self.cache.pop(id, None)
+        self._cached_at.pop(id, None)
+
+    async def _get_many(self, ids: list) -> list:
+        """Method reads objects missing in cache with one pipeline, result goes in order of ids, missing are None"""
+        found = {id: self._cached(id) for id in ids}
+        missing = [id for id, obj in found.items() if obj is None]
+        if missing:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for id in missing:
+                    pipe.hgetall(self._key(id))
+                mappings = await pipe.execute()
+            for id, mapping in zip(missing, mappings):
+                if mapping:
+                    found[id] = self._remember(id, self._load(mapping))
+                else:
+                    self._forget(id)
+        return [found[id] for id in ids]
+
+    async def get(self, id):
+        if id is None:
+            return None
+        return (await self._get_many([int(id)]))[0]
+
+    async def get_all(self) -> list | None:
+        ids = sorted(int(id) for id in await get_redis().smembers(self._ids_key()))
+        for id in set(self.cache) - set(ids):
+            # deleted by other worker
+            self._forget(id)
+        objs = [obj for obj in await self._get_many(ids) if obj is not None]
+        return objs or None
+
+    async def get_by_kwargs(self, **kwargs):
+        indexed = [kwarg for kwarg in kwargs if kwarg in self.indexed_fields]
+        if indexed:
+            index_keys = [self._index_key(kwarg, kwargs[kwarg]) for kwarg in indexed]
+            ids = sorted(int(id) for id in await get_redis().sinter(index_keys))
+            candidates = [obj for obj in await self._get_many(ids) if obj is not None]
+        else:
+            candidates = await self.get_all() or []
+        # cached objects may be a bit older than indexes, so every kwarg is checked again
+        return [
+            obj
+            for obj in candidates
+            if all(
+                hasattr(obj, kwarg) and getattr(obj, kwarg) == value
+                for kwarg, value in kwargs.items()
+            )
+        ]
+
+    async def get_columns(self, ids: list, *fields: str) -> np.ndarray | None:
+        """Method returns fields of objects as (len(ids), len(fields)) array if storage keeps them in columns"""
+        columns = self.cache.columns
+        if columns is None or not set(fields) <= set(columns.fields):
+            return None
+        return columns.take(ids, *fields)
+
+    async def _write(self, id, changes: dict, expected: dict | None = None, create: bool = False):
+        """
+        Method writes changed fields with optimistic locking: object hash is watched while its current state is
+        read, so concurrent write from other worker aborts transaction and it is retried with fresh state.
+        Returns object after write or None if it does not exist or does not match expected fields
+        """
+        key = self._key(id)
+        packed = self._pack_fields(changes)
+        async with get_redis().pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(key)
+                    current = await pipe.hgetall(key)
+                    before = self._load(current) if current else None
+                    if before is None and not create:
+                        await pipe.unwatch()
+                        self._forget(id)
+                        return None
+                    if expected and (
+                        before is None
+                        or any(getattr(before, field) != value for field, value in expected.items())
+                    ):
+                        await pipe.unwatch()
+                        if before is not None:
+                            self._remember(id, before)
+                        return None
+
+                    pipe.multi()
+                    pipe.hset(key, mapping=packed)
+                    pipe.sadd(self._ids_key(), id)
+                    for field in self.indexed_fields:
+                        if field not in changes:
+                            continue
+                        if before is not None:
+                            pipe.srem(self._index_key(field, getattr(before, field)), id)
+                        pipe.sadd(self._index_key(field, changes[field]), id)
+                    await pipe.execute()
+                    return self._load({**current, **{name.encode(): value for name, value in packed.items()}})
+                except WatchError:
+                    continue
+
+    async def add(self, obj):
+        fields = dataclass_to_dict(obj)
+        await self._write(obj.id, fields, create=True)
+        return self._remember(obj.id, obj)
+
+    async def add_many(self, objs: list) -> list:
+        """
+        Bulk version of add, current values of indexed fields are read with one pipeline and all objects are
+        written with one transaction, which is retried if any of them was changed meanwhile
+        """
+        if not objs:
+            return objs
+        keys = [self._key(obj.id) for obj in objs]
+        async with get_redis().pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(*keys)
+                    async with get_redis().pipeline(transaction=False) as reader:
+                        for key in keys:
+                            reader.hmget(key, list(self.indexed_fields) or ['id'])
+                        currents = await reader.execute()
+
+                    pipe.multi()
+                    for obj, key, current in zip(objs, keys, currents):
+                        fields = dataclass_to_dict(obj)
+                        pipe.hset(key, mapping=self._pack_fields(fields))
+                        pipe.sadd(self._ids_key(), obj.id)
+                        for field, payload in zip(self.indexed_fields, current):
+                            if payload is not None:
+                                pipe.srem(self._index_key(field, unpack(payload)), obj.id)
+                            pipe.sadd(self._index_key(field, fields[field]), obj.id)
+                    await pipe.execute()
+                    break
+                except WatchError:
+                    continue
+        return [self._remember(obj.id, obj) for obj in objs]
+
+    async def update(self, id, **kwargs):
+        if id is None:
+            return None
+        obj = await self._write(int(id), kwargs)
+        return obj and self._remember(int(id), obj)
+
+    async def update_if(self, id, expected: dict, **kwargs):
+        if id is None:
+            return None
+        obj = await self._write(int(id), kwargs, expected=expected)
+        return obj and self._remember(int(id), obj)
+
+    async def delete(self, id: int):
+        id = int(id)
+        key = self._key(id)
+        async with get_redis().pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(key)
+                    current = await pipe.hgetall(key)
+                    obj = self._load(current) if current else None
+                    pipe.multi()
+                    pipe.delete(key)
+                    pipe.srem(self._ids_key(), id)
+                    for field in self.indexed_fields if obj is not None else ():
+                        pipe.srem(self._index_key(field, getattr(obj, field)), id)
+                    await pipe.execute()
+                    break
+                except WatchError:
+                    continue
+        self._forget(id)
+        return obj
+
+
+class RedisCourierRepository(RedisRepositoryImpl, CourierRepositoryAbc):
+    namespace = 'couriers'
+    dataclass_ = Courier
+    nested = {'location': Location}
+    indexed_fields = ('busy',)
+    cache = couriers
+
+    async def get_free_couriers(self) -> list[Courier]:
+        return await self.get_by_kwargs(busy=False)
+
+    async def lock_courier(self, id: int) -> Courier | None:
+        return await self.update_if(id, {'busy': False}, busy=True)
+
+    async def unlock_courier(self, id: int) -> Courier | None:
+        return await self.update_if(id, {'busy': True}, busy=False)
+
+
+class RedisDeliveryRepository(RedisRepositoryImpl):
+    dataclass_ = Delivery
+    indexed_fields = ('status', 'courier')
+
+    def __init__(self, namespace: str = 'deliveries', cache: IndexedStorage = deliveries):
+        self.namespace = namespace
+        self.cache = cache
+        super().__init__()
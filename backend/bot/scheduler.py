@@ -0,0 +1,89 @@
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from kafka_common.receiver import SingletonMixin
+from logging_.logger import logger
+from telegram.ext import CallbackContext, JobQueue
+
+
+@dataclass(slots=True)
+class ScheduledJob:
+    name: str
+    callback: Callable[[CallbackContext], Awaitable[None]]
+    interval: float  # seconds
+    first: float = 0
+    jitter: float = 0  # seconds, random shift of every run, so jobs with same interval do not fire together
+
+
+@dataclass(slots=True)
+class JobMetrics:
+    runs: int = 0
+    skipped: int = 0
+    failures: int = 0
+    last_duration: float = 0
+    max_duration: float = 0
+    total_duration: float = 0
+
+    @property
+    def avg_duration(self) -> float:
+        return self.total_duration / self.runs if self.runs else 0
+
+    def record(self, duration: float) -> None:
+        self.runs += 1
+        self.last_duration = duration
+        self.max_duration = max(self.max_duration, duration)
+        self.total_duration += duration
+
+
+class Scheduler(SingletonMixin):
+    """
+    Registers periodic bot jobs on application job queue, so they run on the application loop. Every job is
+    registered once, run which starts while previous one is still going is skipped, duration of runs is collected
+    """
+
+    def __init__(self):
+        if getattr(self, 'metrics', None) is not None:
+            # SingletonMixin calls __init__ once more on the already initialized instance
+            return
+        self.metrics: dict[str, JobMetrics] = {}
+        self._running: set[str] = set()
+
+    def schedule(self, job_queue: JobQueue, job: ScheduledJob) -> bool:
+        """Method registers job if job with such name is not registered yet, returns whether it was registered"""
+        if job_queue.get_jobs_by_name(job.name):
+            return False
+        self.metrics.setdefault(job.name, JobMetrics())
+        job_queue.run_repeating(
+            self._guarded(job),
+            interval=job.interval,
+            first=job.first,
+            name=job.name,
+            job_kwargs={'jitter': job.jitter} if job.jitter else None,
+        )
+        return True
+
+    def schedule_all(self, job_queue: JobQueue, jobs: tuple[ScheduledJob, ...]) -> list[str]:
+        return [job.name for job in jobs if self.schedule(job_queue, job)]
+
+    def _guarded(self, job: ScheduledJob) -> Callable[[CallbackContext], Awaitable[None]]:
+        metrics = self.metrics[job.name]
+
+        async def run(context: CallbackContext) -> None:
+            if job.name in self._running:
+                metrics.skipped += 1
+                logger.warning(f'Job {job.name} skipped, previous run is still going')
+                return
+            self._running.add(job.name)
+            started = time.perf_counter()
+            try:
+                await job.callback(context)
+            except Exception as e:
+                metrics.failures += 1
+                logger.error(f'Job {job.name} failed! {e}', exc_info=True)
+            finally:
+                self._running.discard(job.name)
+                metrics.record(time.perf_counter() - started)
+                logger.debug(f'Job {job.name} took {metrics.last_duration:.3f}s')
+
+        return run
@@ -1,14 +1,16 @@
 import datetime
 from dataclasses import dataclass
 
+from schemas.storage import IndexedStorage
 
-@dataclass
+
+@dataclass(slots=True)
 class Location:
     lat: float
     lon: float
 
 
-@dataclass
+@dataclass(slots=True)
 class Courier:
     id: int
     username: str
@@ -22,7 +24,7 @@ class Courier:
     rank: float = 5
 
 
-@dataclass
+@dataclass(slots=True)
 class Delivery:
     id: int
     latitude: float
@@ -41,6 +43,18 @@ class Delivery:
     distance: float = 0
 
 
-deliveries: dict[Delivery, None] = {}
-couriers: dict[Courier, None] = {}
-cancelled_deliveries: dict[Delivery, None] = {}
+# with redis storage backend these are per-process read-through caches of the state shared by bot workers
+deliveries: IndexedStorage = IndexedStorage(
+    indexed_fields=('status', 'courier'),
+    column_fields=(
+        'latitude',
+        'longitude',
+        'consumer_latitude',
+        'consumer_longitude',
+        'status',
+        'priority',
+        'estimated_time',
+    ),
+)
+couriers: IndexedStorage = IndexedStorage(indexed_fields=('busy',))
+cancelled_deliveries: IndexedStorage = IndexedStorage()
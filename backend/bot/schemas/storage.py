@@ -0,0 +1,165 @@
+import datetime
+from typing import Any, Hashable
+
+import numpy as np
+
+
+def to_float(value) -> float:
+    """Function converts field value to column value: None is nan and datetime is timestamp"""
+    if value is None:
+        return np.nan
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+    return float(value)
+
+
+class ColumnStore:
+    """
+    Struct of arrays for hot numeric fields of stored objects: every field is float64 numpy column, one row per object.
+    None is kept as nan and datetime as timestamp, rows of removed objects are reused by new ones
+    """
+
+    def __init__(self, fields: tuple[str, ...], capacity: int = 1024):
+        self.fields = fields
+        self._columns = {field: np.full(capacity, np.nan) for field in fields}
+        self._rows: dict[Any, int] = {}
+        self._free_rows: list[int] = []
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _allocate_row(self) -> int:
+        if self._free_rows:
+            return self._free_rows.pop()
+        capacity = len(self._columns[self.fields[0]]) if self.fields else 0
+        if self._size == capacity:
+            for field, column in self._columns.items():
+                grown = np.full(max(capacity * 2, 1), np.nan)
+                grown[:capacity] = column
+                self._columns[field] = grown
+        self._size += 1
+        return self._size - 1
+
+    def set(self, id, obj) -> None:
+        row = self._rows.get(id)
+        if row is None:
+            row = self._rows[id] = self._allocate_row()
+        for field in self.fields:
+            self._columns[field][row] = to_float(getattr(obj, field, None))
+
+    def remove(self, id) -> None:
+        row = self._rows.pop(id, None)
+        if row is not None:
+            for column in self._columns.values():
+                column[row] = np.nan
+            self._free_rows.append(row)
+
+    def clear(self) -> None:
+        self._rows.clear()
+        self._free_rows.clear()
+        self._size = 0
+        for column in self._columns.values():
+            column.fill(np.nan)
+
+    def take(self, ids: list, *fields: str) -> np.ndarray:
+        """Method returns (len(ids), len(fields)) array of values, unknown ids give rows of nan"""
+        rows = np.fromiter((self._rows.get(id, -1) for id in ids), dtype=np.intp, count=len(ids))
+        result = np.empty((len(ids), len(fields)))
+        known = rows >= 0
+        for position, field in enumerate(fields):
+            result[:, position] = np.where(known, self._columns[field][rows], np.nan)
+        return result
+
+
+class IndexedStorage(dict):
+    """
+    Dict of objects by id which keeps secondary indexes field value -> ids for indexed_fields and numeric
+    column_fields in ColumnStore. Both are updated on every write to the dict, objects changed in place must be
+    passed to reindex()
+    """
+
+    def __init__(self, indexed_fields: tuple[str, ...] = (), column_fields: tuple[str, ...] = ()):
+        super().__init__()
+        self.indexed_fields = indexed_fields
+        self.columns = ColumnStore(column_fields) if column_fields else None
+        # dict is used as insertion ordered set, so lookups keep the order objects came in
+        self._indexes: dict[str, dict[Hashable, dict[Any, None]]] = {
+            field: {} for field in indexed_fields
+        }
+        self._indexed_values: dict[Any, tuple] = {}
+
+    def _index(self, id, obj) -> None:
+        values = tuple(getattr(obj, field, None) for field in self.indexed_fields)
+        for field, value in zip(self.indexed_fields, values):
+            self._indexes[field].setdefault(value, {})[id] = None
+        self._indexed_values[id] = values
+
+    def _unindex(self, id) -> None:
+        values = self._indexed_values.pop(id, None)
+        if values is None:
+            return
+        for field, value in zip(self.indexed_fields, values):
+            bucket = self._indexes[field].get(value)
+            if bucket is not None:
+                bucket.pop(id, None)
+                if not bucket:
+                    del self._indexes[field][value]
+
+    def reindex(self, id) -> None:
+        obj = self.get(id)
+        if obj is None:
+            return
+        if self.columns is not None:
+            self.columns.set(id, obj)
+        values = tuple(getattr(obj, field, None) for field in self.indexed_fields)
+        if values != self._indexed_values.get(id):
+            self._unindex(id)
+            self._index(id, obj)
+
+    def lookup(self, field: str, value: Hashable) -> list:
+        """Method returns ids of objects which had value in field when they were indexed last time"""
+        return list(self._indexes[field].get(value, ()))
+
+    def __setitem__(self, id, obj) -> None:
+        self._unindex(id)
+        super().__setitem__(id, obj)
+        self._index(id, obj)
+        if self.columns is not None:
+            self.columns.set(id, obj)
+
+    def _remove(self, id) -> None:
+        self._unindex(id)
+        if self.columns is not None:
+            self.columns.remove(id)
+
+    def __delitem__(self, id) -> None:
+        super().__delitem__(id)
+        self._remove(id)
+
+    def pop(self, id, *default):
+        if id in self:
+            self._remove(id)
+        return super().pop(id, *default)
+
+    def popitem(self):
+        id, obj = super().popitem()
+        self._remove(id)
+        return id, obj
+
+    def setdefault(self, id, default=None):
+        if id not in self:
+            self[id] = default
+        return self[id]
+
+    def update(self, *args, **kwargs) -> None:
+        for id, obj in dict(*args, **kwargs).items():
+            self[id] = obj
+
+    def clear(self) -> None:
+        super().clear()
+        self._indexed_values.clear()
+        for index in self._indexes.values():
+            index.clear()
+        if self.columns is not None:
+            self.columns.clear()
@@ -1,19 +1,24 @@
-import json
-from dataclasses import asdict
+import time
 
 from telegram._chat import Chat
 from telegram._message import Message
 
+from geofences import courier_geofences
+from kafka_common.codecs import CourierCodec, DeliveryCodec
 from kafka_common.factories import async_send_kafka_msg
 from kafka_common.topics import CourierTopics, DeliveryTopics
-from repository.courier_repository import CourierRepository
-from schemas.schemas import Delivery, Location, couriers, Courier
+from repository.factories import courier_repository_factory
+from schemas.schemas import Delivery, Location, Courier
+from services.dispatch_service import DispatchTrigger
+from services.location_service import LocationPublisher
+from spatial import couriers_index
+from speed_profiles import courier_speed_profiles
 
 
 class CourierService:
 
     def __init__(self):
-        self.courier_repository = CourierRepository()
+        self.courier_repository = courier_repository_factory()
 
     async def get_courier_profile(self, id: int) -> Courier:
         courier = await self.courier_repository.get(id)
@@ -27,20 +32,38 @@ class CourierService:
             'last_name': user.last_name,
         }
 
-        msg = json.dumps(courier)
+        msg = CourierCodec.encode(courier)
         await async_send_kafka_msg(msg, CourierTopics.COURIER_PROFILE_ASK)
 
     async def courier_stop_carrying(self, user: Chat):
-        courier = couriers.pop(user.id)
+        courier = await self.courier_repository.delete(user.id)
+        couriers_index.remove(user.id)
+        courier_geofences.remove(user.id)
+        courier_speed_profiles.remove(user.id)
+        LocationPublisher().forget(user.id)
         return courier
 
-    async def track_location(self, msg: Message, user: Chat):
+    async def track_location(self, msg: Message, user: Chat) -> bool:
+        """Method saves courier location, returns True if courier has just come to pickup or drop-off point"""
         loc = Location(msg.location.latitude, msg.location.longitude)
 
-        couriers[user.id].location = loc
-
-        msg = {'courier_id': user.id, 'location': asdict(loc)}
-        await async_send_kafka_msg(json.dumps(msg), CourierTopics.COURIER_LOCATION)
+        courier = await self.courier_repository.get(user.id)
+        first_location = courier is not None and courier.location is None
+        await self.courier_repository.update(user.id, location=loc)
+        couriers_index.update(user.id, loc.lat, loc.lon)
+        # live location updates are edits of the first message
+        sent_at = msg.edit_date or msg.date
+        timestamp = sent_at.timestamp() if sent_at else time.time()
+        courier_speed_profiles.track(
+            user.id, loc.lat, loc.lon, timestamp, delivering=courier is not None and courier.busy
+        )
+        if first_location:
+            DispatchTrigger().notify('courier_location')
+        elif courier is not None and not courier.busy:
+            DispatchTrigger().notify_courier_moved()
+        arrived = courier_geofences.track(user.id, loc.lat, loc.lon)
+        LocationPublisher().track(user.id, loc.lat, loc.lon, timestamp)
+        return arrived
 
     async def close_delivery(self, cour_id: int, status: int) -> Delivery:
         from services.delivery_service import DeliveryService
@@ -51,7 +74,7 @@ class CourierService:
         if delivery:
             await service.close_delivery(delivery.id, status)
 
-            msg = json.dumps(delivery.__dict__, default=str)
+            msg = DeliveryCodec.encode(delivery)
             await async_send_kafka_msg(msg, DeliveryTopics.DELIVERED)
 
         return delivery
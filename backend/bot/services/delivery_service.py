@@ -1,75 +1,58 @@
 import datetime
-import json
 from typing import AsyncGenerator
 
+from distance_engine import ROUTE_FIELDS
+from geofences import courier_geofences
+from kafka_common.codecs import DeliveryCodec
 from kafka_common.factories import async_send_kafka_msg
 from kafka_common.receiver import SingletonMixin
 from kafka_common.topics import DeliveryTopics
-from repository.courier_repository import CourierRepository
-from repository.delivery_repository import DeliveryRepository
-from schemas.schemas import Courier, Delivery, Location, cancelled_deliveries
+from repository.factories import courier_repository_factory, delivery_repository_factory
+from schemas.schemas import Courier, Delivery, Location
+from services.dispatch_service import DispatchTrigger
+from services.metrics_service import AvgCourierSpeedProvider
+from spatial import couriers_index
 from utils import DistanceCalculator
 
 
 class DeliveryService(SingletonMixin):
-    __service_lock: bool = True
-    __lock_counter: int = 0
+    optimal_assignment: bool = True  # solve whole tick as matching instead of greedy nearest courier per delivery
 
     def __init__(self):
-        self.delivery_repository = DeliveryRepository()
-        self.courier_repository = CourierRepository()
-
-    @property
-    def lock(self):
-        return self.__service_lock
-
-    @lock.setter
-    def lock(self, new_lock: bool) -> None:
-        self.__service_lock = new_lock
-
-    @property
-    def lock_counter(self):
-        return self.__lock_counter
-
-    @lock_counter.setter
-    def lock_counter(self, new_counter: int) -> None:
-        self.__lock_counter = new_counter
-
-    async def _verify_service(self):
-        free_couriers = await self.courier_repository.get_by_kwargs(busy=False)
-        if free_couriers:
-            self.lock = False
-            self.lock_counter = 0
+        self.delivery_repository = delivery_repository_factory()
+        self.courier_repository = courier_repository_factory()
 
     async def add_courier_to_line(self, courier: Courier):
         await self.courier_repository.add(courier)
-        self.lock = False
-        self.lock_counter = 0
+        DispatchTrigger().notify('courier_added')
 
-    async def open_delivery(
-            self, delivery: Delivery
+    async def _assign_delivery(
+            self, delivery: Delivery, nearest_courier_search: dict[str, bool | Courier]
     ) -> dict[str, Courier | Delivery | bool] | dict[str, str | bool]:
-        service = DistanceCalculator()
-        couriers = await self.courier_repository.get_by_kwargs(busy=False)
-
-        couriers_with_location = [
-            courier for courier in couriers if courier.location is not None
-        ]
-
-        nearest_courier_search = await service.get_nearest_free_courier(
-            delivery, couriers_with_location
-        )
-
         if nearest_courier_search['success']:
             courier: Courier = nearest_courier_search['courier']
-            await self.delivery_repository.update(
-                id=delivery.id, courier=courier.id, status=3
+            # other bot worker may take the same courier or delivery, then delivery waits for the next tick
+            if not await self.courier_repository.lock_courier(courier.id):
+                return {'success': False, 'msg': 'Courier was taken by other worker!'}
+            assigned = await self.delivery_repository.update_if(
+                delivery.id,
+                {'status': 1},
+                courier=courier.id,
+                status=3,
+                estimated_time=delivery.estimated_time,
+                distance=delivery.distance,
             )
+            if not assigned:
+                await self.courier_repository.unlock_courier(courier.id)
+                return {'success': False, 'msg': 'Delivery was taken by other worker!'}
             await self.courier_repository.update(
-                id=courier.id, current_delivery_id=delivery.id, busy=True
+                id=courier.id, current_delivery_id=delivery.id
+            )
+            courier_geofences.set_delivery(
+                courier.id, assigned, courier.location and (courier.location.lat, courier.location.lon)
             )
 
-            msg = json.dumps(delivery.__dict__, default=str)
+            msg = DeliveryCodec.encode(delivery)
             await async_send_kafka_msg(msg, DeliveryTopics.DELIVERED)
 
             return {'success': True, 'courier': courier, 'delivery': delivery}
@@ -80,8 +63,9 @@ class DeliveryService(SingletonMixin):
     async def picked_up_delivery(self, courier_id: int) -> Delivery:
         delivery = await self.get_couriers_delivery(courier_id)
         if delivery:
-            await self.courier_repository.update(delivery.id, status=4)
-        msg = json.dumps(delivery.__dict__, default=str)
+            await self.delivery_repository.update(delivery.id, status=4)
+            courier_geofences.picked_up(courier_id, couriers_index.location(courier_id))
+        msg = DeliveryCodec.encode(delivery)
         await async_send_kafka_msg(msg, DeliveryTopics.DELIVERED)
 
         return delivery
@@ -96,54 +80,64 @@ class DeliveryService(SingletonMixin):
     async def close_delivery(self, delivery_id: int, status: int) -> None:
         delivery = await self.delivery_repository.get(delivery_id)
         courier = await self.courier_repository.get(delivery.courier)
-        await self.delivery_repository.update(
+        delivery = await self.delivery_repository.update(
             delivery_id, status=status, completed_at=datetime.datetime.now()
         )
+        if status == 5 and delivery is not None:
+            AvgCourierSpeedProvider().record_delivery(delivery)
         busy = status == 0
         await self.courier_repository.update(courier.id, busy=busy)
+        courier_geofences.remove(courier.id)
+        if not busy:
+            DispatchTrigger().notify('courier_free')
 
-    async def check_service_lock(self) -> bool:
-        if self.lock and self.lock_counter < 5:
-            self.lock_counter += 1
+    async def start_delivering(self) -> AsyncGenerator:
+        return self._distribute_deliveries()
 
-        elif self.lock and self.lock_counter >= 5:
-            await self._verify_service()
-
-        else:
-            return False
-
-        return True
-
-    async def start_delivering(self) -> AsyncGenerator | None:
-        lock_status = await self.check_service_lock()
-        if lock_status is False:
-            return self._distribute_deliveries()
-        return None
-
-    async def _distribute_deliveries(self) -> AsyncGenerator[Delivery, None]:
+    async def _distribute_deliveries(self) -> AsyncGenerator[dict, None]:
         undelivered_deliveries = await self.delivery_repository.get_by_kwargs(status=1)
-        for delivery in undelivered_deliveries:
-            if delivery is not None:
-                res = await self.open_delivery(delivery)
-                yield res
-            else:
-                yield None
+        if not undelivered_deliveries:
+            return
+        free_couriers = [
+            courier
+            for courier in await self.courier_repository.get_by_kwargs(busy=False)
+            if courier.location is not None
+        ]
+        if not free_couriers:
+            return
+        route_points = await self.delivery_repository.get_columns(
+            [delivery.id for delivery in undelivered_deliveries], *ROUTE_FIELDS
+        )
+        service = DistanceCalculator()
+        if self.optimal_assignment:
+            searches = await service.get_assigned_free_couriers(
+                undelivered_deliveries, free_couriers, route_points
+            )
+        else:
+            searches = await service.get_nearest_free_couriers(
+                undelivered_deliveries, free_couriers, route_points
+            )
+        for delivery, nearest_courier_search in zip(undelivered_deliveries, searches):
+            yield await self._assign_delivery(delivery, nearest_courier_search)
 
     async def change_delivery_distance(self, distance: int) -> None:
         calculate_service = DistanceCalculator()
         calculate_service.working_range += distance
+        DispatchTrigger().notify('working_range')
 
 
 class DeliveryValidationService:
-    __acceptable_distance_difference = 0.2  # kilometers
 
     def __init__(self, courier_id: int):
         self.distance_calculator = DistanceCalculator()
-        self.delivery_repository = DeliveryRepository()
-        self.courier_repository = CourierRepository()
+        self.delivery_repository = delivery_repository_factory()
+        self.courier_repository = courier_repository_factory()
         self.courier_id = courier_id
 
     async def validate_courier_on_point(self):
+        on_point = courier_geofences.is_on_point(self.courier_id)
+        if on_point is not None:
+            return on_point
         courier = await self.courier_repository.get(self.courier_id)
         delivery = await self.delivery_repository.get(courier.current_delivery_id)
         if delivery.status == 3:
@@ -151,16 +145,14 @@ class DeliveryValidationService:
         else:
             point = Location(delivery.consumer_latitude, delivery.consumer_longitude)
         distance = await self.distance_calculator.calculate_distance(courier.location, point)
-        return distance <= self.__acceptable_distance_difference
+        return distance <= courier_geofences.radius
 
 
 class DeliveryCancellationService(SingletonMixin):
 
     def __init__(self):
         self.delivery_service = DeliveryService()
-        self.cancelled_delivery_repository = DeliveryRepository(
-            source=cancelled_deliveries
-        )
+        self.cancelled_delivery_repository = delivery_repository_factory(cancelled=True)
 
     async def check_cancelled_deliveries(self) -> AsyncGenerator[Courier, None] | None:
         deliveries = await self.cancelled_delivery_repository.get_all()
@@ -171,5 +163,7 @@ class DeliveryCancellationService(SingletonMixin):
                 courier = await self.delivery_service.courier_repository.update(
                     delivery.courier, busy=False, current_delivery_id=None
                 )
+                courier_geofences.remove(delivery.courier)
                 if courier:
+                    DispatchTrigger().notify('courier_free')
                     yield courier
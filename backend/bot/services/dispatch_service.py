@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import time
+
+from kafka_common.receiver import SingletonMixin
+
+
+class DispatchTrigger(SingletonMixin):
+    """
+    Wakes up delivery distribution when something which may give new assignment happens: new delivery, courier got
+    free, sent first location or moved, so it may be in range of waiting delivery now. Events which come during
+    debounce window are coalesced into one matching pass
+    """
+    debounce: float = 0.05  # seconds
+    moved_interval: float = 5  # seconds, free couriers moving trigger pass not more often
+    fallback_interval: float = 60  # seconds, pass for changes which produce no event, like growing priority
+
+    def __init__(self):
+        if getattr(self, '_reasons', None) is not None:
+            # SingletonMixin calls __init__ once more on the already initialized instance
+            return
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._event: asyncio.Event | None = None
+        self._reasons: set[str] = set()
+        self._moved_at = -self.moved_interval
+
+    @property
+    def bound(self) -> bool:
+        return self._loop is not None
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Method binds trigger to the loop where distribution runs, events before binding are dropped"""
+        self._loop = loop
+        self._event = asyncio.Event()
+
+    def notify(self, reason: str) -> None:
+        """Method may be called from any thread, e.g. from kafka listeners"""
+        if self._loop is None:
+            return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            self._set(reason)
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._set, reason)
+        except RuntimeError:
+            logging.warning(f'Dispatch event {reason} dropped, distribution loop is closed')
+
+    def notify_courier_moved(self) -> None:
+        """Method is called on every location of free courier, pass is triggered at most once per moved_interval"""
+        now = time.monotonic()
+        if now - self._moved_at < self.moved_interval:
+            return
+        self._moved_at = now
+        self.notify('courier_moved')
+
+    def _set(self, reason: str) -> None:
+        self._reasons.add(reason)
+        self._event.set()
+
+    async def wait(self) -> set[str]:
+        """Method waits for the first event, then for debounce window and returns reasons of all collected events"""
+        await self._event.wait()
+        await asyncio.sleep(self.debounce)
+        self._event.clear()
+        reasons, self._reasons = self._reasons, set()
+        return reasons
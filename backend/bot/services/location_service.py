@@ -0,0 +1,59 @@
+from kafka_common.codecs import CourierLocationCodec
+from kafka_common.factories import async_send_kafka_msg
+from kafka_common.receiver import SingletonMixin
+from kafka_common.topics import CourierTopics
+from logging_.logger import logger
+from spatial import haversine
+
+
+class LocationPublisher(SingletonMixin):
+    """
+    Throttles courier locations going to the marketplace. Location is dropped if courier moved less than
+    min_distance since the last published one, unless heartbeat seconds passed. Locations left are coalesced per
+    courier, so only the latest one is kept, and flush() sends all of them as one kafka message
+    """
+    min_distance: float = 0.02  # kilometers
+    heartbeat: float = 60  # seconds, location of standing courier is still published this often
+    flush_interval: float = 1  # seconds
+
+    def __init__(self):
+        if getattr(self, '_pending', None) is not None:
+            # SingletonMixin calls __init__ once more on the already initialized instance
+            return
+        self._pending: dict[int, tuple[float, float, float]] = {}
+        self._published: dict[int, tuple[float, float, float]] = {}
+        self.received = 0
+        self.sent = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def track(self, courier_id: int, lat: float, lon: float, timestamp: float) -> bool:
+        """Method returns whether location was kept for the next flush"""
+        self.received += 1
+        published = self._published.get(courier_id)
+        if (
+            published is not None
+            and timestamp - published[2] < self.heartbeat
+            and haversine(published[0], published[1], lat, lon) < self.min_distance
+        ):
+            return False
+        self._pending[courier_id] = self._published[courier_id] = (lat, lon, timestamp)
+        return True
+
+    def forget(self, courier_id: int) -> None:
+        self._pending.pop(courier_id, None)
+        self._published.pop(courier_id, None)
+
+    async def flush(self) -> int:
+        """Method sends pending locations as one message, returns their count"""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        msg = CourierLocationCodec.encode({
+            'locations': [[courier_id, *location] for courier_id, location in pending.items()]
+        })
+        await async_send_kafka_msg(msg, CourierTopics.COURIER_LOCATION)
+        self.sent += len(pending)
+        logger.debug(f'Published {len(pending)} locations, {self.sent} of {self.received} received are sent')
+        return len(pending)
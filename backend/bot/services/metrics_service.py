@@ -1,44 +1,80 @@
 import datetime
 import logging
+import time
+from dataclasses import dataclass
 
-from repository.delivery_repository import DeliveryRepository
+from kafka_common.receiver import SingletonMixin
+
+from repository.factories import delivery_repository_factory
 from schemas.schemas import Delivery
+from utils import DistanceCalculator
+
+
+@dataclass(slots=True)
+class DecayedSpeed:
+    """
+    Exponentially weighted speed: distances and times of completed deliveries are summed with weights halving every
+    half_life seconds, so estimate follows recent deliveries without keeping them
+    """
+    half_life: float  # seconds
+    distance: float = 0  # km
+    hours: float = 0
+    updated_at: float | None = None
+
+    @property
+    def speed(self) -> float | None:
+        return self.distance / self.hours if self.hours else None
+
+    def add(self, distance: float, hours: float, now: float) -> None:
+        if self.updated_at is not None:
+            decay = 0.5 ** ((now - self.updated_at) / self.half_life)
+            self.distance *= decay
+            self.hours *= decay
+        self.distance += distance
+        self.hours += hours
+        self.updated_at = now
 
 
-class AvgCourierSpeedProvider:
+class AvgCourierSpeedProvider(SingletonMixin):
+    """
+    Keeps avg couriers speed up to date: every completed delivery is added to the estimate when it is closed and
+    new estimate is set to DistanceCalculator, so speed is never recalculated from stored deliveries
+    """
+    half_life: float = 3600  # seconds
+    min_hours: float = 0.25  # weighted delivering time needed before estimate replaces default speed
 
     def __init__(self):
-        self.delivery_repository = DeliveryRepository()
+        if getattr(self, 'estimate', None) is not None:
+            # SingletonMixin calls __init__ once more on the already initialized instance
+            return
+        self.estimate = DecayedSpeed(self.half_life)
+        self.delivery_repository = delivery_repository_factory()
 
-    async def collect_completed_deliveries(self) -> list[Delivery]:
-        deliveries = await self.delivery_repository.get_by_kwargs(status=5)
-        return deliveries
+    @property
+    def avg_speed(self) -> float | None:
+        if self.estimate.hours < self.min_hours:
+            return None
+        return self.estimate.speed
 
-    async def get_deliveries_distances_and_times(
-        self, deliveries: list[Delivery]
-    ) -> tuple[float, datetime.timedelta]:
-        distances = 0
-        times = datetime.timedelta(seconds=0)
-        for delivery in deliveries:
-            distances += delivery.distance
-            times += delivery.completed_at - delivery.started_at
-        return distances, times
+    def record_delivery(self, delivery: Delivery) -> float | None:
+        """Method adds completed delivery to the estimate, returns avg speed if it was set to DistanceCalculator"""
+        if not delivery.distance or not isinstance(delivery.started_at, datetime.datetime) or (
+            delivery.completed_at is None
+        ):
+            return None
+        hours = (delivery.completed_at - delivery.started_at).total_seconds() / 3600
+        if hours <= 0:
+            return None
+        self.estimate.add(delivery.distance, hours, time.monotonic())
+        speed = self.avg_speed
+        if speed:
+            DistanceCalculator().avg_courier_speed = speed
+        return speed
 
-    async def clear_deliveries_from_storage(self, deliveries: list[Delivery]):
+    async def clear_completed_deliveries(self) -> int:
+        """Method deletes completed deliveries, they are already counted in the estimate"""
+        deliveries = await self.delivery_repository.get_by_kwargs(status=5)
         for delivery in deliveries:
             await self.delivery_repository.delete(delivery.id)
-
-    async def get_avg_couriers_speed(self) -> float:
-        try:
-            completed_deliveries = await self.collect_completed_deliveries()
-            if completed_deliveries:
-                distances, times = await self.get_deliveries_distances_and_times(
-                    completed_deliveries
-                )
-                avg_speed = distances / (times.total_seconds() / 3600)
-                await self.clear_deliveries_from_storage(completed_deliveries)
-                return avg_speed
-        except Exception as e:
-            logging.error(
-                f'Some error in calculating avg courier speed {e}', exc_info=e
-            )
+        logging.info(f'Cleared {len(deliveries)} completed deliveries')
+        return len(deliveries)
@@ -1,18 +1,21 @@
 import datetime
 
+import numpy as np
+from distance_engine import ROUTE_FIELDS, haversine_pairwise, to_radians
 from kafka_common.receiver import SingletonMixin
-from repository.courier_repository import CourierRepository
-from repository.delivery_repository import DeliveryRepository
+from repository.factories import courier_repository_factory, delivery_repository_factory
 from schemas.schemas import Delivery, Location
+from schemas.storage import to_float
 from utils import DistanceCalculator
 
 
 class NotificationService(SingletonMixin):
     __notification_delta: int = 69  # must be in seconds!
+    batch_mode: bool = True  # check all active deliveries with arrays instead of one by one
 
     def __init__(self):
-        self.delivery_repository = DeliveryRepository()
-        self.courier_repository = CourierRepository()
+        self.delivery_repository = delivery_repository_factory()
+        self.courier_repository = courier_repository_factory()
 
     @property
     def notification_delta(self):
@@ -27,6 +30,8 @@ class NotificationService(SingletonMixin):
             status=3
         )
         picked_up_deliveries = await self.delivery_repository.get_by_kwargs(status=4)
+        if self.batch_mode:
+            return await self.check_deliveries_timing(not_picked_up_deliveries + picked_up_deliveries)
 
         to_notify_set = list()
         time_out_set = list()
@@ -45,6 +50,59 @@ class NotificationService(SingletonMixin):
 
         return to_notify_set, time_out_set
 
+    async def check_deliveries_timing(
+            self, deliveries: list[Delivery]
+    ) -> tuple[list[Delivery], list[Delivery]]:
+        """
+        Batch version of check_delivery_timing for all active deliveries: left distance of courier -> (pickup point)
+        -> consumer route is calculated with vectorized haversine, then time out and lateness are compared as arrays.
+        Returns deliveries to notify and timed out ones like distribute_notifications
+        """
+        if not deliveries:
+            return [], []
+        fields = (*ROUTE_FIELDS, 'status', 'estimated_time')
+        ids = [delivery.id for delivery in deliveries]
+        values = await self.delivery_repository.get_columns(ids, *fields)
+        if values is None:
+            values = np.array(
+                [[to_float(getattr(delivery, field)) for field in fields] for delivery in deliveries],
+                dtype=float,
+            ).reshape(-1, len(fields))
+        pickups = to_radians(values[:, 0:2])
+        consumers = to_radians(values[:, 2:4])
+        status, estimated = values[:, 4], values[:, 5]
+
+        # couriers of active deliveries are busy, so all of them come with one repository call
+        calculator = DistanceCalculator()
+        busy_couriers = {courier.id: courier for courier in await self.courier_repository.get_by_kwargs(busy=True)}
+        courier_points, speeds = [], []
+        for delivery in deliveries:
+            courier = busy_couriers.get(delivery.courier)
+            location = courier.location if courier is not None else None
+            courier_points.append((location.lat, location.lon) if location is not None else (None, None))
+            speeds.append(calculator.get_courier_speed(delivery.courier))
+        courier_points = to_radians(courier_points)
+
+        left_distance = np.where(
+            status == 3,
+            haversine_pairwise(courier_points, pickups) + haversine_pairwise(pickups, consumers),
+            haversine_pairwise(courier_points, consumers),
+        )
+        now = datetime.datetime.now()
+        left_seconds = left_distance / np.array(speeds, dtype=float) * 3600
+        time_out = estimated <= now.timestamp()
+        # nan distance of courier without location gives False, like deliveries which are in time
+        late = ~time_out & (now.timestamp() + left_seconds > estimated)
+
+        to_notify_set = list()
+        for row in np.flatnonzero(late):
+            delivery = deliveries[row]
+            if not delivery.last_notification_ts or await self.check_last_notification_ts(delivery):
+                delivery.last_notification_ts = now
+                to_notify_set.append(delivery)
+        time_out_set = [deliveries[row] for row in np.flatnonzero(time_out)]
+        return to_notify_set, time_out_set
+
     async def check_delivery_timing(self, delivery: Delivery):
         courier = await self.courier_repository.get(delivery.courier)
         points = []
@@ -56,7 +114,7 @@ class NotificationService(SingletonMixin):
         calculator = DistanceCalculator()
 
         left_distance = await calculator.calculate_distance(courier.location, *points)
-        left_distance_requiring_time = left_distance / calculator.avg_courier_speed
+        left_distance_requiring_time = left_distance / calculator.get_courier_speed(courier.id)
 
         in_time = await self.compare_actual_time_and_estimated_time(
             left_distance_requiring_time, delivery.estimated_time
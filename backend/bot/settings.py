@@ -4,5 +4,7 @@ import os
 class BotSettings:
     BOT_TOKEN = os.getenv('BOT_TOKEN')
     REDIS_HOST = os.getenv('REDIS_HOST')
+    REDIS_PORT = os.getenv('REDIS_PORT')
     KAFKA_HOST = os.getenv('KAFKA_HOST')
     KAFKA_PORT = os.getenv('KAFKA_PORT')
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'memory')  # memory or redis, redis is shared by all bot workers
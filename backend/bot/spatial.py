@@ -0,0 +1,124 @@
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Function to calculate great-circle distance in kilometers between two points"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class CourierSpatialIndex:
+    """
+    Grid index over courier locations. Earth is split in cells of cell_size_km degrees, so radius query checks only
+    couriers from cells which overlap circle around the point
+    """
+
+    def __init__(self, cell_size_km: float = 1.0):
+        self.cell_size_km = cell_size_km
+        self._cell_degrees = cell_size_km / KM_PER_DEGREE
+        self._lon_cells = math.ceil(360 / self._cell_degrees)
+        self._cells: dict[tuple[int, int], set[int]] = {}
+        self._positions: dict[int, tuple[float, float, tuple[int, int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, courier_id: int) -> bool:
+        return courier_id in self._positions
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return (
+            math.floor((lat + 90) / self._cell_degrees),
+            math.floor((lon + 180) / self._cell_degrees) % self._lon_cells,
+        )
+
+    def update(self, courier_id: int, lat: float, lon: float) -> None:
+        cell = self._cell(lat, lon)
+        previous = self._positions.get(courier_id)
+        if previous is not None and previous[2] != cell:
+            self._discard_from_cell(courier_id, previous[2])
+        self._cells.setdefault(cell, set()).add(courier_id)
+        self._positions[courier_id] = (lat, lon, cell)
+
+    def remove(self, courier_id: int) -> None:
+        previous = self._positions.pop(courier_id, None)
+        if previous is not None:
+            self._discard_from_cell(courier_id, previous[2])
+
+    def _discard_from_cell(self, courier_id: int, cell: tuple[int, int]) -> None:
+        members = self._cells.get(cell)
+        if members is not None:
+            members.discard(courier_id)
+            if not members:
+                del self._cells[cell]
+
+    def location(self, courier_id: int) -> tuple[float, float] | None:
+        position = self._positions.get(courier_id)
+        if position is None:
+            return None
+        return position[0], position[1]
+
+    def _cells_around(self, lat: float, lon: float, radius_km: float):
+        lat_degrees = radius_km / KM_PER_DEGREE
+        max_lat = min(90.0, abs(lat) + lat_degrees)
+        cos_lat = math.cos(math.radians(max_lat))
+        lat_from, lon_from = self._cell(max(-90.0, lat - lat_degrees), lon)
+        lat_to = self._cell(min(90.0, lat + lat_degrees), lon)[0]
+        if cos_lat < 1e-9:
+            lon_span = self._lon_cells
+        else:
+            lon_span = math.ceil(lat_degrees / cos_lat / self._cell_degrees) + 1
+
+        if (lat_to - lat_from + 1) * min(2 * lon_span + 1, self._lon_cells) > len(self._cells):
+            # circle covers more cells than are occupied, cheaper to walk through occupied ones
+            yield from self._cells.values()
+            return
+
+        lon_indexes = (
+            range(self._lon_cells)
+            if 2 * lon_span + 1 >= self._lon_cells
+            else [(lon_from + shift) % self._lon_cells for shift in range(-lon_span, lon_span + 1)]
+        )
+        for lat_index in range(lat_from, lat_to + 1):
+            for lon_index in lon_indexes:
+                members = self._cells.get((lat_index, lon_index))
+                if members:
+                    yield members
+
+    def within_radius(self, lat: float, lon: float, radius_km: float) -> list[tuple[int, float]]:
+        """Method returns (courier_id, distance_km) pairs inside the radius sorted from the nearest one"""
+        found = []
+        for members in self._cells_around(lat, lon, radius_km):
+            for courier_id in members:
+                courier_lat, courier_lon, _ = self._positions[courier_id]
+                distance = haversine(lat, lon, courier_lat, courier_lon)
+                if distance <= radius_km:
+                    found.append((courier_id, distance))
+        found.sort(key=lambda pair: pair[1])
+        return found
+
+    def nearest(
+            self, lat: float, lon: float, k: int = 1, max_radius_km: float | None = None
+    ) -> list[tuple[int, float]]:
+        """Method returns up to k nearest couriers, search radius grows from one cell until enough are found"""
+        radius = self.cell_size_km
+        while True:
+            if max_radius_km is not None:
+                radius = min(radius, max_radius_km)
+            found = self.within_radius(lat, lon, radius)
+            if (
+                len(found) >= k
+                or len(found) == len(self._positions)
+                or (max_radius_km is not None and radius >= max_radius_km)
+            ):
+                return found[:k]
+            radius *= 2
+
+
+couriers_index = CourierSpatialIndex()
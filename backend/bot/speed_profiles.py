@@ -0,0 +1,68 @@
+from dataclasses import dataclass
+
+from spatial import haversine
+
+
+@dataclass(slots=True)
+class SpeedProfile:
+    """Last fix of the courier and exponentially weighted distance and time he moved while delivering"""
+    lat: float
+    lon: float
+    timestamp: float  # seconds
+    distance: float = 0  # km
+    hours: float = 0
+
+    @property
+    def speed(self) -> float | None:
+        return self.distance / self.hours if self.hours else None
+
+
+class CourierSpeedProfiles:
+    """
+    Per courier speeds learned from location stream: every segment between two fixes of the busy courier is added to
+    his profile, segments of the free courier, too short, too long or too fast ones are skipped. Profile replaces
+    global avg speed only after min_hours of delivering were seen, so new couriers start with the global one
+    """
+    half_life: float = 1800  # seconds
+    min_segment: float = 5  # seconds, fixes sent closer are mostly gps noise
+    max_segment: float = 600  # seconds, longer gap means courier was offline
+    max_speed: float = 80  # km/h, faster segment is gps jump
+    min_hours: float = 5 / 60
+
+    def __init__(self):
+        self._profiles: dict[int, SpeedProfile] = {}
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def __contains__(self, courier_id: int) -> bool:
+        return courier_id in self._profiles
+
+    def track(self, courier_id: int, lat: float, lon: float, timestamp: float, delivering: bool) -> None:
+        profile = self._profiles.get(courier_id)
+        if profile is None:
+            self._profiles[courier_id] = SpeedProfile(lat, lon, timestamp)
+            return
+        seconds = timestamp - profile.timestamp
+        if seconds < self.min_segment:
+            return
+        distance = haversine(profile.lat, profile.lon, lat, lon)
+        hours = seconds / 3600
+        if delivering and seconds <= self.max_segment and distance / hours <= self.max_speed:
+            decay = 0.5 ** (seconds / self.half_life)
+            profile.distance = profile.distance * decay + distance
+            profile.hours = profile.hours * decay + hours
+        profile.lat, profile.lon, profile.timestamp = lat, lon, timestamp
+
+    def speed(self, courier_id: int) -> float | None:
+        """Method returns learned speed of the courier in km/h or None if there is not enough data yet"""
+        profile = self._profiles.get(courier_id)
+        if profile is None or profile.hours < self.min_hours:
+            return None
+        return profile.speed
+
+    def remove(self, courier_id: int) -> None:
+        self._profiles.pop(courier_id, None)
+
+
+courier_speed_profiles = CourierSpeedProfiles()
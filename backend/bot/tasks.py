@@ -1,5 +1,4 @@
 import asyncio
-import threading
 
 from handlers.delivery_handlers import (
     delivery_cancelled_by_consumer_notification,
@@ -8,32 +7,57 @@ from handlers.delivery_handlers import (
     send_delivery_info_msg,
 )
 from logging_.logger import logger
+from scheduler import ScheduledJob, Scheduler
 from services.delivery_service import DeliveryCancellationService, DeliveryService
+from services.dispatch_service import DispatchTrigger
+from services.location_service import LocationPublisher
 from services.metrics_service import AvgCourierSpeedProvider
 from services.notification_service import NotificationService
 from telegram import Update
-from telegram.ext import CallbackContext
+from telegram.ext import Application, CallbackContext
 from utils import DistanceCalculator
 
 
-async def distribute_deliveries_periodic_task(context: CallbackContext):
+async def distribute_deliveries_task(context: CallbackContext):
     service = DeliveryService()
     deliveries_ = await service.start_delivering()
-    logger.warning('Starting deliveries')
-
-    if deliveries_ is not None:
-        async for delivery in deliveries_:
-            logger.info(f'Got delivery {delivery} for delivering')
-            if delivery['success']:
-                await send_delivery_info_msg(
-                    context,
-                    chat_id=delivery['courier'].id,
-                    delivery=delivery['delivery'],
-                )
-            else:
-                logger.warning('No free couriers!')
-    else:
-        logger.warning('Distribution does not started because of not free couriers!')
+
+    async for delivery in deliveries_:
+        logger.info(f'Got delivery {delivery} for delivering')
+        if delivery['success']:
+            await send_delivery_info_msg(
+                context,
+                chat_id=delivery['courier'].id,
+                delivery=delivery['delivery'],
+            )
+        else:
+            logger.warning('No free couriers!')
+
+
+async def dispatch_deliveries_on_events(context: CallbackContext):
+    """Task runs one distribution pass for every burst of dispatch events, so idle bot does not run matching at all"""
+    trigger = DispatchTrigger()
+    while True:
+        reasons = await trigger.wait()
+        logger.info(f'Starting deliveries distribution, triggered by {reasons}')
+        try:
+            await distribute_deliveries_task(context)
+        except Exception as e:
+            logger.error(f'Deliveries distribution failed! {e}', exc_info=True)
+
+
+async def start_dispatching_task(context: CallbackContext):
+    trigger = DispatchTrigger()
+    if trigger.bound:
+        return
+    trigger.bind(asyncio.get_running_loop())
+    context.application.create_task(dispatch_deliveries_on_events(context))
+    # deliveries which came before dispatching started have not produced events
+    trigger.notify('start')
+
+
+async def notify_dispatch_periodic_task(context: CallbackContext):
+    DispatchTrigger().notify('fallback')
 
 
 async def check_cancelled_deliveries_periodic_task(context: CallbackContext):
@@ -53,49 +77,70 @@ async def delivery_notification_periodic_task(context: CallbackContext):
         await delivery_time_out_notification(context, delivery)
 
 
+async def collect_speed_metrics(context: CallbackContext):
+    """Task only logs avg couriers speed, it is updated on every completed delivery, and clears those deliveries"""
+    metrics_collector = AvgCourierSpeedProvider()
+    logger.info(
+        f'Avg couriers speed: {DistanceCalculator().avg_courier_speed}, estimate: {metrics_collector.estimate}'
+    )
+    await metrics_collector.clear_completed_deliveries()
+
+
+async def flush_locations_task(context: CallbackContext):
+    await LocationPublisher().flush()
+
+
+DISPATCH_FALLBACK_JOB = ScheduledJob(
+    'dispatch_fallback',
+    notify_dispatch_periodic_task,
+    interval=DispatchTrigger.fallback_interval,
+    first=DispatchTrigger.fallback_interval,
+    jitter=5,
+)
+CANCELLED_DELIVERIES_JOB = ScheduledJob(
+    'check_cancelled_deliveries', check_cancelled_deliveries_periodic_task, interval=5, jitter=0.5
+)
+NOTIFY_COURIERS_JOB = ScheduledJob(
+    'notify_couriers', delivery_notification_periodic_task, interval=10, jitter=1
+)
+AVG_COURIERS_SPEED_JOB = ScheduledJob(
+    'avg_couriers_speed', collect_speed_metrics, interval=360, jitter=30
+)
+FLUSH_LOCATIONS_JOB = ScheduledJob(
+    'flush_locations', flush_locations_task, interval=LocationPublisher.flush_interval
+)
+JOBS = (
+    DISPATCH_FALLBACK_JOB,
+    CANCELLED_DELIVERIES_JOB,
+    NOTIFY_COURIERS_JOB,
+    AVG_COURIERS_SPEED_JOB,
+    FLUSH_LOCATIONS_JOB,
+)
+
+
+async def start_jobs(application: Application) -> None:
+    """Function starts event-driven dispatching and registers periodic jobs, jobs already registered are kept"""
+    application.job_queue.run_once(start_dispatching_task, when=0)
+    registered = Scheduler().schedule_all(application.job_queue, JOBS)
+    logger.info(f'Registered jobs: {registered}')
+
+
 async def job_check_deliveries(update: Update, context: CallbackContext):
-    job_queue = context.job_queue
-    job_queue.run_repeating(distribute_deliveries_periodic_task, interval=5, first=0)
+    context.job_queue.run_once(start_dispatching_task, when=0)
+    Scheduler().schedule(context.job_queue, DISPATCH_FALLBACK_JOB)
 
 
 async def job_check_cancelled_deliveries(update: Update, context: CallbackContext):
-    job_queue = context.job_queue
-    job_queue.run_repeating(
-        check_cancelled_deliveries_periodic_task, interval=5, first=0
-    )
+    Scheduler().schedule(context.job_queue, CANCELLED_DELIVERIES_JOB)
 
 
 async def job_notify_courier(update: Update, context: CallbackContext):
-    job_queue = context.job_queue
-    job_queue.run_repeating(delivery_notification_periodic_task, interval=10, first=0)
-
-
-async def collect_speed_metrics(update):
-    metrics_collector = AvgCourierSpeedProvider()
-    speed = await metrics_collector.get_avg_couriers_speed()
-    logger.warning('CALCULATED AVG COURIERS SPEED: {}'.format(speed))
-    if speed:
-        DistanceCalculator.avg_courier_speed = speed
+    Scheduler().schedule(context.job_queue, NOTIFY_COURIERS_JOB)
 
 
 async def job_get_avg_couriers_speed(update: Update, context: CallbackContext):
-    job_queue = context.job_queue
-    # TODO: CHANGE INTERVAL FOR ABOUT 360 SECS!
-    job_queue.run_repeating(collect_speed_metrics, interval=20, first=0)
+    Scheduler().schedule(context.job_queue, AVG_COURIERS_SPEED_JOB)
 
 
 async def run_jobs(update: Update, context: CallbackContext):
-    jobs = (job_get_avg_couriers_speed,
-            job_notify_courier,
-            job_check_deliveries,
-            job_check_cancelled_deliveries,)
-
-    def between_callback(func, *args):
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(func(*args))
-        loop.close()
-
-    for job in jobs:
-        thread = threading.Thread(target=between_callback, args=(job, update, context,))
-        thread.start()
+    await start_jobs(context.application)
@@ -0,0 +1,65 @@
+import asyncio
+import itertools
+
+import numpy as np
+
+from assignment import UNASSIGNED, solve_assignment
+from schemas.schemas import Delivery
+from utils import DistanceCalculator
+
+
+def brute_force(cost: np.ndarray) -> tuple[int, float]:
+    """Returns max count of allowed pairs and min cost among matchings with that count"""
+    rows, columns = cost.shape
+    best = (0, 0.0)
+    for size in range(min(rows, columns), 0, -1):
+        for chosen_rows in itertools.combinations(range(rows), size):
+            for chosen_columns in itertools.permutations(range(columns), size):
+                values = cost[list(chosen_rows), list(chosen_columns)]
+                if np.isfinite(values).all() and (best[0] < size or values.sum() < best[1]):
+                    best = (size, values.sum())
+        if best[0]:
+            return best
+    return best
+
+
+def matching_quality(cost: np.ndarray, assignment: np.ndarray) -> tuple[int, float]:
+    matched = [(row, column) for row, column in enumerate(assignment) if column != UNASSIGNED]
+    assert len({column for _, column in matched}) == len(matched)
+    return len(matched), sum(cost[row, column] for row, column in matched)
+
+
+def test_solve_assignment_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for rows, columns in [(3, 3), (3, 5), (5, 3), (4, 4)]:
+        for _ in range(20):
+            cost = rng.uniform(0, 10, size=(rows, columns))
+            cost[rng.uniform(size=cost.shape) < 0.3] = np.inf
+            count, total = matching_quality(cost, solve_assignment(cost))
+            expected_count, expected_total = brute_force(cost)
+            assert count == expected_count
+            assert abs(total - expected_total) < 1e-9
+
+
+def test_solve_assignment_beats_greedy_order():
+    # greedy would give the only close courier to the first delivery
+    cost = np.array([[1.0, 2.0], [1.5, np.inf]])
+    assert solve_assignment(cost).tolist() == [1, 0]
+
+
+def test_solve_assignment_empty():
+    assert solve_assignment(np.zeros((2, 0))).tolist() == [UNASSIGNED, UNASSIGNED]
+
+
+def test_solve_assignment_with_candidates_per_row_keeps_cheapest_columns():
+    cost = np.array([[1.0, 5.0, 9.0], [2.0, 1.0, 9.0]])
+    assert solve_assignment(cost, candidates_per_row=1).tolist() == [0, 1]
+
+
+def test_priority_wins_scarce_courier():
+    # long waiting delivery gets the only courier although the other one is a bit closer
+    deliveries = [Delivery(1, 55.75, 37.62, priority=5), Delivery(2, 55.75, 37.62, priority=0)]
+    distances = np.array([[2.0], [1.5]])
+    cost = asyncio.run(DistanceCalculator().get_assignment_cost(deliveries, distances))
+    assert cost[0, 0] < cost[1, 0]
+    assert solve_assignment(cost).tolist() == [0, UNASSIGNED]
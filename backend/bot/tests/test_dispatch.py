@@ -0,0 +1,61 @@
+import asyncio
+import threading
+
+from services.dispatch_service import DispatchTrigger
+
+
+def make_trigger(loop: asyncio.AbstractEventLoop) -> DispatchTrigger:
+    trigger = object.__new__(DispatchTrigger)
+    trigger.__init__()
+    trigger.bind(loop)
+    return trigger
+
+
+def test_burst_of_events_gives_one_pass():
+    async def scenario():
+        trigger = make_trigger(asyncio.get_running_loop())
+        for _ in range(100):
+            trigger.notify('new_delivery')
+        trigger.notify('courier_free')
+        reasons = await trigger.wait()
+        second_wait = asyncio.ensure_future(trigger.wait())
+        await asyncio.sleep(trigger.debounce * 2)
+        assert not second_wait.done()
+        second_wait.cancel()
+        return reasons
+
+    assert asyncio.run(scenario()) == {'new_delivery', 'courier_free'}
+
+
+def test_notify_from_listener_thread():
+    async def scenario():
+        trigger = make_trigger(asyncio.get_running_loop())
+        thread = threading.Thread(target=trigger.notify, args=('new_delivery',))
+        thread.start()
+        thread.join()
+        return await asyncio.wait_for(trigger.wait(), timeout=1)
+
+    assert asyncio.run(scenario()) == {'new_delivery'}
+
+
+def test_events_before_binding_are_dropped():
+    trigger = object.__new__(DispatchTrigger)
+    trigger.__init__()
+    trigger.notify('new_delivery')
+    assert not trigger.bound
+
+
+def test_moving_courier_triggers_pass_once_per_interval():
+    async def scenario():
+        trigger = make_trigger(asyncio.get_running_loop())
+        for _ in range(10):
+            trigger.notify_courier_moved()
+        reasons = await trigger.wait()
+        trigger.notify_courier_moved()
+        assert not trigger._event.is_set()
+        trigger._moved_at -= trigger.moved_interval
+        trigger.notify_courier_moved()
+        assert trigger._event.is_set()
+        return reasons
+
+    assert asyncio.run(scenario()) == {'courier_moved'}
@@ -0,0 +1,50 @@
+import asyncio
+import random
+
+from geofences import CourierGeofences, Geofence, courier_geofences
+from schemas.schemas import Delivery
+from services.delivery_service import DeliveryValidationService
+from spatial import haversine
+
+PICKUP = (55.75, 37.62)
+CONSUMER = (55.77, 37.65)
+
+
+def make_delivery(status: int = 3) -> Delivery:
+    return Delivery(1, *PICKUP, *CONSUMER, courier=7, status=status)
+
+
+def test_planar_fence_agrees_with_haversine():
+    random.seed(0)
+    fence = Geofence.around(*PICKUP, 0.2)
+    for _ in range(1000):
+        lat = PICKUP[0] + random.uniform(-0.004, 0.004)
+        lon = PICKUP[1] + random.uniform(-0.006, 0.006)
+        distance = haversine(*PICKUP, lat, lon)
+        if abs(distance - 0.2) > 0.001:
+            assert fence.contains(lat, lon) == (distance <= 0.2)
+
+
+def test_arrival_is_reported_once_per_stage():
+    fences = CourierGeofences()
+    fences.set_delivery(7, make_delivery(), location=(55.70, 37.60))
+    assert fences.is_on_point(7) is False
+    assert fences.track(7, PICKUP[0] + 0.001, PICKUP[1]) is True
+    assert fences.track(7, *PICKUP) is False
+    assert fences.is_on_point(7) is True
+
+    fences.picked_up(7, PICKUP)
+    assert fences.is_on_point(7) is False
+    assert fences.track(7, *CONSUMER) is True
+
+    fences.remove(7)
+    assert fences.is_on_point(7) is None
+    assert fences.track(7, *CONSUMER) is False
+
+
+def test_validation_uses_known_fence():
+    courier_geofences.set_delivery(7, make_delivery(status=4), location=CONSUMER)
+    try:
+        assert asyncio.run(DeliveryValidationService(7).validate_courier_on_point()) is True
+    finally:
+        courier_geofences.remove(7)
@@ -0,0 +1,56 @@
+import asyncio
+import threading
+
+from kafka_tg.ingestion import IngestionQueue, UpdateKinds, apply_updates
+from schemas.schemas import Courier, Delivery, cancelled_deliveries, couriers, deliveries
+
+
+def make_queue() -> IngestionQueue:
+    queue = object.__new__(IngestionQueue)
+    queue.__init__()
+    return queue
+
+
+def test_updates_from_threads_are_drained_in_batches():
+    async def scenario():
+        queue = make_queue()
+        queue.batch_size = 150
+        queue.put(UpdateKinds.DELIVERY, 'before binding')
+        queue.bind(asyncio.get_running_loop())
+
+        threads = [
+            threading.Thread(
+                target=lambda: [queue.put(UpdateKinds.DELIVERY, i) for i in range(100)]
+            )
+            for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        batches = []
+        while sum(map(len, batches)) < 301:
+            batches.append(await asyncio.wait_for(queue.get_batch(), timeout=1))
+        return batches
+
+    batches = asyncio.run(scenario())
+    assert [len(batch) for batch in batches] == [150, 150, 1]
+    assert batches[0][0] == (UpdateKinds.DELIVERY, 'before binding')
+
+
+def test_apply_updates_changes_storage():
+    updates = [
+        (UpdateKinds.DELIVERY, Delivery(901, 55.75, 37.62)),
+        (UpdateKinds.CANCELLED_DELIVERY, Delivery(901, 55.75, 37.62)),
+        (UpdateKinds.COURIER_PROFILE, Courier(902, 'courier', 'Ivan', 'Ivanov')),
+        (UpdateKinds.COURIER_PROFILE, Courier(902, 'courier', 'Ivan', 'Petrov', balance=10)),
+    ]
+    try:
+        asyncio.run(apply_updates(updates))
+        assert 901 in deliveries and 901 in cancelled_deliveries
+        assert couriers[902].last_name == 'Petrov' and couriers[902].balance == 10
+    finally:
+        deliveries.pop(901, None)
+        cancelled_deliveries.pop(901, None)
+        couriers.pop(902, None)
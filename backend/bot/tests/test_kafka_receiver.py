@@ -0,0 +1,79 @@
+from kafka_common import receiver as receiver_module
+from kafka_common.receiver import KafkaReceiver
+
+
+class FakeMessage:
+
+    def __init__(self, partition: int, offset: int, value: bytes):
+        self._partition = partition
+        self._offset = offset
+        self._value = value
+
+    def partition(self) -> int:
+        return self._partition
+
+    def offset(self) -> int:
+        return self._offset
+
+    def value(self) -> bytes:
+        return self._value
+
+    def error(self):
+        return None
+
+
+class FakeConsumer:
+
+    def __init__(self, config: dict | None = None):
+        self.seeks = []
+
+    def seek(self, partition):
+        self.seeks.append((partition.partition, partition.offset))
+
+
+class FailingReceiver(KafkaReceiver):
+    _topic = 'test-topic'
+
+    def post_consume_action(self, msg: str):
+        if msg == 'fail':
+            raise ValueError('handler failed')
+        self.handled.append(msg)
+
+
+def make_receiver(monkeypatch) -> FailingReceiver:
+    monkeypatch.setattr(receiver_module, 'Consumer', FakeConsumer)
+    receiver = object.__new__(FailingReceiver)
+    receiver.__init__()
+    receiver.handled = []
+    return receiver
+
+
+def committed(offsets) -> dict[int, int]:
+    return {offset.partition: offset.offset for offset in offsets}
+
+
+def test_offset_is_committed_only_up_to_failed_message(monkeypatch):
+    receiver = make_receiver(monkeypatch)
+    messages = [
+        FakeMessage(0, 10, b'a'),
+        FakeMessage(0, 11, b'fail'),
+        FakeMessage(0, 12, b'b'),
+        FakeMessage(1, 5, b'c'),
+    ]
+
+    offsets = receiver._process_batch(messages)
+
+    assert committed(offsets) == {0: 11, 1: 6}
+    assert receiver.consumer.seeks == [(0, 11)]
+    assert sorted(receiver.handled) == ['a', 'c']
+
+
+def test_failed_message_is_skipped_when_attempts_are_out(monkeypatch):
+    receiver = make_receiver(monkeypatch)
+    messages = [FakeMessage(0, 11, b'fail'), FakeMessage(0, 12, b'b')]
+
+    for _ in range(receiver.max_attempts - 1):
+        assert committed(receiver._process_batch(messages)) == {0: 11}
+    assert committed(receiver._process_batch(messages)) == {0: 12}
+    assert committed(receiver._process_batch(messages[1:])) == {0: 13}
+    assert receiver.handled == ['b']
@@ -0,0 +1,39 @@
+import asyncio
+
+from kafka_common.codecs import CourierLocationCodec
+
+from services import location_service
+from services.location_service import LocationPublisher
+
+
+def make_publisher() -> LocationPublisher:
+    publisher = object.__new__(LocationPublisher)
+    publisher.__init__()
+    return publisher
+
+
+def test_small_moves_are_dropped_until_heartbeat():
+    publisher = make_publisher()
+    assert publisher.track(1, 55.75, 37.62, timestamp=0) is True
+    # ~5 meters
+    assert publisher.track(1, 55.75005, 37.62, timestamp=5) is False
+    assert publisher.track(1, 55.75005, 37.62, timestamp=publisher.heartbeat) is True
+    # ~100 meters
+    assert publisher.track(1, 55.751, 37.62, timestamp=publisher.heartbeat + 1) is True
+
+
+def test_flush_sends_latest_location_of_every_courier_in_one_message(monkeypatch):
+    sent = []
+
+    async def send(msg, topic):
+        sent.append(CourierLocationCodec.decode(msg))
+
+    monkeypatch.setattr(location_service, 'async_send_kafka_msg', send)
+    publisher = make_publisher()
+    for step in range(10):
+        for courier_id in range(3):
+            publisher.track(courier_id, 55.75 + step * 0.001, 37.62, timestamp=step)
+
+    assert asyncio.run(publisher.flush()) == 3
+    assert asyncio.run(publisher.flush()) == 0
+    assert sent == [{'locations': [[courier_id, 55.759, 37.62, 9] for courier_id in range(3)]}]
@@ -0,0 +1,59 @@
+import datetime
+
+from schemas.schemas import Delivery
+from services.metrics_service import AvgCourierSpeedProvider, DecayedSpeed
+from utils import DistanceCalculator
+
+
+def make_provider() -> AvgCourierSpeedProvider:
+    provider = object.__new__(AvgCourierSpeedProvider)
+    provider.__init__()
+    return provider
+
+
+def completed_delivery(id: int, distance: float, minutes: float) -> Delivery:
+    completed_at = datetime.datetime(2024, 5, 27, 12, 0)
+    return Delivery(
+        id=id,
+        latitude=0,
+        longitude=0,
+        status=5,
+        distance=distance,
+        started_at=completed_at - datetime.timedelta(minutes=minutes),
+        completed_at=completed_at,
+    )
+
+
+def test_estimate_is_ratio_of_distances_and_times():
+    estimate = DecayedSpeed(half_life=3600)
+    estimate.add(distance=10, hours=1, now=0)
+    estimate.add(distance=5, hours=1, now=0)
+    assert estimate.speed == 7.5
+
+
+def test_old_deliveries_weigh_less():
+    estimate = DecayedSpeed(half_life=3600)
+    estimate.add(distance=10, hours=1, now=0)
+    estimate.add(distance=20, hours=1, now=3600)
+    # first delivery weight is halved: (5 + 20) / (0.5 + 1)
+    assert abs(estimate.speed - 25 / 1.5) < 1e-9
+
+
+def test_completed_delivery_updates_calculator_speed():
+    calculator = DistanceCalculator()
+    default_speed = calculator.avg_courier_speed
+    provider = make_provider()
+    try:
+        assert provider.record_delivery(completed_delivery(1, distance=2, minutes=6)) is None
+        assert calculator.avg_courier_speed == default_speed
+        speed = provider.record_delivery(completed_delivery(2, distance=4, minutes=12))
+        assert abs(speed - 20) < 1e-6
+        assert calculator.avg_courier_speed == speed
+    finally:
+        calculator.avg_courier_speed = default_speed
+
+
+def test_delivery_without_distance_is_skipped():
+    provider = make_provider()
+    assert provider.record_delivery(completed_delivery(1, distance=0, minutes=30)) is None
+    assert provider.estimate.hours == 0
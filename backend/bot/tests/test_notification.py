@@ -0,0 +1,46 @@
+import asyncio
+import datetime
+
+from schemas.schemas import Courier, Delivery, Location, couriers, deliveries
+from services.notification_service import NotificationService
+
+
+def make_service(batch_mode: bool) -> NotificationService:
+    service = object.__new__(NotificationService)
+    service.__init__()
+    service.batch_mode = batch_mode
+    return service
+
+
+def fill_storage() -> None:
+    now = datetime.datetime.now()
+    deliveries.clear()
+    couriers.clear()
+    for courier_id in range(4):
+        couriers[courier_id] = Courier(
+            courier_id, 'username', 'first', 'last', Location(55.75, 37.62 + courier_id * 0.01), busy=True
+        )
+    # every courier has ~4.5 km left, which takes ~27 minutes with default 10 km/h
+    route = dict(latitude=55.77, longitude=37.62, consumer_latitude=55.79, consumer_longitude=37.62)
+    for delivery_id, status, minutes in [(1, 3, 60), (2, 3, 10), (3, 4, 30), (4, 4, -1)]:
+        deliveries[delivery_id] = Delivery(
+            delivery_id,
+            courier=delivery_id - 1,
+            status=status,
+            estimated_time=now + datetime.timedelta(minutes=minutes),
+            **route,
+        )
+
+
+def test_batch_mode_gives_same_sets_as_one_by_one():
+    results = []
+    try:
+        for batch_mode in (False, True):
+            fill_storage()
+            to_notify, time_out = asyncio.run(make_service(batch_mode).distribute_notifications())
+            results.append(([d.id for d in to_notify], [d.id for d in time_out]))
+    finally:
+        deliveries.clear()
+        couriers.clear()
+
+    assert results[0] == results[1] == ([2], [4])
@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+from telegram.error import RetryAfter
+
+from outbox import TelegramOutbox, TokenBucket
+
+
+class RecordingBot:
+    def __init__(self, delay: float = 0, flood_waits: int = 0):
+        self.delay = delay
+        self.flood_waits = flood_waits
+        self.sent: list[tuple[int, str, float]] = []
+
+    async def send_message(self, chat_id: int, text: str):
+        if self.flood_waits:
+            self.flood_waits -= 1
+            raise RetryAfter(0)
+        await asyncio.sleep(self.delay)
+        self.sent.append((chat_id, text, time.monotonic()))
+
+
+def make_outbox(**settings) -> TelegramOutbox:
+    outbox = object.__new__(TelegramOutbox)
+    for name, value in settings.items():
+        setattr(outbox, name, value)
+    outbox.__init__()
+    return outbox
+
+
+async def drain(outbox: TelegramOutbox, timeout: float = 2) -> None:
+    deadline = time.monotonic() + timeout
+    while len(outbox) and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+
+
+def test_bucket_delays_sends_over_rate():
+    bucket = TokenBucket(rate=10, capacity=2)
+    now = bucket.updated_at
+    delays = [bucket.reserve(now) for _ in range(4)]
+    assert [round(delay, 6) for delay in delays] == [0, 0, 0.1, 0.2]
+    assert bucket.reserve(now + 1) == 0
+
+
+def test_chats_are_sent_concurrently_and_in_order():
+    bot = RecordingBot(delay=0.05)
+
+    async def scenario():
+        outbox = make_outbox(chat_rate=1000, chat_burst=100, rate=1000)
+        outbox.start(bot)
+        started = time.monotonic()
+        for number in range(5):
+            for chat_id in range(8):
+                outbox.send(chat_id, text=str(number))
+        await drain(outbox)
+        return time.monotonic() - started, outbox
+
+    elapsed, outbox = asyncio.run(scenario())
+    assert outbox.metrics.sent == 40
+    # 8 chats by 5 sequential messages of 50 ms each, chats go in parallel
+    assert elapsed < 0.05 * 40 / 2
+    for chat_id in range(8):
+        assert [text for chat, text, _ in bot.sent if chat == chat_id] == ['0', '1', '2', '3', '4']
+
+
+def test_flood_wait_is_retried():
+    bot = RecordingBot(flood_waits=2)
+
+    async def scenario():
+        outbox = make_outbox()
+        outbox.send(1, text='before start')
+        outbox.start(bot)
+        await drain(outbox)
+        return outbox
+
+    outbox = asyncio.run(scenario())
+    assert [text for _, text, _ in bot.sent] == ['before start']
+    assert outbox.metrics.retries == 2
+    assert outbox.metrics.failed == 0
+
+
+def test_buckets_of_idle_chats_are_pruned():
+    async def scenario():
+        outbox = make_outbox(chat_rate=100, prune_interval=0.05)
+        bot = RecordingBot()
+        outbox.start(bot)
+        for chat_id in range(20):
+            outbox.send(chat_id, text='hi')
+        await drain(outbox)
+        assert len(outbox._chat_buckets) == 20
+        await asyncio.sleep(0.1)
+        outbox.send(100, text='hi')
+        await drain(outbox)
+        return outbox._chat_buckets
+
+    assert list(asyncio.run(scenario())) == [100]
@@ -0,0 +1,86 @@
+import asyncio
+
+import numpy as np
+
+from repository.abc_repository import DictRepositoryImpl
+from repository.courier_repository import CourierRepository
+from schemas.schemas import Courier, Delivery
+from schemas.storage import IndexedStorage
+
+
+def make_repository(indexed_fields: tuple[str, ...]) -> DictRepositoryImpl:
+    repository = DictRepositoryImpl()
+    repository.source = IndexedStorage(indexed_fields=indexed_fields)
+    return repository
+
+
+def test_get_by_kwargs_uses_index_and_checks_other_kwargs():
+    repository = make_repository(('status', 'courier'))
+    for delivery_id in range(10):
+        asyncio.run(repository.add(Delivery(
+            delivery_id, 55.75, 37.62, 55.76, 37.63, courier=delivery_id % 2, status=delivery_id % 3,
+        )))
+
+    assert [d.id for d in asyncio.run(repository.get_by_kwargs(status=1))] == [1, 4, 7]
+    assert [d.id for d in asyncio.run(repository.get_by_kwargs(status=1, courier=0))] == [4]
+    assert [d.id for d in asyncio.run(repository.get_by_kwargs(status=1, latitude=55.75))] == [1, 4, 7]
+    assert asyncio.run(repository.get_by_kwargs(status=42)) == []
+
+
+def test_update_and_delete_keep_index_consistent():
+    repository = make_repository(('busy',))
+    for courier_id in range(3):
+        asyncio.run(repository.add(Courier(courier_id, f'courier{courier_id}', 'Ivan', 'Ivanov')))
+
+    asyncio.run(repository.update(1, busy=True))
+    assert [c.id for c in asyncio.run(repository.get_by_kwargs(busy=False))] == [0, 2]
+    assert [c.id for c in asyncio.run(repository.get_by_kwargs(busy=True))] == [1]
+
+    asyncio.run(repository.delete(1))
+    assert asyncio.run(repository.get_by_kwargs(busy=True)) == []
+
+
+def test_storage_reindexes_objects_changed_in_place():
+    storage = IndexedStorage(indexed_fields=('status',))
+    storage[1] = Delivery(1, 55.75, 37.62, 55.76, 37.63, status=1)
+    storage[1].status = 3
+
+    assert storage.lookup('status', 1) == [1]
+    storage.reindex(1)
+    assert storage.lookup('status', 1) == []
+    assert storage.lookup('status', 3) == [1]
+
+    storage[1] = Delivery(1, 55.75, 37.62, 55.76, 37.63, status=4)
+    assert storage.lookup('status', 3) == []
+    storage.pop(1)
+    assert storage.lookup('status', 4) == [] and not storage
+
+
+def test_lock_courier_only_once():
+    repository = CourierRepository()
+    repository.source = IndexedStorage(indexed_fields=('busy',))
+    asyncio.run(repository.add(Courier(1, 'courier1', 'Ivan', 'Ivanov')))
+
+    assert asyncio.run(repository.lock_courier(1)).busy is True
+    assert asyncio.run(repository.lock_courier(1)) is None
+    assert asyncio.run(repository.get_free_couriers()) == []
+
+    assert asyncio.run(repository.unlock_courier(1)).busy is False
+    assert asyncio.run(repository.unlock_courier(1)) is None
+
+
+def test_column_store_follows_storage_writes():
+    storage = IndexedStorage(indexed_fields=('status',), column_fields=('latitude', 'status', 'estimated_time'))
+    for delivery_id in range(3):
+        storage[delivery_id] = Delivery(delivery_id, 55.0 + delivery_id, 37.62, status=1)
+
+    assert storage.columns.take([2, 0, 42], 'latitude', 'status')[:2].tolist() == [[57.0, 1.0], [55.0, 1.0]]
+    assert np.isnan(storage.columns.take([42], 'latitude')).all()
+
+    storage[1].status = 3
+    storage.reindex(1)
+    storage.pop(0)
+    storage[5] = Delivery(5, 60.0, 37.62)
+    assert storage.columns.take([1, 5], 'status', 'latitude').tolist() == [[3.0, 56.0], [1.0, 60.0]]
+    assert np.isnan(storage.columns.take([5], 'estimated_time')).all()
+    assert len(storage.columns) == 3
@@ -0,0 +1,59 @@
+import asyncio
+
+from telegram.ext import Application
+
+from scheduler import JobMetrics, ScheduledJob, Scheduler
+
+
+def make_scheduler() -> Scheduler:
+    scheduler = object.__new__(Scheduler)
+    scheduler.__init__()
+    return scheduler
+
+
+def test_overlapping_run_is_skipped_and_measured():
+    calls = []
+
+    async def slow_job(context):
+        calls.append(context)
+        await asyncio.sleep(0.05)
+
+    scheduler = make_scheduler()
+    job = ScheduledJob('slow', slow_job, interval=1)
+    scheduler.metrics['slow'] = metrics = JobMetrics()
+    run = scheduler._guarded(job)
+
+    async def scenario():
+        await asyncio.gather(run('first'), run('second'))
+        await run('third')
+
+    asyncio.run(scenario())
+    assert calls == ['first', 'third']
+    assert metrics.runs == 2 and metrics.skipped == 1
+    assert metrics.max_duration >= 0.05
+
+
+def test_failed_run_is_counted():
+    async def broken_job(context):
+        raise ValueError('broken')
+
+    scheduler = make_scheduler()
+    job = ScheduledJob('broken', broken_job, interval=1)
+    scheduler.metrics['broken'] = JobMetrics()
+    asyncio.run(scheduler._guarded(job)(None))
+    assert scheduler.metrics['broken'].failures == 1
+
+
+def test_job_is_registered_once_with_jitter():
+    async def job_callback(context):
+        pass
+
+    application = Application.builder().token('123:TEST').build()
+    scheduler = make_scheduler()
+    job = ScheduledJob('periodic', job_callback, interval=10, jitter=2)
+
+    assert scheduler.schedule(application.job_queue, job) is True
+    assert scheduler.schedule(application.job_queue, job) is False
+    jobs = application.job_queue.get_jobs_by_name('periodic')
+    assert len(jobs) == 1
+    assert jobs[0].job.trigger.jitter == 2
@@ -0,0 +1,97 @@
+import asyncio
+import random
+
+import utils
+from schemas.schemas import Courier, Delivery, Location, couriers, deliveries
+from services.delivery_service import DeliveryService
+from spatial import CourierSpatialIndex, couriers_index, haversine
+
+
+def test_haversine_known_distance():
+    # Moscow Kremlin - Saint Petersburg Palace Square
+    assert abs(haversine(55.7520, 37.6175, 59.9390, 30.3158) - 634) < 2
+
+
+def test_within_radius_matches_brute_force():
+    random.seed(1)
+    index = CourierSpatialIndex(cell_size_km=1)
+    points = {
+        courier_id: (55.75 + random.uniform(-0.2, 0.2), 37.62 + random.uniform(-0.3, 0.3))
+        for courier_id in range(500)
+    }
+    for courier_id, (lat, lon) in points.items():
+        index.update(courier_id, lat, lon)
+
+    found = index.within_radius(55.75, 37.62, 5)
+    expected = sorted(
+        courier_id
+        for courier_id, (lat, lon) in points.items()
+        if haversine(55.75, 37.62, lat, lon) <= 5
+    )
+    assert sorted(courier_id for courier_id, _ in found) == expected
+    assert [distance for _, distance in found] == sorted(distance for _, distance in found)
+
+
+def test_update_moves_courier_between_cells_and_remove():
+    index = CourierSpatialIndex(cell_size_km=1)
+    index.update(1, 55.75, 37.62)
+    index.update(1, 55.95, 37.62)
+
+    assert index.within_radius(55.75, 37.62, 1) == []
+    assert index.location(1) == (55.95, 37.62)
+
+    index.remove(1)
+    assert 1 not in index
+    assert index.nearest(55.95, 37.62) == []
+
+
+def test_nearest_respects_max_radius():
+    index = CourierSpatialIndex(cell_size_km=1)
+    index.update(1, 55.75, 37.62)
+    index.update(2, 55.80, 37.62)
+
+    assert [courier_id for courier_id, _ in index.nearest(55.751, 37.62, k=2)] == [1, 2]
+    assert [courier_id for courier_id, _ in index.nearest(55.751, 37.62, k=2, max_radius_km=1)] == [1]
+
+
+def test_index_wraps_antimeridian():
+    index = CourierSpatialIndex(cell_size_km=1)
+    index.update(1, 64.0, 179.999)
+
+    assert [courier_id for courier_id, _ in index.within_radius(64.0, -179.999, 1)] == [1]
+
+
+def test_distribution_builds_matrix_only_for_couriers_in_range(monkeypatch):
+    built_for = []
+
+    class RecordingMatrix(utils.DeliveryDistanceMatrix):
+        def __init__(self, deliveries_, couriers_, route_points=None):
+            built_for.append({courier.id for courier in couriers_})
+            super().__init__(deliveries_, couriers_, route_points)
+
+    async def assign(self, delivery, search):
+        return search
+
+    monkeypatch.setattr(utils, 'DeliveryDistanceMatrix', RecordingMatrix)
+    monkeypatch.setattr(DeliveryService, '_assign_delivery', assign)
+    couriers.clear()
+    deliveries.clear()
+    # working range is 5 km, so couriers farther than 10 km from pickup can not be assigned
+    for courier_id, lat in [(1, 55.76), (2, 55.78), (3, 56.00), (4, 56.50)]:
+        couriers[courier_id] = Courier(courier_id, 'username', 'first', 'last', Location(lat, 37.62))
+        couriers_index.update(courier_id, lat, 37.62)
+    deliveries[1] = Delivery(1, 55.75, 37.62, 55.76, 37.63, status=1)
+
+    async def scenario():
+        return [search async for search in await DeliveryService().start_delivering()]
+
+    try:
+        searches = asyncio.run(scenario())
+    finally:
+        for courier_id in range(1, 5):
+            couriers_index.remove(courier_id)
+        couriers.clear()
+        deliveries.clear()
+
+    assert built_for == [{1, 2}]
+    assert searches[0]['courier'].id == 1
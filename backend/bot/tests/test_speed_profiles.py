@@ -0,0 +1,57 @@
+import asyncio
+
+import numpy as np
+
+from schemas.schemas import Courier, Delivery
+from spatial import KM_PER_DEGREE
+from speed_profiles import CourierSpeedProfiles
+from utils import DistanceCalculator
+
+# one minute of moving north at 20 km/h
+STEP_DEGREES = 20 / 60 / KM_PER_DEGREE
+
+
+def drive(profiles: CourierSpeedProfiles, courier_id: int, minutes: int, delivering: bool = True) -> None:
+    for minute in range(minutes + 1):
+        profiles.track(courier_id, minute * STEP_DEGREES, 0, minute * 60.0, delivering)
+
+
+def test_speed_is_learned_from_busy_courier_fixes():
+    profiles = CourierSpeedProfiles()
+    drive(profiles, 1, minutes=10)
+    assert abs(profiles.speed(1) - 20) < 0.1
+
+
+def test_cold_start_and_free_courier_give_no_speed():
+    profiles = CourierSpeedProfiles()
+    drive(profiles, 1, minutes=2)
+    drive(profiles, 2, minutes=10, delivering=False)
+    assert profiles.speed(1) is None
+    assert profiles.speed(2) is None
+    assert profiles.speed(3) is None
+
+
+def test_gps_jump_is_skipped():
+    profiles = CourierSpeedProfiles()
+    drive(profiles, 1, minutes=10)
+    profiles.track(1, 1, 0, 11 * 60.0, True)
+    assert abs(profiles.speed(1) - 20) < 0.1
+
+
+def test_assignment_cost_uses_courier_speed():
+    calculator = DistanceCalculator()
+    profiles = CourierSpeedProfiles()
+    drive(profiles, 1, minutes=10)
+    couriers = [
+        Courier(id=1, username='fast', first_name='', last_name=''),
+        Courier(id=2, username='new', first_name='', last_name=''),
+    ]
+    deliveries = [Delivery(id=1, latitude=0, longitude=0)]
+    default_profiles, calculator.speed_profiles = calculator.speed_profiles, profiles
+    try:
+        cost = asyncio.run(calculator.get_assignment_cost(deliveries, np.array([[2.0, 2.0]]), couriers))
+    finally:
+        calculator.speed_profiles = default_profiles
+    waiting = calculator.waiting_time * 60
+    assert abs(cost[0, 0] - (6 + waiting)) < 0.1
+    assert abs(cost[0, 1] - (2 / calculator.avg_courier_speed * 60 + waiting)) < 1e-9
@@ -1,16 +1,26 @@
 import datetime
 import logging
 
+import numpy as np
+from assignment import UNASSIGNED, solve_assignment
+from distance_engine import DeliveryDistanceMatrix
 from geopy import distance
 from kafka_common.receiver import SingletonMixin
 from schemas.schemas import Courier, Delivery, Location
+from spatial import couriers_index
+from speed_profiles import courier_speed_profiles
 
 
 class DistanceCalculator(SingletonMixin):
     earth_radius = 6371
+    courier_index = couriers_index
+    speed_profiles = courier_speed_profiles
     __working_range = 5
     __avg_courier_speed: float = 10  # should be in km/h
     __waiting_time = 0.05  # should be in hours
+    geodesic_candidates = 3  # nearest couriers of each delivery which distances are refined with geodesic
+    priority_weight = 0.5  # how much each priority point lowers cost of delivery, so long waiting ones go first
+    assignment_candidates = 20  # cheapest couriers of each delivery passed to the matching solver
 
     @property
     def avg_courier_speed(self):
@@ -20,6 +30,14 @@ class DistanceCalculator(SingletonMixin):
     def avg_courier_speed(self, value):
         self.__avg_courier_speed = value
 
+    def get_courier_speed(self, courier_id: int | None = None) -> float:
+        """Method returns speed learned from courier locations, avg couriers speed until it is learned"""
+        if courier_id is not None:
+            speed = self.speed_profiles.speed(courier_id)
+            if speed:
+                return speed
+        return self.avg_courier_speed
+
     @property
     def waiting_time(self) -> float:
         return self.__waiting_time
@@ -36,57 +54,120 @@ class DistanceCalculator(SingletonMixin):
     def working_range(self, value: float) -> None:
         self.__working_range = value
 
-    async def get_courier_etime_distance(
-            self,
-            pickup_point: Location,
-            consumer_point: Location,
-            free_couriers: list[Courier],
-            priority: int,
-    ) -> tuple[Courier, float, float] | tuple[None, None, None]:
-        """Method to search courier depending on his distance from passed point"""
-        nearest_distance = float('inf')
-        optimal_courier = None
-        for courier in free_couriers:
-            courier_distance = await self.calculate_distance(
-                courier.location, pickup_point, consumer_point
-            )
-            if courier_distance <= self.working_range * 2:  # noqa
-                nearest_distance = courier_distance
-                optimal_courier = courier
-
-            estimated_time = await self.get_estimated_delivery_time(nearest_distance)
-            return optimal_courier, estimated_time, nearest_distance
-        return None, None, None
-
-    async def get_estimated_delivery_time(self, distance: float) -> float:
-        """Method to calculate estimated delivering time based on distance and avg couriers speed"""
+    async def get_estimated_delivery_time(self, distance: float, courier_id: int | None = None) -> float:
+        """Method to calculate estimated delivering time based on distance and speed of the courier"""
         estimated_time_minutes = (
-            (distance / self.avg_courier_speed) + self.waiting_time
+            (distance / self.get_courier_speed(courier_id)) + self.waiting_time
         ) * 60
         return estimated_time_minutes
 
-    async def get_nearest_free_courier(
-            self, delivery: Delivery, free_couriers: list[Courier] | None
-    ) -> dict[str, bool | Courier]:
-        if free_couriers:
-            courier, estimated_time, distance = await self.get_courier_etime_distance(
-                pickup_point=Location(delivery.latitude, delivery.longitude),
-                consumer_point=Location(
-                    delivery.consumer_latitude, delivery.consumer_longitude
-                ),
-                free_couriers=free_couriers,
-                priority=delivery.priority,
-            )
-            if courier:
-                delivery.estimated_time = datetime.datetime.now() + datetime.timedelta(
-                    minutes=estimated_time)  # type: ignore
-                delivery.distance = distance
-                return {'success': True, 'courier': courier}
-            delivery.priority += 1
-        return {
-            'success': False,
-            'msg': 'There are no couriers available in current max-range radius',
-        }
+    def get_couriers_in_range(self, deliveries: list[Delivery], couriers: list[Courier]) -> list[Courier]:
+        """
+        Method keeps couriers which spatial index finds within max distance of some pickup point, so distance matrix
+        is built only for couriers near pending deliveries. Farther ones would get inf cost anyway
+        """
+        max_distance = self.working_range * 2
+        in_range = set()
+        for delivery in deliveries:
+            nearby = self.courier_index.within_radius(delivery.latitude, delivery.longitude, max_distance)
+            in_range.update(courier_id for courier_id, _ in nearby)
+        return [courier for courier in couriers if courier.id in in_range]
+
+    async def get_nearest_free_couriers(
+            self,
+            deliveries: list[Delivery],
+            free_couriers: list[Courier],
+            route_points: np.ndarray | None = None,
+    ) -> list[dict[str, bool | Courier]]:
+        """
+        Greedy distribution for the whole tick. Distances for all deliveries and couriers in range are calculated at
+        once, then every delivery in its order takes the nearest courier not taken yet
+        """
+        candidates = self.get_couriers_in_range(deliveries, free_couriers)
+        max_distance = self.working_range * 2
+        taken = np.zeros(len(candidates), dtype=bool)
+        if candidates:
+            matrix = DeliveryDistanceMatrix(deliveries, candidates, route_points)
+            matrix.refine(self.geodesic_candidates)
+
+        results = []
+        for row, delivery in enumerate(deliveries):
+            if candidates:
+                distances = np.where(taken, np.inf, matrix.total[row])
+                column = int(np.argmin(distances))
+                if distances[column] <= max_distance:
+                    taken[column] = True
+                    await self._set_delivery_estimation(
+                        delivery, float(distances[column]), candidates[column].id
+                    )
+                    results.append({'success': True, 'courier': candidates[column]})
+                    continue
+                delivery.priority += 1
+            results.append({
+                'success': False,
+                'msg': 'There are no couriers available in current max-range radius',
+            })
+        return results
+
+    async def get_assigned_free_couriers(
+            self,
+            deliveries: list[Delivery],
+            free_couriers: list[Courier],
+            route_points: np.ndarray | None = None,
+    ) -> list[dict[str, bool | Courier]]:
+        """
+        Global version of get_nearest_free_couriers: couriers are assigned by min-cost bipartite matching where cost
+        is estimated delivery time divided by delivery priority weight, so early delivery can not take the only
+        courier which is close to the later one, and deliveries which waited longer win when couriers are scarce
+        """
+        candidates = self.get_couriers_in_range(deliveries, free_couriers)
+        assignment = np.full(len(deliveries), UNASSIGNED, dtype=int)
+        if candidates:
+            matrix = DeliveryDistanceMatrix(deliveries, candidates, route_points)
+            matrix.refine(self.geodesic_candidates)
+            cost = await self.get_assignment_cost(deliveries, matrix.total, candidates)
+            assignment = solve_assignment(cost, self.assignment_candidates)
+
+        results = []
+        for row, delivery in enumerate(deliveries):
+            column = assignment[row]
+            if column != UNASSIGNED:
+                await self._set_delivery_estimation(
+                    delivery, float(matrix.total[row, column]), candidates[column].id
+                )
+                results.append({'success': True, 'courier': candidates[column]})
+                continue
+            if free_couriers:
+                delivery.priority += 1
+            results.append({
+                'success': False,
+                'msg': 'There are no couriers available in current max-range radius',
+            })
+        return results
+
+    async def get_assignment_cost(
+            self, deliveries: list[Delivery], distances: np.ndarray, couriers: list[Courier] | None = None
+    ) -> np.ndarray:
+        """Method converts route distances to estimated minutes lowered by priority, out of range pairs are inf"""
+        if couriers is None:
+            speeds = self.avg_courier_speed
+        else:
+            speeds = np.array([self.get_courier_speed(courier.id) for courier in couriers], dtype=float)
+        estimated_minutes = (distances / speeds + self.waiting_time) * 60
+        weights = 1 + self.priority_weight * np.array(
+            [delivery.priority for delivery in deliveries], dtype=float
+        )
+        cost = estimated_minutes / weights[:, None]
+        cost[distances > self.working_range * 2] = np.inf
+        return cost
+
+    async def _set_delivery_estimation(
+            self, delivery: Delivery, distance: float, courier_id: int | None = None
+    ) -> None:
+        estimated_time = await self.get_estimated_delivery_time(distance, courier_id)
+        delivery.estimated_time = datetime.datetime.now() + datetime.timedelta(
+            minutes=estimated_time)  # type: ignore
+        delivery.distance = distance
 
     async def calculate_distance(self, *points: Location) -> float:
         total_distance = 0
@@ -94,5 +175,5 @@ class DistanceCalculator(SingletonMixin):
             total_distance += distance.distance(
                 (points[i - 1].lat, points[i - 1].lon), (points[i].lat, points[i].lon)
             ).kilometers
-        logging.error(f'CALCULATED DISTANCE BETWEEN POINTS IS {total_distance}')
+        logging.debug(f'CALCULATED DISTANCE BETWEEN POINTS IS {total_distance}')
         return total_distance
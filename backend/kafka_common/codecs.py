@@ -0,0 +1,111 @@
+import datetime
+import struct
+from decimal import Decimal
+
+import msgpack
+
+_DATETIME_EXT_CODE = 1
+_EPOCH = datetime.datetime(1970, 1, 1)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def _pack_default(obj):
+    if isinstance(obj, datetime.datetime):
+        # naive datetimes are used on both sides, so they are packed as microseconds from naive epoch
+        microseconds = (obj.replace(tzinfo=None) - _EPOCH) // _MICROSECOND
+        return msgpack.ExtType(_DATETIME_EXT_CODE, struct.pack('>q', microseconds))
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f'Can not pack object of type {type(obj)}')
+
+
+def _unpack_ext_hook(code: int, data: bytes):
+    if code == _DATETIME_EXT_CODE:
+        return _EPOCH + datetime.timedelta(microseconds=struct.unpack('>q', data)[0])
+    return msgpack.ExtType(code, data)
+
+
+def pack(value) -> bytes:
+    """Function packs single value with the same datetime and decimal handling as messages"""
+    return msgpack.packb(value, default=_pack_default)
+
+
+def unpack(payload: bytes):
+    return msgpack.unpackb(payload, ext_hook=_unpack_ext_hook)
+
+
+class MessageCodec:
+    """
+    Versioned msgpack codec for inter-service messages. Message is packed as array [version, *values] where values
+    go in order of schema fields, so field names are never sent over the wire
+    """
+    schemas: dict[int, tuple[str, ...]]
+    version: int
+    fields: tuple[str, ...]
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.version = max(cls.schemas)
+        cls.fields = cls.schemas[cls.version]
+
+    @classmethod
+    def encode(cls, obj) -> bytes:
+        """Method takes dict, dataclass or model and packs its schema fields, missing fields are packed as None"""
+        if isinstance(obj, dict):
+            values = [obj.get(field) for field in cls.fields]
+        else:
+            values = [getattr(obj, field, None) for field in cls.fields]
+        return pack([cls.version, *values])
+
+    @classmethod
+    def decode(cls, payload: bytes) -> dict:
+        version, *values = unpack(payload)
+        fields = cls.schemas.get(version)
+        if fields is None:
+            raise ValueError(f'Unknown {cls.__name__} message version {version}!')
+        return dict(zip(fields, values))
+
+
+class DeliveryCodec(MessageCodec):
+    schemas = {
+        1: (
+            'id',
+            'latitude',
+            'longitude',
+            'consumer_latitude',
+            'consumer_longitude',
+            'courier',
+            'amount',
+            'status',
+            'started_at',
+            'completed_at',
+            'address',
+            'priority',
+            'estimated_time',
+            'distance',
+        ),
+    }
+
+
+class CourierCodec(MessageCodec):
+    schemas = {
+        1: (
+            'id',
+            'username',
+            'first_name',
+            'last_name',
+            'busy',
+            'current_delivery_id',
+            'done_deliveries',
+            'balance',
+            'rank',
+        ),
+    }
+
+
+class CourierLocationCodec(MessageCodec):
+    schemas = {
+        1: ('courier_id', 'lat', 'lon'),
+        # batch of coalesced locations, every one is [courier_id, lat, lon, timestamp]
+        2: ('locations',),
+    }
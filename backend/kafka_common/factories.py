@@ -1,21 +1,36 @@
-from kafka_common.sender import KafkaSender
+import asyncio
+
+from kafka_common.sender import AsyncKafkaSender, KafkaSender
+
+_senders: dict[str, KafkaSender] = {}
+_async_senders: dict[str, AsyncKafkaSender] = {}
 
 
 def producer_factory(topic: str) -> KafkaSender:
-    sender = KafkaSender(topic)
+    sender = _senders.get(topic)
+    if sender is None:
+        sender = _senders.setdefault(topic, KafkaSender(topic))
     return sender
 
 
-async def async_send_kafka_msg(msg: str, topic: str) -> None:
-    if isinstance(msg, str) and isinstance(topic, str):
-        producer = producer_factory(topic)
-        producer.send(msg)
+def async_producer_factory(topic: str) -> AsyncKafkaSender:
+    sender = _async_senders.get(topic)
+    if sender is None:
+        sender = _async_senders.setdefault(topic, AsyncKafkaSender(topic))
+    return sender
+
+
+async def async_send_kafka_msg(msg: str | bytes, topic: str) -> asyncio.Future:
+    """Enqueues message without blocking event loop, returned future may be awaited to wait for delivery"""
+    if isinstance(msg, (str, bytes)) and isinstance(topic, str):
+        producer = async_producer_factory(topic)
+        return await producer.send(msg)
     else:
         raise ValueError('Invalid message type for kafka producer!')
 
 
-def send_kafka_msg(msg: str, topic: str) -> None:
-    if isinstance(msg, str) and isinstance(topic, str):
+def send_kafka_msg(msg: str | bytes, topic: str) -> None:
+    if isinstance(msg, (str, bytes)) and isinstance(topic, str):
         producer = producer_factory(topic)
         producer.send(msg)
     else:
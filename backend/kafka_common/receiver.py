@@ -1,9 +1,12 @@
 import logging
 import threading
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, wait
 from os import getenv
 
-from confluent_kafka import Consumer
+from confluent_kafka import Consumer, Message, TopicPartition
+
+from kafka_common.codecs import MessageCodec
 
 
 class SingletonMixin:
@@ -19,44 +22,159 @@ class SingletonMixin:
 class KafkaReceiver(ABC, SingletonMixin):
     _thread = None
     _topic: str
+    codec: type[MessageCodec] | None = None
+    group_id: str | None = None
+    assignment_strategy: str = 'cooperative-sticky'
+    partitions: list[int] | None = None
+    processes: int = 1
+    batch_size: int = 100
+    batch_timeout: float = 1.0
+    workers: int = 1
+    max_attempts: int = 3  # failed message is consumed again until it is handled or attempts are out
 
-    def __init__(self):
-        self.consumer = Consumer(
-            {
-                'bootstrap.servers': f'{getenv("KAFKA_HOST")}:{getenv("KAFKA_PORT")}',
-                'group.id': 'my-consumer-group',
-                'auto.offset.reset': 'earliest',
-            }
+    def __init__(self, partitions: list[int] | None = None):
+        if getattr(self, 'consumer', None) is not None:
+            # SingletonMixin calls __init__ once more on the already initialized instance
+            return
+        if partitions is not None:
+            self.partitions = partitions
+        self.consumer = Consumer(self.get_consumer_config())
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix=f'{self._topic}-worker'
         )
         self.logger = logging.getLogger(
             name=f'Consumer of topic: {self._topic.upper()}'
         )
+        self._attempts: dict[int, tuple[int, int]] = {}  # partition: (offset of failed message, attempts)
+
+    @classmethod
+    def get_group_id(cls) -> str:
+        return cls.group_id or f'{cls._topic}-consumer-group'
+
+    @classmethod
+    def get_consumer_config(cls) -> dict:
+        return {
+            'bootstrap.servers': f'{getenv("KAFKA_HOST")}:{getenv("KAFKA_PORT")}',
+            'group.id': cls.get_group_id(),
+            'auto.offset.reset': 'earliest',
+            'enable.auto.commit': False,
+            'partition.assignment.strategy': cls.assignment_strategy,
+        }
+
+    @classmethod
+    def get_partitions_count(cls, timeout: float = 10.0) -> int:
+        """Method asks broker for number of partitions of receivers topic"""
+        consumer = Consumer(cls.get_consumer_config())
+        try:
+            topic = consumer.list_topics(cls._topic, timeout=timeout).topics[cls._topic]
+            return len(topic.partitions) or 1
+        finally:
+            consumer.close()
+
+    def _handle_message(self, message: Message) -> bool:
+        """Method returns False if message must be consumed again, message which can not be decoded is skipped"""
+        try:
+            if self.codec is not None:
+                msg = self.codec.decode(message.value())
+            else:
+                msg = message.value().decode('utf-8')
+        except Exception as e:
+            self.logger.error(
+                f'Could not decode message {message.offset()} of partition {message.partition()}! {e}'
+            )
+            return True
+        try:
+            self.logger.debug(f'Got incoming message {msg} with topic: {self._topic}!')
+            self.post_consume_action(msg)
+        except Exception as e:
+            self.logger.error(
+                f'Could not complete post consume action! {e}', exc_info=True
+            )
+            return False
+        return True
+
+    def _handle_partition_batch(self, messages: list[Message]) -> Message | None:
+        """
+        Messages of one partition are handled sequentially so per-key order is preserved. Handling stops on the
+        first failed message, it is returned
+        """
+        for message in messages:
+            if not self._handle_message(message):
+                return message
+        return None
+
+    def _next_offset(self, failed: Message) -> int:
+        """Method returns offset to consume the partition from after failure, message is skipped when attempts are out"""
+        partition, offset = failed.partition(), failed.offset()
+        failed_offset, attempts = self._attempts.get(partition, (offset, 0))
+        attempts = attempts + 1 if failed_offset == offset else 1
+        if attempts >= self.max_attempts:
+            self.logger.error(f'Message {offset} of partition {partition} is dropped after {attempts} attempts!')
+            self._attempts.pop(partition, None)
+            return offset + 1
+        self._attempts[partition] = (offset, attempts)
+        return offset
+
+    def _process_batch(self, messages: list[Message]) -> list[TopicPartition]:
+        """
+        Method splits batch by partitions, hands every partition to the worker pool, waits for all of them and
+        returns offsets to commit. Offset of partition is committed only up to its first failed message, the
+        partition is consumed again from that message
+        """
+        partitions: dict[int, list[Message]] = {}
+        for message in messages:
+            if message.error():
+                self.logger.error(message.error())
+                continue
+            partitions.setdefault(message.partition(), []).append(message)
+
+        futures = {
+            partition: self.executor.submit(self._handle_partition_batch, partition_messages)
+            for partition, partition_messages in partitions.items()
+        }
+        wait(futures.values())
+        offsets = []
+        for partition, partition_messages in partitions.items():
+            failed = futures[partition].result()
+            if failed is None:
+                self._attempts.pop(partition, None)
+                offsets.append(TopicPartition(self._topic, partition, partition_messages[-1].offset() + 1))
+                continue
+            offset = TopicPartition(self._topic, partition, self._next_offset(failed))
+            offsets.append(offset)
+            # messages after the failed one are already fetched, so fetch position is moved back
+            self.consumer.seek(offset)
+        return offsets
 
     def _consume(self):
         """
-        Method to run infinity loop which consumes messages with selected _topic, decode it and then calls custom
-        post_consume_action which must be overwritten
+        Method to run infinity loop which consumes batches of messages with selected _topic, processes them with
+        custom post_consume_action which must be overwritten and commits offsets after batch is processed
         """
-        self.consumer.subscribe([self._topic])
+        if self.partitions is not None:
+            # static assignment, group is used only for committing offsets
+            self.consumer.assign(
+                [TopicPartition(self._topic, partition) for partition in self.partitions]
+            )
+        else:
+            self.consumer.subscribe([self._topic])
         while True:
-            message = self.consumer.poll(timeout=1.0)
-            if message is None:
-                continue
-            if message.error():
-                logging.error(message.error())
+            messages = self.consumer.consume(
+                num_messages=self.batch_size, timeout=self.batch_timeout
+            )
+            if not messages:
                 continue
-            msg = message.value().decode('utf-8')
-            self.logger.info(f'Got incoming message {msg} with topic: {self._topic}!')
 
-            try:
-                self.post_consume_action(msg)
-            except Exception as e:
-                self.logger.error(
-                    f'Could not complete post consume action! {e}', exc_info=True
-                )
+            offsets = self._process_batch(messages)
+            if offsets:
+                self.consumer.commit(offsets=offsets, asynchronous=False)
 
         self.consumer.close()
 
+    def listen(self):
+        """Method to consume messages in current thread, blocks forever"""
+        self._consume()
+
     def start_listening(self):
         """Method checks if class already has thread and if it has not then creates thread and starts listening"""
         if self._thread is None or not self._thread.is_alive():
@@ -65,6 +183,6 @@ class KafkaReceiver(ABC, SingletonMixin):
             threading.get_ident()
 
     @abstractmethod
-    def post_consume_action(self, msg: str):
-        """Method for handling incoming messages it should be overwritten"""
+    def post_consume_action(self, msg: str | dict):
+        """Method for handling incoming messages it should be overwritten, gets dict if receiver has codec"""
         raise NotImplementedError
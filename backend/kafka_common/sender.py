@@ -1,54 +1,102 @@
+import asyncio
+import atexit
 import logging
 import threading
+import weakref
+from os import getenv
 
-from confluent_kafka import Producer
+from confluent_kafka import KafkaException, Producer
+
+
+class ProducerRegistry:
+    """Process-wide pool of long-lived producers, one producer per bootstrap config shared by all topics"""
+    _producers: dict[frozenset, Producer] = {}
+    _pollers: dict[frozenset, threading.Thread] = {}
+    _lock = threading.Lock()
+    logger = logging.getLogger('KAFKA PRODUCER REGISTRY')
+
+    @classmethod
+    def get_producer(cls, config: dict) -> Producer:
+        key = frozenset(config.items())
+        producer = cls._producers.get(key)
+        if producer is None:
+            with cls._lock:
+                producer = cls._producers.get(key)
+                if producer is None:
+                    producer = Producer(config)
+                    cls._producers[key] = producer
+        return producer
+
+    @classmethod
+    def start_polling(cls, config: dict) -> Producer:
+        """Method returns pooled producer and makes sure it has background thread serving its delivery callbacks"""
+        key = frozenset(config.items())
+        producer = cls.get_producer(config)
+        with cls._lock:
+            if key not in cls._pollers:
+                poller = threading.Thread(
+                    target=cls._poll_forever, args=(producer,), daemon=True
+                )
+                cls._pollers[key] = poller
+                poller.start()
+        return producer
+
+    @staticmethod
+    def _poll_forever(producer: Producer) -> None:
+        while True:
+            producer.poll(0.1)
+
+    @classmethod
+    def flush_all(cls, timeout: float = 10.0) -> None:
+        """Method to deliver all queued messages of every pooled producer, called on interpreter shutdown"""
+        with cls._lock:
+            producers = list(cls._producers.values())
+        for producer in producers:
+            not_delivered = producer.flush(timeout)
+            if not_delivered:
+                cls.logger.error(f'{not_delivered} messages were not delivered on shutdown!')
+
+
+atexit.register(ProducerRegistry.flush_all)
 
 
 class KafkaSender:
+    default_config = {
+        'bootstrap.servers': f'{getenv("KAFKA_HOST", "kafka")}:{getenv("KAFKA_PORT", "9092")}',
+        'linger.ms': 20,
+        'batch.num.messages': 1000,
+        'compression.type': 'lz4',
+        'acks': 1,
+    }
 
-    def __init__(self, topic: str):
+    def __init__(self, topic: str, config: dict | None = None):
         self.topic = topic
-        self.config = {
-            'bootstrap.servers': 'kafka:9092',
-            'group.id': 'my-group',
-            'auto.offset.reset': 'earliest',
-        }
-        self.producer = Producer(self.config)
-        self.send_thread = None
+        self.config = {**self.default_config, **(config or {})}
+        self.producer = ProducerRegistry.get_producer(self.config)
         self.logger = logging.getLogger(
             f'{self.topic.upper()}: {self.__class__.__name__}'
         )
 
-    def _send_message(self, msg: str):
-        """Sends a message via the producer."""
-
-        # msg here shud be jsonified !!!
-        def msg_callback(err, msg):
-            if err is not None:
-                self.logger.error(f'{msg.topic()} delivery failed {err}')
-            else:
-                self.logger.info(
-                    f'Message from {self.__class__} with {msg.value()} topic {msg.topic()}!'
-                )
-
-        if not self.send_thread or not self.send_thread.is_alive():
-            self.send_thread = threading.Thread(
-                target=self._msg_wrapper, args=(msg, msg_callback)
+    def _delivery_callback(self, err, msg):
+        if err is not None:
+            self.logger.error(f'{msg.topic()} delivery failed {err}')
+        else:
+            self.logger.debug(
+                f'Message from {self.__class__} with {msg.value()} topic {msg.topic()}!'
             )
-            self.send_thread.start()
-            threading.get_ident()
 
-    def _msg_wrapper(self, msg: str, callback):
-        """Wrapper for sending a message via the producer"""
+    def _send_message(self, msg: str | bytes):
+        """Enqueues a message to the shared producer and serves ready delivery callbacks without blocking"""
+        value = msg if isinstance(msg, bytes) else msg.encode('utf-8')
         try:
-            self.producer.produce(self.topic, msg.encode('utf-8'), callback=callback)
-            self.producer.flush()
-        except Exception:
-            self.logger.error(
-                f'Sending message {msg} with {self.topic.upper()}', exc_info=True
-            )
+            self.producer.produce(self.topic, value, callback=self._delivery_callback)
+        except BufferError:
+            # local queue is full, wait for some delivery reports to free space and try once more
+            self.producer.poll(1)
+            self.producer.produce(self.topic, value, callback=self._delivery_callback)
+        self.producer.poll(0)
 
-    def send(self, msg: str):
+    def send(self, msg: str | bytes):
         """Interface method to send a message via the producer with exception handling"""
         try:
             self._send_message(msg)
@@ -56,3 +104,79 @@ class KafkaSender:
             self.logger.error(
                 f'Could not send msg <{msg}> with {self.topic.upper()}', exc_info=True
             )
+
+    def flush(self, timeout: float = 10.0) -> int:
+        """Method to block until all queued messages are delivered, returns count of still queued messages"""
+        return self.producer.flush(timeout)
+
+
+class AsyncKafkaSender:
+    """
+    Asyncio facade over pooled producer: send() never blocks event loop, it waits only for a free in-flight slot
+    and returns future which is resolved from librdkafka delivery callback. Slots are counted per event loop, as
+    semaphore can be awaited only in the loop it is bound to
+    """
+    default_config = KafkaSender.default_config
+
+    def __init__(self, topic: str, config: dict | None = None, max_in_flight: int = 10000):
+        self.topic = topic
+        self.config = {**self.default_config, **(config or {})}
+        self.producer = ProducerRegistry.start_polling(self.config)
+        self.max_in_flight = max_in_flight
+        self._in_flight: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = (
+            weakref.WeakKeyDictionary()
+        )
+        self.logger = logging.getLogger(
+            f'{self.topic.upper()}: {self.__class__.__name__}'
+        )
+
+    def _get_in_flight(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        in_flight = self._in_flight.get(loop)
+        if in_flight is None:
+            in_flight = self._in_flight[loop] = asyncio.Semaphore(self.max_in_flight)
+        return in_flight
+
+    @staticmethod
+    def _resolve(in_flight: asyncio.Semaphore, future: asyncio.Future, err, msg) -> None:
+        in_flight.release()
+        if future.done():
+            return
+        if err is not None:
+            future.set_exception(KafkaException(err))
+        else:
+            future.set_result(msg)
+
+    def _log_delivery(self, future: asyncio.Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            self.logger.error(f'{self.topic} delivery failed {future.exception()}')
+
+    async def send(self, msg: str | bytes) -> asyncio.Future:
+        """Method enqueues message and returns awaitable delivery future, waits if too many messages are in flight"""
+        loop = asyncio.get_running_loop()
+        in_flight = self._get_in_flight(loop)
+        await in_flight.acquire()
+        future = loop.create_future()
+        future.add_done_callback(self._log_delivery)
+
+        def delivery_callback(err, kafka_msg):
+            # called from poller thread, so result must be handed over to the loop thread-safely
+            try:
+                loop.call_soon_threadsafe(self._resolve, in_flight, future, err, kafka_msg)
+            except RuntimeError:
+                self.logger.warning(f'Event loop is closed, dropped delivery report of {self.topic}')
+
+        value = msg if isinstance(msg, bytes) else msg.encode('utf-8')
+        produced = False
+        try:
+            while not produced:
+                try:
+                    self.producer.produce(self.topic, value, on_delivery=delivery_callback)
+                    produced = True
+                except BufferError:
+                    await asyncio.sleep(0.05)
+        finally:
+            # slot of produced message is released by delivery callback, otherwise it is released here, also when
+            # the sending task is cancelled while waiting for space in producer queue
+            if not produced:
+                in_flight.release()
+        return future
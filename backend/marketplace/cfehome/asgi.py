@@ -7,10 +7,12 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cfehome.settings')
 django_asgi_app = get_asgi_application()
 
+from observation.lifespan import BroadcasterLifespan
 from observation.routing import websocket_urlpatterns
 
-application = ProtocolTypeRouter(
+# broadcaster lives in the server event loop, processes of the cluster elect one which sends messages
+application = BroadcasterLifespan(ProtocolTypeRouter(
     {
         'websocket': AuthMiddlewareStack(URLRouter(websocket_urlpatterns)),
     }
-)
+))
@@ -1,6 +1,5 @@
-import json
-
 from courier.kafka_.sender import send_courier_profile_from_django_to_telegram
+from kafka_common.codecs import CourierCodec, CourierLocationCodec
 from kafka_common.receiver import KafkaReceiver
 from kafka_common.topics import CourierTopics
 from utils_.location_tracker import LocationTracker
@@ -8,21 +7,31 @@ from utils_.location_tracker import LocationTracker
 
 class CourierLocationReceiver(KafkaReceiver):
     _topic = CourierTopics.COURIER_LOCATION
+    codec = CourierLocationCodec
+    batch_size = 500
+    workers = 4
+    processes = 4
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, partitions: list[int] | None = None):
+        super().__init__(partitions)
         self.location_tracker = LocationTracker()
 
-    def post_consume_action(self, msg: str):
-        msg_dict = json.loads(msg)
-        self.location_tracker.set_location(
-            courier_id=msg_dict['courier_id'], location=msg_dict['location']
-        )
+    def post_consume_action(self, msg: dict):
+        if 'locations' not in msg:
+            # message of the first codec version carries single location
+            msg = {'locations': [[msg['courier_id'], msg['lat'], msg['lon'], None]]}
+        self.location_tracker.set_locations({
+            courier_id: {'lat': lat, 'lon': lon} if ts is None else {'lat': lat, 'lon': lon, 'ts': ts}
+            for courier_id, lat, lon, ts in msg['locations']
+        })
 
 
 class CourierProfileAskReceiver(KafkaReceiver):
     _topic = CourierTopics.COURIER_PROFILE_ASK
+    codec = CourierCodec
 
-    def post_consume_action(self, msg: str):
-        msg = json.loads(msg)
-        send_courier_profile_from_django_to_telegram(msg)
+    def post_consume_action(self, msg: dict):
+        courier_dict = {
+            field: msg[field] for field in ('id', 'username', 'first_name', 'last_name')
+        }
+        send_courier_profile_from_django_to_telegram(courier_dict)
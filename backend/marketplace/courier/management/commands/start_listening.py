@@ -1,25 +1,76 @@
-import time
+import logging
+import multiprocessing
+import os
 
 from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+RECEIVERS = (
+    'courier.kafka_.receiver.CourierLocationReceiver',
+    'courier.kafka_.receiver.CourierProfileAskReceiver',
+    'delivery.kafka_.receiver.DjangoDeliveryReceiver',
+)
+
+
+def run_receiver(receiver_path: str, partitions: list[int] | None) -> None:
+    """Entrypoint of a consumer process, it is spawned so django has to be set up again"""
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cfehome.settings')
+    django.setup()
+    receiver_class = import_string(receiver_path)
+    receiver_class(partitions=partitions).listen()
 
 
 class Command(BaseCommand):
-    help = 'Run kafka message listeners'
+    help = 'Run kafka message listeners, every receiver in its own consumer processes'
 
-    def handle(self, *args, **options):
-        from courier.kafka_.receiver import (
-            CourierLocationReceiver,
-            CourierProfileAskReceiver,
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=None,
+            help='Consumer processes per receiver, overrides receiver class setting',
         )
-        from delivery.kafka_.receiver import DjangoDeliveryReceiver
-
-        location_receiver = CourierLocationReceiver()
-        location_receiver.start_listening()
 
-        profile_ask_receiver = CourierProfileAskReceiver()
-        profile_ask_receiver.start_listening()
+    def get_processes_count(self, receiver_class, processes: int | None) -> int:
+        """More consumers than partitions in one group would sit idle, so count is capped by partitions"""
+        processes = processes or receiver_class.processes
+        if receiver_class.partitions is not None:
+            return min(processes, len(receiver_class.partitions)) or 1
+        try:
+            return min(processes, receiver_class.get_partitions_count())
+        except Exception as e:
+            logging.warning(
+                f'Could not get partitions of {receiver_class._topic} because of {e}'
+            )
+            return processes
 
-        delivery_update_receiver = DjangoDeliveryReceiver()
-        delivery_update_receiver.start_listening()
+    def handle(self, *args, **options):
+        context = multiprocessing.get_context('spawn')
+        workers = []
+        for receiver_path in RECEIVERS:
+            receiver_class = import_string(receiver_path)
+            processes = self.get_processes_count(receiver_class, options['processes'])
+            for number in range(processes):
+                partitions = None
+                if receiver_class.partitions is not None:
+                    partitions = receiver_class.partitions[number::processes]
+                process = context.Process(
+                    target=run_receiver,
+                    args=(receiver_path, partitions),
+                    name=f'{receiver_class.__name__}-{number}',
+                )
+                process.start()
+                workers.append(process)
+            self.stdout.write(
+                f'Started {processes} consumer processes of {receiver_class._topic} '
+                f'in group {receiver_class.get_group_id()}'
+            )
 
-        time.sleep(1000000)
+        try:
+            for process in workers:
+                process.join()
+        except KeyboardInterrupt:
+            for process in workers:
+                process.terminate()
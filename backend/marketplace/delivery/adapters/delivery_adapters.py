@@ -1,7 +1,7 @@
 import logging
 
 from delivery.models import Delivery
-from django.core.serializers import serialize
+from kafka_common.codecs import DeliveryCodec
 
 
 class DeliveryAdapter:
@@ -22,6 +22,9 @@ class DeliveryAdapter:
             logging.error(f'Could not update delivery in db coz of {e}', exc_info=True)
 
     @staticmethod
-    def serialize_delivery(delivery_orm: Delivery):
-        serialized_delivery = serialize('json', [delivery_orm])
-        return serialized_delivery
+    def serialize_delivery(delivery_orm: Delivery) -> bytes:
+        delivery_dict = {
+            field.name: field.value_from_object(delivery_orm)
+            for field in delivery_orm._meta.concrete_fields
+        }
+        return DeliveryCodec.encode(delivery_dict)
@@ -1,20 +1,19 @@
-import json
-
 from courier.kafka_.sender import send_courier_profile_from_django_to_telegram
 from courier.services import CourierDeliveryService
 from delivery.adapters.delivery_adapters import DeliveryAdapter
+from kafka_common.codecs import DeliveryCodec
 from kafka_common.receiver import KafkaReceiver
 from kafka_common.topics import DeliveryTopics
 
 
 class DjangoDeliveryReceiver(KafkaReceiver):
     _topic = DeliveryTopics.DELIVERED
+    codec = DeliveryCodec
+    workers = 4
 
-    def post_consume_action(self, msg: str):
-        delivery_dict: dict = json.loads(msg)
-
+    def post_consume_action(self, msg: dict):
         adapter = DeliveryAdapter()
-        delivery_db = adapter.update_delivery_in_db_from_telegrma(delivery_dict)
+        delivery_db = adapter.update_delivery_in_db_from_telegrma(msg)
 
         c_service = CourierDeliveryService()
         courier_db = c_service.close_delivery(delivery_db)
@@ -1,26 +1,51 @@
 import json
 
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 
-from observation.services.service import WebsocketUsersManager
+from observation.services.service import LocationMessageCreator
+from observation.services.viewports import Tile, ViewportRegistry, group_name, viewport_tiles
 
 
 class MapObservationConsumer(AsyncWebsocketConsumer):
 
     async def connect(self):
-        await self.channel_layer.group_add("observers", self.channel_name)
+        # observer is subscribed to tiles of their map after he sends the viewport
+        self.viewport_groups: set[str] = set()
         await self.accept()
-        await WebsocketUsersManager.connect()
 
     async def disconnect(self, code):
-        await WebsocketUsersManager.disconnect()
-        await self.channel_layer.group_discard("observers", self.channel_name)
+        await self._set_groups(set())
 
     async def receive(self, text_data):
         text_data_json = json.loads(text_data)
+        if text_data_json.get('type') == 'viewport':
+            try:
+                level, tiles = viewport_tiles(text_data_json['bbox'], text_data_json['zoom'])
+            except (KeyError, TypeError, ValueError) as e:
+                await self.send(text_data=json.dumps({'type': 'error', 'message': f'Invalid viewport: {e}'}))
+                return
+            await self.change_viewport(level, tiles)
+            return
         message = text_data_json['message']
         await self.send(text_data=json.dumps({'message': message}))
 
+    async def change_viewport(self, level: int, tiles: list[Tile]):
+        """Method moves observer to groups of tiles covering the viewport on pan or zoom"""
+        await self._set_groups({group_name(level, x, y) for x, y in tiles})
+        # groups get only changes, so observer starts with current state of the viewport
+        await self.send(text_data=await LocationMessageCreator().create_snapshot(level, tiles))
+
+    async def _set_groups(self, groups: set[str]):
+        added = groups - self.viewport_groups
+        removed = self.viewport_groups - groups
+        for group in added:
+            await self.channel_layer.group_add(group, self.channel_name)
+        for group in removed:
+            await self.channel_layer.group_discard(group, self.channel_name)
+        await sync_to_async(ViewportRegistry.change)(added, removed)
+        self.viewport_groups = groups
+
     async def send_message(self, event):
         message = event["message"]
         await self.send(text_data=message)
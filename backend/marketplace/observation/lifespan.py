@@ -0,0 +1,44 @@
+import asyncio
+
+from observation.services.service import run_broadcaster
+
+
+class BroadcasterLifespan:
+    """
+    ASGI middleware which runs observation broadcaster as a task in the event loop of the server. Task is started on
+    lifespan startup and cancelled on shutdown, servers which do not send lifespan events (daphne) start it with the
+    first websocket connection
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._task: asyncio.Task | None = None
+
+    def _start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(run_broadcaster())
+
+    async def _stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] == 'websocket':
+            self._start()
+        await self.app(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self._start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self._stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
@@ -1,13 +1,18 @@
 import asyncio
 import json
-import threading
+import logging
 from abc import ABC, abstractmethod
+from typing import Awaitable, Callable
 
+from asgiref.sync import sync_to_async
 from channels.consumer import get_channel_layer
-from channels.generic.websocket import AsyncWebsocketConsumer
 from kafka_common.receiver import SingletonMixin
+from redis.asyncio import Redis as AsyncRedis
+from redis.exceptions import RedisError
 
-from utils_.location_tracker import LocationTracker
+from observation.services.viewports import DETAIL_ZOOM, Tile, TileClusters, ViewportRegistry, group_name, tile_key, \
+    tile_of, tiles_bbox
+from utils_.location_tracker import LocationTracker, get_async_redis
 
 
 class WebsocketMessageProvider(SingletonMixin):
@@ -15,23 +20,25 @@ class WebsocketMessageProvider(SingletonMixin):
 
     def __init__(self, message_creators: list['MessageCreator'] | None = None) -> None:
         self._message_creators = message_creators
+        # messages of creators from the previous leadership are not sent
+        self._message_queue = []
 
     async def get_messages_from_creators(self):
         if self._message_creators:
             for creator in self._message_creators:
-                message = await creator.create_message()
-                self._message_queue.append(message)
+                self._message_queue.extend(await creator.create_messages())
 
-    async def get_next_message(self) -> str:
+    async def get_next_message(self) -> tuple[str, str] | None:
+        """Method returns group and message for it, messages of one frame go in order they were created"""
         if not self._message_queue:
-            await asyncio.sleep(3)
+            # creators wait until they have something to send, so there is no polling
             await self.get_messages_from_creators()
-        message = self._message_queue.pop()
-        return message
+        if not self._message_queue:
+            return None
+        return self._message_queue.pop(0)
 
 
 class WebsocketMessageSender(SingletonMixin):
-    _messaging_activity: bool = False
 
     def __init__(self, message_provider: WebsocketMessageProvider) -> None:
         self.message_provider = message_provider
@@ -42,93 +49,177 @@ class WebsocketMessageSender(SingletonMixin):
     async def send_message_to_group_periodically(self):
         channel_layer = get_channel_layer()
         while True:
-            if await self.get_messaging_activity():
-                message = await self.message_provider.get_next_message()
-                if message:
-                    await channel_layer.group_send("observers", {
-                        "type": "send_message",
-                        "message": message
-                    })
-
-    @classmethod
-    async def get_messaging_activity(cls):
-        return cls._messaging_activity
-
-    @classmethod
-    async def set_messaging_activity(cls, value: bool):
-        cls._messaging_activity = value
-        return cls._messaging_activity
-
-
-class WebsocketUsersManager(SingletonMixin):
-    _observers: int = 0
-    _message_sender = WebsocketMessageSender
-
-    @classmethod
-    async def _add_observer(cls):
-        cls._observers += 1
-
-    @classmethod
-    async def _remove_observer(cls):
-        cls._observers -= 1
-
-    @classmethod
-    async def _get_observers(cls):
-        return cls._observers
-
-    @classmethod
-    async def connect(cls):
-        await cls._add_observer()
-        if not await cls._message_sender.get_messaging_activity():
-            await cls._message_sender.set_messaging_activity(True)
-
-    @classmethod
-    async def disconnect(cls):
-        await cls._remove_observer()
-        if not await cls._get_observers():
-            await cls._message_sender.set_messaging_activity(False)
-
-
-class MapObservationConsumer(AsyncWebsocketConsumer):
-
-    async def connect(self):
-        await self.channel_layer.group_add("observers", self.channel_name)
-        await self.accept()
-        await WebsocketUsersManager.connect()
-
-    async def disconnect(self, code):
-        await WebsocketUsersManager.disconnect()
-        await self.channel_layer.group_discard("observers", self.channel_name)
-
-    async def receive(self, text_data):
-        text_data_json = json.loads(text_data)
-        message = text_data_json['message']
-        await self.send(text_data=json.dumps({'message': message}))
-
-    async def send_message(self, event):
-        message = event["message"]
-        await self.send(text_data=message)
-
-    async def send_message_to_group(self, event):
-        await self.send(text_data=event["message"])
+            # provider waits until creators have messages, so the loop sleeps while couriers stand still
+            next_message = await self.message_provider.get_next_message()
+            if next_message:
+                group, message = next_message
+                await channel_layer.group_send(group, {
+                    "type": "send_message",
+                    "message": message
+                })
 
 
 class MessageCreator(ABC):
 
     @abstractmethod
-    async def create_message(self) -> str:
+    async def create_messages(self) -> list[tuple[str, str]]:
+        """Method returns (group, message) pairs, every message is sent only to observers of its group"""
         raise NotImplementedError
 
+    async def close(self) -> None:
+        """Method stops background work of the creator when broadcaster is stopped"""
+
 
 class LocationMessageCreator(MessageCreator):
+    """
+    Turns location updates published by LocationTracker into messages for groups of map tiles. Updates which come
+    during frame_interval are coalesced, so every moved courier is sent once per frame and nothing is sent while
+    couriers stand still. Observers zoomed in to DETAIL_ZOOM get deltas of a tile {courier_id: [lat, lon] or null if
+    courier left the tile}, observers of lower zoom get clusters of changed tiles. Observer keeps couriers per tile,
+    so order of deltas of different tiles does not matter when courier moves between them. Groups nobody watches are
+    skipped, current state of the viewport is sent to observer by create_snapshot
+    """
+    frame_interval: float = 1.0  # seconds
+    reconnect_delay: float = 1.0  # seconds
 
     def __init__(self):
         self.locator = LocationTracker()
-
-    async def create_message(self) -> str:
-        locations = self.locator.get_all_locations()
-        message = json.dumps({'couriers': locations})
-        return message
+        self.clusters = TileClusters()
+        self._positions: dict[int, list[float]] = {}
+        self._changes: dict[int, list[float] | None] = {}
+        self._changed: asyncio.Event | None = None
+        self._listener: asyncio.Task | None = None
+        self._redis = None
+
+    async def _reload(self):
+        """Method loads all locations, so updates lost while subscription was down are sent with the next frame"""
+        locations = await sync_to_async(self.locator.get_all_locations)()
+        self._changes.update({courier_id: None for courier_id in self._positions if courier_id not in locations})
+        self._changes.update({
+            courier_id: [location['lat'], location['lon']] for courier_id, location in locations.items()
+        })
+        self._changed.set()
+
+    @staticmethod
+    def _parse_update(data: bytes) -> dict[int, list[float] | None]:
+        """Method raises ValueError, TypeError or AttributeError if payload is malformed"""
+        changes = {}
+        for courier_id, position in json.loads(data).items():
+            if position is not None:
+                lat, lon = position
+                position = [float(lat), float(lon)]
+            changes[int(courier_id)] = position
+        return changes
+
+    async def _listen(self):
+        while True:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(LocationTracker.updates_channel)
+                # locations are read after subscription, so no update is missed between them
+                await self._reload()
+                async for message in pubsub.listen():
+                    try:
+                        changes = self._parse_update(message['data'])
+                    except (ValueError, TypeError, AttributeError) as e:
+                        logging.error(f'Malformed location update {message["data"]!r} is skipped! {e}')
+                        continue
+                    self._changes.update(changes)
+                    self._changed.set()
+            except RedisError as e:
+                logging.error(f'Location updates subscription is lost! {e}')
+                await asyncio.sleep(self.reconnect_delay)
+            finally:
+                await pubsub.aclose()
+
+    async def close(self) -> None:
+        if self._listener is None:
+            return
+        self._listener.cancel()
+        await asyncio.gather(self._listener, return_exceptions=True)
+        await self._redis.aclose()
+        self._listener = None
+
+    def _apply(
+            self, changes: dict[int, list[float] | None]
+    ) -> tuple[dict[Tile, dict[int, list[float] | None]], set[tuple[int, Tile]]]:
+        """Method moves couriers, returns deltas per detail tile and (level, tile) of changed clusters"""
+        deltas: dict[Tile, dict[int, list[float] | None]] = {}
+        touched: set[tuple[int, Tile]] = set()
+        for courier_id, position in changes.items():
+            old = self._positions.pop(courier_id, None)
+            if old is not None and old == position:
+                self._positions[courier_id] = old
+                continue
+            new_tile = None
+            if position is not None:
+                self._positions[courier_id] = position
+                touched.update(self.clusters.add(*position))
+                new_tile = tile_of(*position, DETAIL_ZOOM)
+                deltas.setdefault(new_tile, {})[courier_id] = position
+            if old is not None:
+                touched.update(self.clusters.remove(*old))
+                old_tile = tile_of(*old, DETAIL_ZOOM)
+                if old_tile != new_tile:
+                    deltas.setdefault(old_tile, {})[courier_id] = None
+        return deltas, touched
+
+    async def create_messages(self) -> list[tuple[str, str]]:
+        if self._listener is None:
+            self._redis = get_async_redis()
+            self._changed = asyncio.Event()
+            self._listener = asyncio.create_task(self._listen())
+        changed = asyncio.ensure_future(self._changed.wait())
+        await asyncio.wait({changed, self._listener}, return_when=asyncio.FIRST_COMPLETED)
+        if self._listener.done():
+            changed.cancel()
+            # broadcaster is restarted by its leader, so failure of the listener is not hidden
+            self._listener.result()
+            raise RuntimeError('Location updates listener is stopped')
+        await asyncio.sleep(self.frame_interval)
+        self._changed.clear()
+        changes, self._changes = self._changes, {}
+        deltas, touched = self._apply(changes)
+        watched = await ViewportRegistry.watched(self._redis)
+        messages = []
+        for tile, couriers in deltas.items():
+            group = group_name(DETAIL_ZOOM, *tile)
+            if group in watched:
+                messages.append((group, json.dumps({'type': 'delta', 'tile': tile_key(tile), 'couriers': couriers})))
+        for level, tile in touched:
+            group = group_name(level, *tile)
+            if group in watched:
+                messages.append((group, json.dumps({
+                    'type': 'clusters',
+                    'level': level,
+                    'tile': tile_key(tile),
+                    'clusters': self.clusters.clusters(level, tile),
+                })))
+        return messages
+
+    async def create_snapshot(self, level: int, tiles: list[Tile]) -> str:
+        """Method returns couriers per tile at DETAIL_ZOOM level or clusters per tile at lower levels"""
+        locations = await sync_to_async(self.locator.get_locations_within_box)(*tiles_bbox(tiles, level))
+        if level == DETAIL_ZOOM:
+            couriers: dict[Tile, dict[int, list[float]]] = {tile: {} for tile in tiles}
+            for courier_id, location in locations.items():
+                tile = tile_of(location['lat'], location['lon'], level)
+                # box of the antimeridian viewport is wider than its tiles
+                if tile in couriers:
+                    couriers[tile][courier_id] = [location['lat'], location['lon']]
+            return json.dumps({
+                'type': 'snapshot',
+                'level': level,
+                'couriers': {tile_key(tile): tile_couriers for tile, tile_couriers in couriers.items()},
+            })
+        clusters = TileClusters(levels=(level,))
+        for location in locations.values():
+            clusters.add(location['lat'], location['lon'])
+        return json.dumps({
+            'type': 'snapshot',
+            'level': level,
+            'clusters': {tile_key(tile): clusters.clusters(level, tile) for tile in tiles},
+        })
 
 
 class WebsocketFacade:
@@ -156,19 +247,66 @@ class WebsocketFacade:
         creators = await self._init_message_creators()
         provider = await self._init_message_provider(creators)
         sender = self.message_sender(provider)
-        await sender.trigger_messaging()
-
-
-def run_websocket():
+        try:
+            await sender.trigger_messaging()
+        finally:
+            for creator in creators:
+                await creator.close()
+
+
+class BroadcasterLeader:
+    """
+    Redis lock which makes only one process of the cluster broadcast to observers. Leader renews the lock every
+    renew_interval, other processes try to take it every retry_interval, so lock of the died leader is taken in at
+    most ttl + retry_interval seconds. Broadcasting is cancelled as soon as the lock is lost
+    """
+    key = 'observation:broadcaster'
+    ttl: float = 15  # seconds
+    renew_interval: float = 5  # seconds
+    retry_interval: float = 5  # seconds
+
+    def __init__(self, redis: AsyncRedis):
+        self._lock = redis.lock(self.key, timeout=self.ttl, sleep=self.retry_interval, thread_local=False)
+
+    async def lead(self, work: Callable[[], Awaitable]) -> None:
+        """Method runs work while this process holds the lock, it waits for the lock again when work is stopped"""
+        while True:
+            try:
+                await self._lock.acquire()
+            except RedisError as e:
+                logging.error(f'Could not take observation broadcaster lock! {e}')
+                await asyncio.sleep(self.retry_interval)
+                continue
+            logging.info('Process is elected as observation broadcaster')
+            task = asyncio.create_task(work())
+            try:
+                while not task.done():
+                    await asyncio.wait({task}, timeout=self.renew_interval)
+                    if not task.done():
+                        await self._lock.reacquire()
+            except RedisError as e:
+                logging.error(f'Observation broadcaster lost leadership! {e}')
+            finally:
+                task.cancel()
+                [result] = await asyncio.gather(task, return_exceptions=True)
+                if isinstance(result, Exception):
+                    logging.error(f'Observation broadcaster failed! {result}', exc_info=result)
+                try:
+                    await self._lock.release()
+                except RedisError:
+                    pass
+            await asyncio.sleep(self.retry_interval)
+
+
+async def run_broadcaster():
+    """Coroutine is run in the event loop of ASGI server, it broadcasts only while the process is the leader"""
     facade = WebsocketFacade(
         [LocationMessageCreator],
         WebsocketMessageProvider,
         WebsocketMessageSender
     )
-    asyncio.run(
-        facade.start_service()
-    )
-
-
-thread = threading.Thread(target=run_websocket, daemon=True)
-thread.start()
+    redis = get_async_redis()
+    try:
+        await BroadcasterLeader(redis).lead(facade.start_service)
+    finally:
+        await redis.aclose()
@@ -0,0 +1,143 @@
+import math
+from typing import Iterable
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+
+from utils_.location_tracker import get_connection_pool
+
+MAX_LAT = 85.05112878  # web mercator tiles do not cover poles
+DETAIL_ZOOM = 12  # observers zoomed in so far get locations of couriers, tiles of this zoom are their groups
+CLUSTER_CELLS_SHIFT = 3  # tile of cluster level is split in 8 x 8 cells, couriers of a cell are one cluster
+MAX_TILES = 64  # observer viewport covering more tiles is moved to the next lower level
+
+Tile = tuple[int, int]
+
+
+def tile_of(lat: float, lon: float, zoom: int) -> Tile:
+    """Function returns x, y of web mercator tile which contains the point"""
+    lat = max(-MAX_LAT, min(MAX_LAT, lat))
+    tiles = 1 << zoom
+    x = int((lon + 180) / 360 * tiles)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * tiles)
+    return min(max(x, 0), tiles - 1), min(max(y, 0), tiles - 1)
+
+
+def tile_bounds(x: int, y: int, zoom: int) -> tuple[float, float, float, float]:
+    """Function returns min_lat, min_lon, max_lat, max_lon of the tile"""
+    tiles = 1 << zoom
+
+    def lat_of(row: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / tiles))))
+
+    return lat_of(y + 1), x / tiles * 360 - 180, lat_of(y), (x + 1) / tiles * 360 - 180
+
+
+def viewport_tiles(bbox: Iterable[float], zoom: float) -> tuple[int, list[Tile]]:
+    """
+    Function returns level of observer groups and tiles covering the bbox [min_lat, min_lon, max_lat, max_lon].
+    Level DETAIL_ZOOM means courier locations, lower levels mean clusters. Bbox with min_lon greater than max_lon
+    crosses the antimeridian, it is split in two parts. Raises ValueError if bbox is malformed
+    """
+    min_lat, min_lon, max_lat, max_lon = (float(value) for value in bbox)
+    if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+        raise ValueError(f'Bbox {bbox} is out of bounds')
+    lon_ranges = [(min_lon, max_lon)] if min_lon <= max_lon else [(min_lon, 180), (-180, max_lon)]
+    zoom = float(zoom)
+    level = DETAIL_ZOOM if zoom >= DETAIL_ZOOM else max(0, int(zoom))
+    while True:
+        tiles = {}
+        for west, east in lon_ranges:
+            min_x, min_y = tile_of(max_lat, west, level)
+            max_x, max_y = tile_of(min_lat, east, level)
+            # parts may share tiles at low levels, dict keeps them once and in order
+            tiles.update(dict.fromkeys((x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)))
+        if len(tiles) <= MAX_TILES or level == 0:
+            return level, list(tiles)
+        level -= 1
+
+
+def tiles_bbox(tiles: list[Tile], level: int) -> tuple[float, float, float, float]:
+    bounds = [tile_bounds(x, y, level) for x, y in tiles]
+    return (
+        min(bound[0] for bound in bounds),
+        min(bound[1] for bound in bounds),
+        max(bound[2] for bound in bounds),
+        max(bound[3] for bound in bounds),
+    )
+
+
+def tile_key(tile: Tile) -> str:
+    """Function returns key of the tile in messages to observers"""
+    return f'{tile[0]}.{tile[1]}'
+
+
+def group_name(level: int, x: int, y: int) -> str:
+    kind = 'couriers' if level == DETAIL_ZOOM else 'clusters'
+    return f'observers.{kind}.{level}.{x}.{y}'
+
+
+class TileClusters:
+    """
+    Couriers count and sum of coordinates per cluster cell, grouped by tile of every cluster level. Moves are applied
+    incrementally, so clusters of a tile are got without going through all couriers
+    """
+
+    def __init__(self, levels: Iterable[int] = range(DETAIL_ZOOM)):
+        self.levels = tuple(levels)
+        self._cells: dict[int, dict[Tile, dict[Tile, list[float]]]] = {level: {} for level in self.levels}
+
+    def _apply(self, lat: float, lon: float, sign: int) -> list[tuple[int, Tile]]:
+        touched = []
+        for level in self.levels:
+            cell = tile_of(lat, lon, level + CLUSTER_CELLS_SHIFT)
+            tile = (cell[0] >> CLUSTER_CELLS_SHIFT, cell[1] >> CLUSTER_CELLS_SHIFT)
+            cells = self._cells[level].setdefault(tile, {})
+            sums = cells.setdefault(cell, [0, 0.0, 0.0])
+            sums[0] += sign
+            sums[1] += sign * lat
+            sums[2] += sign * lon
+            if sums[0] <= 0:
+                del cells[cell]
+                if not cells:
+                    del self._cells[level][tile]
+            touched.append((level, tile))
+        return touched
+
+    def add(self, lat: float, lon: float) -> list[tuple[int, Tile]]:
+        """Method returns (level, tile) of every cluster level which clusters are changed"""
+        return self._apply(lat, lon, 1)
+
+    def remove(self, lat: float, lon: float) -> list[tuple[int, Tile]]:
+        return self._apply(lat, lon, -1)
+
+    def tiles(self, level: int) -> list[Tile]:
+        return list(self._cells[level])
+
+    def clusters(self, level: int, tile: Tile) -> list[list[float]]:
+        """Method returns [lat, lon, count] of every cluster in the tile, lat and lon are centers of its couriers"""
+        return [
+            [round(lat_sum / count, 6), round(lon_sum / count, 6), count]
+            for count, lat_sum, lon_sum in self._cells[level].get(tile, {}).values()
+        ]
+
+
+class ViewportRegistry:
+    """Numbers of observers subscribed to every group, kept in Redis, so broadcaster sends only to watched tiles"""
+    key = 'observation:groups'
+
+    @classmethod
+    def change(cls, added: set[str], removed: set[str]) -> None:
+        if not added and not removed:
+            return
+        pipe = Redis(connection_pool=get_connection_pool()).pipeline(transaction=False)
+        for group in added:
+            pipe.hincrby(cls.key, group, 1)
+        for group in removed:
+            pipe.hincrby(cls.key, group, -1)
+        pipe.execute()
+
+    @classmethod
+    async def watched(cls, redis: AsyncRedis) -> set[str]:
+        counts = await redis.hgetall(cls.key)
+        return {group.decode() for group, count in counts.items() if int(count) > 0}
@@ -0,0 +1,35 @@
+from django.test import SimpleTestCase
+from observation.services.service import LocationMessageCreator
+from observation.services.viewports import DETAIL_ZOOM, tile_bounds, tile_of
+
+# point on the border of two detail tiles
+BORDER_LAT, BORDER_LON = 55.75, tile_bounds(*tile_of(55.75, 37.617, DETAIL_ZOOM), DETAIL_ZOOM)[3]
+WEST = [BORDER_LAT, BORDER_LON - 0.001]
+EAST = [BORDER_LAT, BORDER_LON + 0.001]
+WEST_TILE = tile_of(*WEST, DETAIL_ZOOM)
+EAST_TILE = tile_of(*EAST, DETAIL_ZOOM)
+
+
+class LocationMessageCreatorApplyTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.creator = LocationMessageCreator()
+        self.creator._apply({1: WEST, 2: EAST})
+
+    def test_courier_crossing_tiles_is_removed_from_old_tile_only(self):
+        deltas, _ = self.creator._apply({1: EAST})
+        self.assertEqual(deltas, {EAST_TILE: {1: EAST}, WEST_TILE: {1: None}})
+
+    def test_couriers_swapping_tiles_keep_both_positions(self):
+        deltas, _ = self.creator._apply({1: EAST, 2: WEST})
+        self.assertEqual(deltas, {EAST_TILE: {1: EAST, 2: None}, WEST_TILE: {1: None, 2: WEST}})
+
+    def test_standing_courier_gives_no_delta(self):
+        deltas, touched = self.creator._apply({1: list(WEST)})
+        self.assertEqual(deltas, {})
+        self.assertEqual(touched, set())
+
+    def test_removed_courier_changes_clusters(self):
+        deltas, touched = self.creator._apply({2: None})
+        self.assertEqual(deltas, {EAST_TILE: {2: None}})
+        self.assertEqual({level for level, _ in touched}, set(range(DETAIL_ZOOM)))
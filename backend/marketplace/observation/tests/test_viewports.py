@@ -0,0 +1,68 @@
+from django.test import SimpleTestCase
+from observation.services.viewports import (
+    DETAIL_ZOOM,
+    MAX_TILES,
+    TileClusters,
+    tile_bounds,
+    tile_of,
+    tiles_bbox,
+    viewport_tiles,
+)
+
+
+class TileOfTestCase(SimpleTestCase):
+
+    def test_tile_of_point_is_inside_its_bounds(self):
+        x, y = tile_of(55.75, 37.62, DETAIL_ZOOM)
+        min_lat, min_lon, max_lat, max_lon = tile_bounds(x, y, DETAIL_ZOOM)
+        self.assertTrue(min_lat <= 55.75 <= max_lat)
+        self.assertTrue(min_lon <= 37.62 <= max_lon)
+
+    def test_tile_of_clamps_poles_and_antimeridian(self):
+        self.assertEqual(tile_of(90, 180, 2), (3, 0))
+        self.assertEqual(tile_of(-90, -180, 2), (0, 3))
+
+
+class ViewportTilesTestCase(SimpleTestCase):
+
+    def test_zoomed_in_viewport_gets_detail_tiles(self):
+        level, tiles = viewport_tiles([55.74, 37.60, 55.76, 37.64], 14)
+        self.assertEqual(level, DETAIL_ZOOM)
+        self.assertIn(tile_of(55.75, 37.62, DETAIL_ZOOM), tiles)
+
+    def test_wide_viewport_is_moved_to_lower_level(self):
+        level, tiles = viewport_tiles([-85, -180, 85, 180], 8)
+        self.assertLess(level, 8)
+        self.assertLessEqual(len(tiles), MAX_TILES)
+
+    def test_antimeridian_viewport_is_split(self):
+        level, tiles = viewport_tiles([-10, 170, 10, -170], 5)
+        self.assertEqual(level, 5)
+        xs = {x for x, _ in tiles}
+        self.assertEqual(xs, {0, 31})
+        self.assertEqual(len(tiles_bbox(tiles, level)), 4)
+
+    def test_malformed_viewport_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            viewport_tiles([10, 0, -10, 1], 5)
+        with self.assertRaises(ValueError):
+            viewport_tiles([0, 0, 1], 5)
+
+
+class TileClustersTestCase(SimpleTestCase):
+
+    def test_near_couriers_are_one_cluster(self):
+        clusters = TileClusters(levels=(3,))
+        clusters.add(55.75, 37.60)
+        clusters.add(55.76, 37.62)
+        tile = tile_of(55.75, 37.60, 3)
+        self.assertEqual(clusters.clusters(3, tile), [[55.755, 37.61, 2]])
+
+    def test_removed_courier_leaves_cluster(self):
+        clusters = TileClusters(levels=(3,))
+        touched = clusters.add(55.75, 37.60)
+        clusters.add(55.76, 37.62)
+        self.assertEqual(clusters.remove(55.75, 37.60), touched)
+        self.assertEqual(clusters.clusters(3, touched[0][1]), [[55.76, 37.62, 1]])
+        clusters.remove(55.76, 37.62)
+        self.assertEqual(clusters.tiles(3), [])
@@ -1,31 +1,208 @@
+import datetime
 import json
 import logging
+import math
+import time
 
-from redis import Redis
+from django.conf import settings
+from redis import ConnectionPool, Redis
+from redis.asyncio import Redis as AsyncRedis
+
+KM_PER_DEGREE = math.pi * 6371.0088 / 180
+
+_pool: ConnectionPool | None = None
+
+
+def get_connection_pool() -> ConnectionPool:
+    """Function returns pool shared by all trackers of the process, so every tracker does not open own connection"""
+    global _pool
+    if _pool is None:
+        _pool = ConnectionPool(
+            host=settings.REDIS_HOST or 'redis', port=int(settings.REDIS_PORT or 6379)
+        )
+    return _pool
+
+
+def get_async_redis() -> AsyncRedis:
+    """Function returns client for asyncio code, it must be used only in the event loop it was created in"""
+    return AsyncRedis(host=settings.REDIS_HOST or 'redis', port=int(settings.REDIS_PORT or 6379))
 
 
 class LocationTracker:
+    """
+    Couriers locations in own Redis namespace: positions are members of GEO set, so radius and box queries are done
+    by Redis, and location dicts with time of update are fields of one hash, so all of them are read with one command.
+    Every written batch is published to updates_channel as {courier_id: [lat, lon]}, removed couriers go with null
+    """
+    namespace = 'courier_locations'
+    updates_channel = f'{namespace}:updates'
 
     def __init__(self):
-        self.redis: Redis = Redis(host='redis', port=6379)
+        self.redis: Redis = Redis(connection_pool=get_connection_pool())
+        self.geo_key = f'{self.namespace}:geo'
+        self.hash_key = f'{self.namespace}:meta'
+        self.history = LocationHistory(self.redis)
 
-    def set_location(self, courier_id: str, location: dict[str, str]):
-        self.redis.set(courier_id, json.dumps(location))
+    @staticmethod
+    def _load(payload: bytes | None) -> dict | None:
+        return json.loads(payload) if payload is not None else None
 
-    def get_location(self, courier_id: str) -> dict[str, str] | None:
-        try:
-            location = self.redis.get(courier_id)
-            return json.loads(location)
-        except TypeError as e:
-            logging.error(f'Could not fetch courier location {e}')
+    def set_location(self, courier_id: str | int, location: dict[str, float]):
+        self.set_locations({courier_id: location})
+
+    def set_locations(self, locations: dict[str | int, dict[str, float]]):
+        """Method writes batch of locations with one round trip"""
+        if not locations:
             return
+        pipe = self.redis.pipeline(transaction=False)
+        positions = []
+        fields = {}
+        for courier_id, location in locations.items():
+            positions.extend((location['lon'], location['lat'], int(courier_id)))
+            fields[int(courier_id)] = json.dumps({'ts': time.time(), **location})
+        pipe.geoadd(self.geo_key, positions)
+        pipe.hset(self.hash_key, mapping=fields)
+        self.history.append(pipe, locations)
+        pipe.publish(self.updates_channel, json.dumps({
+            int(courier_id): [location['lat'], location['lon']] for courier_id, location in locations.items()
+        }))
+        pipe.execute()
+
+    def remove_location(self, courier_id: str | int):
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zrem(self.geo_key, int(courier_id))
+        pipe.hdel(self.hash_key, int(courier_id))
+        pipe.publish(self.updates_channel, json.dumps({int(courier_id): None}))
+        pipe.execute()
+
+    def get_location(self, courier_id: str | int) -> dict[str, float] | None:
+        location = self._load(self.redis.hget(self.hash_key, int(courier_id)))
+        if location is None:
+            logging.error(f'Could not fetch courier {courier_id} location')
+        return location
+
+    def get_locations(self, courier_ids: list[str | int]) -> dict[int, dict[str, float]]:
+        """Method returns locations of passed couriers with one HMGET, couriers without location are skipped"""
+        if not courier_ids:
+            return {}
+        ids = [int(courier_id) for courier_id in courier_ids]
+        payloads = self.redis.hmget(self.hash_key, ids)
+        return {
+            courier_id: self._load(payload)
+            for courier_id, payload in zip(ids, payloads)
+            if payload is not None
+        }
+
+    def get_all_locations(self) -> dict[int, dict[str, float]]:
+        return {
+            int(courier_id): self._load(payload)
+            for courier_id, payload in self.redis.hgetall(self.hash_key).items()
+        }
+
+    def get_locations_within_radius(
+            self, lat: float, lon: float, radius_km: float
+    ) -> dict[int, dict[str, float]]:
+        """Method returns locations of couriers inside the circle ordered from the nearest one"""
+        ids = self.redis.geosearch(
+            self.geo_key, longitude=lon, latitude=lat, radius=radius_km, unit='km', sort='ASC'
+        )
+        return self.get_locations(ids)
+
+    def get_locations_within_box(
+            self, min_lat: float, min_lon: float, max_lat: float, max_lon: float
+    ) -> dict[int, dict[str, float]]:
+        """Method returns locations of couriers inside the map viewport"""
+        center_lat, center_lon = (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+        # box is measured on the widest latitude of viewport, locations out of bounds are filtered after
+        widest_lat = min(abs(min_lat), abs(max_lat)) if min_lat * max_lat > 0 else 0
+        ids = self.redis.geosearch(
+            self.geo_key,
+            longitude=center_lon,
+            latitude=center_lat,
+            width=(max_lon - min_lon) * KM_PER_DEGREE * math.cos(math.radians(widest_lat)),
+            height=(max_lat - min_lat) * KM_PER_DEGREE,
+            unit='km',
+        )
+        return {
+            courier_id: location
+            for courier_id, location in self.get_locations(ids).items()
+            if min_lat <= location['lat'] <= max_lat and min_lon <= location['lon'] <= max_lon
+        }
+
+
+class LocationHistory:
+    """
+    Append only track of every courier in Redis stream trimmed to max_length entries, entries are written in the same
+    pipeline as current location. Stream entry ids are milliseconds of writing, tracks are queried by time of the fix:
+    stream is read for the range widened by max_lag and entries are filtered by their ts
+    """
+    namespace = 'courier_locations:history'
+    max_length = 20000  # entries per courier, about a day of updates every 5 seconds
+    ttl = 7 * 24 * 3600  # seconds, track of courier who stopped sending locations is deleted after that
+    max_lag = 60  # seconds, location is written not later than that after the fix
+
+    def __init__(self, redis: Redis | None = None):
+        self.redis: Redis = redis or Redis(connection_pool=get_connection_pool())
+
+    def _key(self, courier_id: str | int) -> str:
+        return f'{self.namespace}:{int(courier_id)}'
+
+    @staticmethod
+    def _timestamp(moment: datetime.datetime | float | None) -> float | None:
+        if isinstance(moment, datetime.datetime):
+            return moment.timestamp()
+        return moment
+
+    @staticmethod
+    def _stream_id(moment: float | None, default: str) -> str:
+        if moment is None:
+            return default
+        return str(int(moment * 1000))
+
+    def append(self, pipe, locations: dict[str | int, dict[str, float]]):
+        """Method adds locations to the passed pipeline, trimming is approximate, so it is cheap for Redis"""
+        for courier_id, location in locations.items():
+            fields = {'lat': location['lat'], 'lon': location['lon']}
+            if location.get('ts') is not None:
+                fields['ts'] = location['ts']
+            pipe.xadd(self._key(courier_id), fields, maxlen=self.max_length, approximate=True)
+            pipe.expire(self._key(courier_id), self.ttl)
+
+    def get_track(
+            self,
+            courier_id: str | int,
+            start: datetime.datetime | float | None = None,
+            end: datetime.datetime | float | None = None,
+    ) -> list[dict[str, float]]:
+        """Method returns locations fixed between start and end in order they came, ts is time of the fix"""
+        start, end = self._timestamp(start), self._timestamp(end)
+        entries = self.redis.xrange(
+            self._key(courier_id),
+            min=self._stream_id(start - self.max_lag if start is not None else None, '-'),
+            max=self._stream_id(end + self.max_lag if end is not None else None, '+'),
+        )
+        track = []
+        for entry_id, fields in entries:
+            written_at = int(entry_id.split(b'-')[0]) / 1000
+            fixed_at = float(fields[b'ts']) if b'ts' in fields else written_at
+            if (start is not None and fixed_at < start) or (end is not None and fixed_at > end):
+                continue
+            track.append({'lat': float(fields[b'lat']), 'lon': float(fields[b'lon']), 'ts': fixed_at})
+        return track
 
-    def get_all_locations(self) -> dict[int, dict[str, str]]:
-        pattern = "?????????"
-        cursor, keys = self.redis.scan(match=pattern)
-        cursor2, keys2 = self.redis.scan(match=pattern + '?')
-        result = {}
-        for key in keys + keys2:
-            location = self.get_location(key)
-            result[int(key)] = location
-        return result
+    def get_downsampled_track(
+            self,
+            courier_id: str | int,
+            start: datetime.datetime | float | None = None,
+            end: datetime.datetime | float | None = None,
+            max_points: int = 500,
+    ) -> list[dict[str, float]]:
+        """Method returns at most max_points evenly taken locations of the track for map, the last one is kept"""
+        track = self.get_track(courier_id, start, end)
+        if len(track) <= max_points:
+            return track
+        step = math.ceil(len(track) / max_points)
+        downsampled = track[::step]
+        if downsampled[-1] is not track[-1]:
+            downsampled[-1] = track[-1]
+        return downsampled